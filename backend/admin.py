@@ -0,0 +1,71 @@
+import asyncio
+import os
+import secrets
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import FileResponse
+from profiling import profiler
+from loop_health import loop_watchdog, memory_tracker
+
+router = APIRouter()
+
+# Admin endpoints and the X-Profile header are disabled while this is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def is_admin(request: Request) -> bool:
+    supplied = request.headers.get("x-admin-token")
+    return bool(ADMIN_TOKEN and supplied and secrets.compare_digest(supplied, ADMIN_TOKEN))
+
+
+def require_admin(request: Request) -> None:
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def profile_requested(request: Request) -> bool:
+    """An admin asked for this request to be profiled with ``X-Profile: 1``"""
+    return request.headers.get("x-profile") == "1" and is_admin(request)
+
+
+# -------------------------------------------------
+# PROFILES
+# -------------------------------------------------
+@router.get("/admin/profiles")
+def list_profiles(request: Request):
+    require_admin(request)
+    return {"profiles": profiler.list(), "stats": profiler.stats()}
+
+
+@router.get("/admin/profiles/{name}")
+def get_profile(name: str, request: Request):
+    require_admin(request)
+    path = profiler.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+# -------------------------------------------------
+# EVENT LOOP AND MEMORY
+# -------------------------------------------------
+@router.get("/admin/loop")
+def loop_health(request: Request):
+    require_admin(request)
+    return loop_watchdog.stats()
+
+
+@router.post("/admin/memory/snapshot")
+async def memory_snapshot(request: Request):
+    """
+    Starts tracemalloc on first use; each call reports allocations per
+    module and their change since the previous call.
+    """
+    require_admin(request)
+    return await asyncio.to_thread(memory_tracker.snapshot)
+
+
+@router.delete("/admin/memory")
+def memory_stop(request: Request):
+    require_admin(request)
+    memory_tracker.stop()
+    return {"tracing": False}
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Optional, Dict, Any, List, Protocol
+
+from cache import TTLCache
+from mcp_server import MCP_TOOLS_SCHEMA, STREAMING_TOOLS, WRITE_TOOLS, SESSION_TOOLS, execute_with_token
+
+logger = logging.getLogger(__name__)
+
+# Model turns per request, tool calls included
+MAX_STEPS = 4
+
+# Tool output handed back to the model is cut to this many characters
+MAX_TOOL_RESULT_CHARS = 8000
+
+# Normalized utterance -> tool plan of the first model turn
+PLAN_CACHE_TTL = 3600
+PLAN_CACHE_SIZE = 2000
+
+SYSTEM_PROMPT = (
+    "You are a YouTube assistant. Use the tools to search, inspect and act on "
+    "YouTube for the user. Call independent tools in the same turn. Follow-ups "
+    "about results already shown ('more', 'the best one', 'the third one') "
+    "should use the session_* tools. Answer briefly."
+)
+
+WORD_RE = re.compile(r"[a-z0-9#@_-]+")
+
+
+# ============================================================
+# LLM CLIENTS
+# ============================================================
+
+class LLMClient(Protocol):
+    """
+    One chat-completion turn. ``messages`` and ``tools`` use the OpenAI
+    chat format; the reply is ``{"content": str | None, "tool_calls":
+    [{"id", "name", "arguments"}]}`` with arguments already decoded.
+    """
+
+    async def complete(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ...
+
+
+class OpenAIClient:
+    """LLMClient backed by the OpenAI chat completions API"""
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        from openai import AsyncOpenAI
+
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self._client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+    async def complete(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            parallel_tool_calls=True
+        )
+        message = response.choices[0].message
+        return {
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": call.id,
+                    "name": call.function.name,
+                    "arguments": json.loads(call.function.arguments or "{}")
+                }
+                for call in message.tool_calls or []
+            ]
+        }
+
+
+class StubLLMClient:
+    """
+    Deterministic LLMClient for tests and offline runs. Each turn returns
+    the next scripted reply (``{"content": ...}`` or ``{"tool_calls":
+    [{"name", "arguments"}]}``); once the script is used up it answers
+    "Done." The messages of every turn are kept in ``requests``.
+    """
+
+    def __init__(self, turns: Optional[List[Dict[str, Any]]] = None):
+        self.turns = list(turns or [])
+        self.requests: List[List[Dict[str, Any]]] = []
+
+    async def complete(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.requests.append(list(messages))
+        turn = self.turns.pop(0) if self.turns else {"content": "Done."}
+        return {
+            "content": turn.get("content"),
+            "tool_calls": [
+                {"id": f"stub_{len(self.requests)}_{i}", "name": call["name"], "arguments": call.get("arguments", {})}
+                for i, call in enumerate(turn.get("tool_calls") or [])
+            ]
+        }
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def set_llm_client(client: Optional[LLMClient]) -> None:
+    """Install the client the agent uses (e.g. a deterministic stub)"""
+    global _llm_client
+    _llm_client = client
+
+
+def get_llm_client() -> Optional[LLMClient]:
+    """The installed client, or an OpenAI client when OPENAI_API_KEY is set"""
+    global _llm_client
+    if _llm_client is None and os.getenv("OPENAI_API_KEY"):
+        _llm_client = OpenAIClient()
+    return _llm_client
+
+
+# ============================================================
+# TOOLS AND PLANS
+# ============================================================
+
+_FUNCTION_TOOLS: Optional[List[Dict[str, Any]]] = None
+
+
+def function_tools() -> List[Dict[str, Any]]:
+    """MCP_TOOLS_SCHEMA as chat-completion function tools, built once"""
+    global _FUNCTION_TOOLS
+    if _FUNCTION_TOOLS is None:
+        _FUNCTION_TOOLS = [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool["name"],
+                    "description": tool["description"],
+                    "parameters": tool["input_schema"],
+                }
+            }
+            for tool in MCP_TOOLS_SCHEMA
+            if tool["name"] not in STREAMING_TOOLS
+        ]
+    return _FUNCTION_TOOLS
+
+
+def normalize_utterance(text: str) -> str:
+    """Casing, accents, punctuation and spacing do not change the key; word order does"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(WORD_RE.findall(text))
+
+
+def plan_is_cacheable(calls: List[Dict[str, Any]], has_history: bool) -> bool:
+    """
+    Replaying a plan must not repeat a write, and must not reuse arguments
+    the model took from earlier turns. Session tools carry no such
+    arguments, so their plans are safe in any conversation.
+    """
+    if not calls or any(call["name"] in WRITE_TOOLS for call in calls):
+        return False
+    return not has_history or all(call["name"] in SESSION_TOOLS for call in calls)
+
+
+class Agent:
+    """Tool-calling loop over the tools behind execute_tool"""
+
+    def __init__(self, plan_cache_size: int = PLAN_CACHE_SIZE, plan_ttl: float = PLAN_CACHE_TTL):
+        self.plans = TTLCache(max_entries=plan_cache_size, default_ttl=plan_ttl)
+
+    async def run_calls(
+        self,
+        calls: List[Dict[str, Any]],
+        token: Optional[str],
+        session_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Run one turn's tool calls concurrently"""
+        results = await asyncio.gather(*(
+            execute_with_token(call["name"], call["arguments"], token, session_id=session_id)
+            for call in calls
+        ))
+        return list(results)
+
+    async def chat(
+        self,
+        message: str,
+        token: Optional[str] = None,
+        session_id: Optional[str] = None,
+        history: Optional[List[Dict[str, Any]]] = None,
+        llm: Optional[LLMClient] = None
+    ) -> Dict[str, Any]:
+        llm = llm or get_llm_client()
+        if llm is None:
+            return {"success": False, "error": "No LLM configured (set OPENAI_API_KEY)", "status_code": 503}
+
+        history = [m for m in history or [] if m.get("role") in ("user", "assistant") and m.get("content")]
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}] + history + [{"role": "user", "content": message}]
+        plan_key = normalize_utterance(message)
+        cached_plan = self.plans.get(plan_key) if plan_key else None
+        if cached_plan is not None and not plan_is_cacheable(cached_plan, bool(history)):
+            cached_plan = None
+
+        tool_log = []
+        model_calls = 0
+        reply = None
+
+        for step in range(MAX_STEPS):
+            if step == 0 and cached_plan is not None:
+                calls = [dict(call, id=f"plan_{i}") for i, call in enumerate(cached_plan)]
+                logger.info("Agent reused cached plan for '%s'", plan_key)
+            else:
+                try:
+                    turn = await llm.complete(messages, function_tools())
+                except Exception as e:
+                    logger.error("LLM provider error: %s", e)
+                    return {
+                        "success": False,
+                        "error": f"LLM provider error: {str(e)}",
+                        "status_code": 502,
+                        "tool_calls": tool_log
+                    }
+                model_calls += 1
+                calls = turn.get("tool_calls") or []
+                if not calls:
+                    reply = turn.get("content") or ""
+                    break
+                if step == 0 and plan_key and plan_is_cacheable(calls, bool(history)):
+                    self.plans.set(plan_key, [{"name": c["name"], "arguments": c["arguments"]} for c in calls])
+
+            results = await self.run_calls(calls, token, session_id)
+
+            messages.append({
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}
+                    }
+                    for call in calls
+                ]
+            })
+            for call, result in zip(calls, results):
+                tool_log.append({"name": call["name"], "arguments": call["arguments"], "result": result})
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": call["id"],
+                    "content": json.dumps(result)[:MAX_TOOL_RESULT_CHARS]
+                })
+
+        if reply is None:
+            reply = "I ran out of steps before finishing; here is what I found."
+
+        return {
+            "success": True,
+            "reply": reply,
+            "tool_calls": tool_log,
+            "plan_cached": cached_plan is not None,
+            "model_calls": model_calls
+        }
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+agent = Agent()
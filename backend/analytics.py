@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
+
+from youtube_tools import yt, YouTubeAPIError, MAX_IDS_PER_CALL
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Batches at least this large are computed in a worker process so the
+# event loop keeps serving other requests
+POOL_THRESHOLD = 5000
+POOL_WORKERS = 2
+
+# One call may analyze this many videos (1 quota unit per 50), fetched
+# with at most VIDEO_FETCH_CONCURRENCY videos.list requests in flight
+MAX_VIDEO_IDS = 5000
+VIDEO_FETCH_CONCURRENCY = 4
+
+PERCENTILES = [25, 50, 75, 90, 99]
+RANK_METRICS = ["engagement_rate", "views", "likes", "comments", "like_rate", "comment_rate"]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+# ============================================================
+# ROW EXTRACTION
+# ============================================================
+
+def video_rows(items: List[Dict[str, Any]]) -> List[Tuple[str, str, int, int, int]]:
+    """Extract (id, title, views, likes, comments) from videos.list items"""
+    rows = []
+    for item in items:
+        video_id = item.get("id")
+        if isinstance(video_id, dict):
+            video_id = video_id.get("videoId")
+        stats = item.get("statistics") or {}
+        rows.append((
+            video_id,
+            (item.get("snippet") or {}).get("title", ""),
+            int(stats.get("viewCount", 0) or 0),
+            int(stats.get("likeCount", 0) or 0),
+            int(stats.get("commentCount", 0) or 0),
+        ))
+    return rows
+
+
+def comment_rows(items: List[Dict[str, Any]]) -> List[Tuple[str, str, int, int]]:
+    """Extract (id, publishedAt, likes, replies) from commentThreads items"""
+    rows = []
+    for thread in items:
+        snippet = thread.get("snippet", {})
+        top = snippet.get("topLevelComment", {}).get("snippet", {})
+        rows.append((
+            thread.get("id"),
+            top.get("publishedAt", ""),
+            int(top.get("likeCount", 0) or 0),
+            int(snippet.get("totalReplyCount", 0) or 0),
+        ))
+    return rows
+
+
+# ============================================================
+# VECTORIZED COMPUTATION
+# ============================================================
+# numpy is imported inside the functions that need it, so importing this
+# module (and so the server) does not pay for it until analytics is used
+
+def _percentiles(values: "np.ndarray") -> Dict[str, float]:
+    import numpy as np
+
+    if values.size == 0:
+        return {}
+    points = np.percentile(values, PERCENTILES)
+    return {f"p{p}": round(float(v), 6) for p, v in zip(PERCENTILES, points)}
+
+
+def _top_n(values: "np.ndarray", n: int) -> "np.ndarray":
+    """Indices of the n largest values, largest first"""
+    import numpy as np
+
+    n = min(n, values.size)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-values, n - 1)[:n]
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+def compute_video_stats(
+    rows: List[Tuple[str, str, int, int, int]],
+    top_n: int = 5,
+    rank_by: str = "engagement_rate"
+) -> Dict[str, Any]:
+    """Engagement rates, percentiles and a top-N ranking for a batch of videos"""
+    import numpy as np
+
+    if not rows:
+        return {"count": 0}
+
+    ids, titles, views, likes, comments = zip(*rows)
+    views = np.asarray(views, dtype=np.float64)
+    likes = np.asarray(likes, dtype=np.float64)
+    comments = np.asarray(comments, dtype=np.float64)
+    safe_views = np.maximum(views, 1.0)
+
+    metrics = {
+        "views": views,
+        "likes": likes,
+        "comments": comments,
+        "like_rate": likes / safe_views,
+        "comment_rate": comments / safe_views,
+        "engagement_rate": (likes + comments) / safe_views,
+    }
+    ranking = metrics.get(rank_by, metrics["engagement_rate"])
+
+    return {
+        "count": len(ids),
+        "totals": {
+            "views": int(views.sum()),
+            "likes": int(likes.sum()),
+            "comments": int(comments.sum()),
+        },
+        "mean_engagement_rate": round(float(metrics["engagement_rate"].mean()), 6),
+        "percentiles": {
+            name: _percentiles(metrics[name])
+            for name in ("views", "engagement_rate", "like_rate", "comment_rate")
+        },
+        "rank_by": rank_by if rank_by in metrics else "engagement_rate",
+        "top": [
+            {
+                "video_id": ids[i],
+                "title": titles[i],
+                "views": int(views[i]),
+                "likes": int(likes[i]),
+                "comments": int(comments[i]),
+                "engagement_rate": round(float(metrics["engagement_rate"][i]), 6),
+            }
+            for i in _top_n(ranking, top_n)
+        ],
+    }
+
+
+def compute_comment_stats(
+    rows: List[Tuple[str, str, int, int]],
+    bucket: str = "day",
+    top_n: int = 5
+) -> Dict[str, Any]:
+    """Comment volume per time bucket plus the most liked comments"""
+    import numpy as np
+
+    rows = [row for row in rows if row[1]]
+    if not rows:
+        return {"count": 0, "buckets": []}
+
+    ids, published, likes, replies = zip(*rows)
+    unit = "h" if bucket == "hour" else "D"
+    # publishedAt is RFC 3339 in UTC ("...Z"); numpy wants it without the suffix
+    times = np.array([p.rstrip("Z") for p in published], dtype="datetime64[s]")
+    buckets, counts = np.unique(times.astype(f"datetime64[{unit}]"), return_counts=True)
+    likes = np.asarray(likes, dtype=np.int64)
+    replies = np.asarray(replies, dtype=np.int64)
+
+    return {
+        "count": len(ids),
+        "bucket": "hour" if unit == "h" else "day",
+        "first": str(times.min()),
+        "last": str(times.max()),
+        "buckets": [
+            {"start": str(b), "comments": int(c)}
+            for b, c in zip(buckets, counts)
+        ],
+        "percentiles": {
+            "likes": _percentiles(likes),
+            "replies": _percentiles(replies),
+        },
+        "top_liked": [
+            {"comment_id": ids[i], "likes": int(likes[i]), "replies": int(replies[i])}
+            for i in _top_n(likes, top_n)
+        ],
+    }
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+async def video_analytics(
+    video_ids: List[str],
+    comments_video_id: Optional[str] = None,
+    top_n: int = 5,
+    rank_by: str = "engagement_rate",
+    bucket: str = "day",
+    max_comments: int = 500,
+    token: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fetch statistics through video_details/video_comments and analyze them"""
+    video_ids = list(dict.fromkeys(v.strip() for v in video_ids if v and v.strip()))
+    if len(video_ids) > MAX_VIDEO_IDS:
+        raise YouTubeAPIError(f"At most {MAX_VIDEO_IDS} video IDs per call", status_code=400)
+    result: Dict[str, Any] = {}
+
+    if video_ids:
+        semaphore = asyncio.Semaphore(VIDEO_FETCH_CONCURRENCY)
+
+        async def fetch(chunk: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await yt.video_details(",".join(chunk), token)
+
+        pages = await asyncio.gather(*(
+            fetch(video_ids[i:i + MAX_IDS_PER_CALL])
+            for i in range(0, len(video_ids), MAX_IDS_PER_CALL)
+        ))
+        items = [item for page in pages for item in page.get("items", [])]
+        result["videos"] = await run_stats(
+            compute_video_stats, video_rows(items), top_n=top_n, rank_by=rank_by
+        )
+
+    if comments_video_id:
+        threads: List[Dict[str, Any]] = []
+        page_token = None
+        while len(threads) < max_comments:
+            page = await yt.video_comments(
+                comments_video_id,
+                max_results=min(100, max_comments - len(threads)),
+                order="time",
+                page_token=page_token
+            )
+            threads.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+        result["comments"] = await run_stats(
+            compute_comment_stats, comment_rows(threads), bucket=bucket, top_n=top_n
+        )
+        result["comments"]["video_id"] = comments_video_id
+
+    return result
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+    return _pool
+
+
+async def run_stats(func, rows: List[tuple], **kwargs) -> Dict[str, Any]:
+    """Run a stats function inline for small batches, in the process pool otherwise"""
+    if len(rows) < POOL_THRESHOLD:
+        return func(rows, **kwargs)
+
+    logger.info("Offloading %s on %d rows to process pool", func.__name__, len(rows))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), _call, func, rows, kwargs)
+
+
+def _call(func, rows: List[tuple], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return func(rows, **kwargs)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
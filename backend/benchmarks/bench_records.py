@@ -0,0 +1,150 @@
+"""
+Memory benchmark: raw videos.list / channels.list / playlistItems.list
+dicts vs record types.
+
+Run from the backend directory:
+
+    python benchmarks/bench_records.py [count]
+"""
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import VideoRecord, ChannelRecord, PlaylistItemRecord  # noqa: E402
+
+CHANNELS = [f"UC{random.randbytes(11).hex()[:22]}" for _ in range(200)]
+WORDS = "python tutorial course beginners learn fast music live react data science guide".split()
+
+
+def _thumbnails(key: str) -> dict:
+    sizes = {"default": (120, 90), "medium": (320, 180), "high": (480, 360), "standard": (640, 480), "maxres": (1280, 720)}
+    return {
+        name: {"url": f"https://i.ytimg.com/vi/{key}/{name}.jpg", "width": w, "height": h}
+        for name, (w, h) in sizes.items()
+    }
+
+
+def raw_video(i: int) -> dict:
+    video_id = f"v{i:010d}"
+    title = " ".join(random.choices(WORDS, k=6))
+    description = " ".join(random.choices(WORDS, k=60))
+    channel_id = random.choice(CHANNELS)
+    return {
+        "kind": "youtube#video",
+        "etag": random.randbytes(14).hex(),
+        "id": video_id,
+        "snippet": {
+            "publishedAt": "2024-05-01T12:00:00Z",
+            "channelId": channel_id,
+            "title": title,
+            "description": description,
+            "thumbnails": _thumbnails(video_id),
+            "channelTitle": f"Channel {channel_id[-4:]}",
+            "tags": random.choices(WORDS, k=8),
+            "categoryId": "27",
+            "liveBroadcastContent": "none",
+            "defaultAudioLanguage": "en",
+            "localized": {"title": title, "description": description},
+        },
+        "contentDetails": {
+            "duration": f"PT{random.randint(0, 2)}H{random.randint(0, 59)}M{random.randint(0, 59)}S",
+            "dimension": "2d",
+            "definition": "hd",
+            "caption": "false",
+            "licensedContent": True,
+            "contentRating": {},
+            "projection": "rectangular",
+        },
+        "statistics": {
+            "viewCount": str(random.randint(0, 10**8)),
+            "likeCount": str(random.randint(0, 10**6)),
+            "favoriteCount": "0",
+            "commentCount": str(random.randint(0, 10**5)),
+        },
+    }
+
+
+def raw_channel(channel_id: str) -> dict:
+    return {
+        "kind": "youtube#channel",
+        "etag": random.randbytes(14).hex(),
+        "id": channel_id,
+        "snippet": {
+            "title": f"Channel {channel_id[-4:]}",
+            "description": " ".join(random.choices(WORDS, k=40)),
+            "customUrl": f"@channel{channel_id[-4:]}",
+            "publishedAt": "2015-01-01T00:00:00Z",
+            "thumbnails": _thumbnails(channel_id),
+            "country": "US",
+            "localized": {"title": "x", "description": "y"},
+        },
+        "contentDetails": {"relatedPlaylists": {"likes": "", "uploads": "UU" + channel_id[2:]}},
+        "statistics": {"viewCount": "123456789", "subscriberCount": "100000", "hiddenSubscriberCount": False, "videoCount": "420"},
+    }
+
+
+def raw_playlist_item(i: int) -> dict:
+    video_id = f"v{i:010d}"
+    channel_id = random.choice(CHANNELS)
+    title = " ".join(random.choices(WORDS, k=6))
+    return {
+        "kind": "youtube#playlistItem",
+        "etag": random.randbytes(14).hex(),
+        "id": random.randbytes(24).hex(),
+        "snippet": {
+            "publishedAt": "2024-05-01T12:00:00Z",
+            "channelId": channel_id,
+            "title": title,
+            "description": " ".join(random.choices(WORDS, k=60)),
+            "thumbnails": _thumbnails(video_id),
+            "channelTitle": f"Channel {channel_id[-4:]}",
+            "playlistId": "UU" + channel_id[2:],
+            "position": i % 50,
+            "resourceId": {"kind": "youtube#video", "videoId": video_id},
+            "videoOwnerChannelTitle": f"Channel {channel_id[-4:]}",
+            "videoOwnerChannelId": channel_id,
+        },
+        "contentDetails": {"videoId": video_id, "videoPublishedAt": "2024-05-01T12:00:00Z"},
+    }
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return after - before
+
+
+def main(count: int) -> None:
+    # Raw payloads are decoded from JSON, as they arrive from the API
+    video_json = [json.dumps(raw_video(i)) for i in range(count)]
+    channel_json = [json.dumps(raw_channel(c)) for c in CHANNELS]
+    playlist_json = [json.dumps(raw_playlist_item(i)) for i in range(count)]
+
+    results = {
+        "videos / raw dicts": measure(lambda: [json.loads(s) for s in video_json]),
+        "videos / VideoRecord": measure(lambda: [VideoRecord.from_api(json.loads(s)) for s in video_json]),
+        "channels / raw dicts": measure(lambda: [json.loads(s) for s in channel_json]),
+        "channels / ChannelRecord": measure(lambda: [ChannelRecord.from_api(json.loads(s)) for s in channel_json]),
+        "playlist items / raw dicts": measure(lambda: [json.loads(s) for s in playlist_json]),
+        "playlist items / record": measure(lambda: [PlaylistItemRecord.from_api(json.loads(s)) for s in playlist_json]),
+    }
+
+    print(f"{count} videos, {len(CHANNELS)} channels, {count} playlist items")
+    for name, size in results.items():
+        print(f"  {name:<28} {size / 1024:>10.1f} KiB")
+    print(f"  video reduction: {results['videos / raw dicts'] / results['videos / VideoRecord']:.1f}x")
+    print(f"  channel reduction: {results['channels / raw dicts'] / results['channels / ChannelRecord']:.1f}x")
+    print(f"  playlist item reduction: {results['playlist items / raw dicts'] / results['playlist items / record']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,80 @@
+"""
+Startup benchmark: import time of the app and time to first request.
+
+Each run uses a fresh interpreter so nothing is warm. Run from the backend
+directory:
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("numpy", "openai", "redis") if name in sys.modules]
+print(f"{elapsed:.6f} {','.join(heavy) or '-'}")
+"""
+
+
+def measure_import() -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[0]), out[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(path: str = "/mcp/tools", timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until ``path`` first answers 200"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"server did not answer {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int) -> None:
+    imports = [measure_import() for _ in range(runs)]
+    first = [measure_first_request() for _ in range(runs)]
+
+    import_times = [t for t, _ in imports]
+    print(f"{runs} cold starts")
+    print(f"  import main          median {statistics.median(import_times) * 1000:8.1f} ms"
+          f"  min {min(import_times) * 1000:8.1f} ms")
+    print(f"  first /mcp/tools     median {statistics.median(first) * 1000:8.1f} ms"
+          f"  min {min(first) * 1000:8.1f} ms")
+    print(f"  heavy modules loaded at import: {imports[0][1]}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,213 @@
+import json
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Any, Hashable, Dict, Iterable, Set
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire after a per-entry TTL.
+
+    Used for small, hot lookups (channel metadata, uploads playlist IDs,
+    per-user profiles) where an upstream call costs quota and latency.
+    """
+
+    def __init__(self, max_entries: int = 1000, default_ttl: float = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_MISSING = object()
+
+
+class ByteBudgetCache:
+    """
+    LRU cache bounded by serialized size rather than entry count.
+
+    Values are stored as compact JSON, zlib-compressed above
+    ``compress_threshold`` bytes, and every entry is charged its stored
+    size plus its key. Each entry belongs to a ``group`` (the tool name)
+    for per-group byte reporting, and may carry ``tags`` naming the
+    entities it depends on so writes can invalidate it.
+    """
+
+    ENTRY_OVERHEAD = 96
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        compress_threshold: int = 2048,
+        compress_level: int = 6
+    ):
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+        # key -> (expires_at, blob, compressed, size, group, tags)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._group_bytes: Dict[str, int] = {}
+        self._group_entries: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def encode(self, value: Any) -> tuple:
+        """Serialize a value to (blob, compressed)"""
+        blob = json.dumps(value, separators=(",", ":")).encode()
+        if len(blob) >= self.compress_threshold:
+            return zlib.compress(blob, self.compress_level), True
+        return blob, False
+
+    @staticmethod
+    def decode(blob: bytes, compressed: bool) -> Any:
+        if compressed:
+            blob = zlib.decompress(blob)
+        return json.loads(blob)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self.decode(entry[1], entry[2])
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        group: str = "default",
+        tags: Iterable[str] = ()
+    ) -> bool:
+        """Store a value; returns False if it alone exceeds the budget"""
+        blob, compressed = self.encode(value)
+        return self.set_encoded(key, blob, compressed, ttl, group, tags)
+
+    def set_encoded(
+        self,
+        key: str,
+        blob: bytes,
+        compressed: bool,
+        ttl: float,
+        group: str = "default",
+        tags: Iterable[str] = ()
+    ) -> bool:
+        size = len(blob) + len(key) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return False
+
+        self._remove(key)
+        tags = tuple(tags)
+        self._data[key] = (time.monotonic() + ttl, blob, compressed, size, group, tags)
+        self.total_bytes += size
+        self._group_bytes[group] = self._group_bytes.get(group, 0) + size
+        self._group_entries[group] = self._group_entries.get(group, 0) + 1
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+
+        while self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+        return True
+
+    def pop(self, key: str) -> None:
+        self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the tags; returns how many"""
+        removed = 0
+        for tag in tags:
+            for key in list(self._tag_keys.get(tag, ())):
+                if key in self._data:
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        _, _, _, size, group, tags = entry
+        self.total_bytes -= size
+        self._group_bytes[group] -= size
+        self._group_entries[group] -= 1
+        if not self._group_entries[group]:
+            del self._group_bytes[group]
+            del self._group_entries[group]
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "compressed_entries": sum(1 for entry in self._data.values() if entry[2]),
+            "by_tool": {
+                group: {"entries": self._group_entries[group], "bytes": size}
+                for group, size in sorted(self._group_bytes.items(), key=lambda kv: -kv[1])
+            }
+        }
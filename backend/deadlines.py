@@ -0,0 +1,64 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Iterator
+
+# Seconds a tool call may take end to end, unless the caller sends less
+DEFAULT_TOOL_DEADLINE = float(os.getenv("TOOL_DEADLINE_SECONDS", "20"))
+
+# Tools that legitimately fan out into many upstream calls
+TOOL_DEADLINES = {
+    "video_analytics": 30,
+    "search_videos_multi": 30,
+    "trending_videos_multi": 30,
+    "subscriptions_feed": 30,
+    "bulk_like_videos": 120,
+    "bulk_add_to_playlist": 120,
+    "sync_playlist": 120,
+}
+
+# Absolute time.monotonic() by which the current request must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("tool_deadline", default=None)
+
+
+def tool_deadline(tool_name: str) -> float:
+    return TOOL_DEADLINES.get(tool_name, DEFAULT_TOOL_DEADLINE)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block under a deadline ``seconds`` from now; an outer, earlier deadline wins"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    reset = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(reset)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Detach background work (e.g. queued jobs) from the request that started it"""
+    reset = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(reset)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+# Off unless enabled: every hedge spends upstream quota
+HEDGE_ENABLED = os.getenv("YT_HEDGE_GETS", "").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("YT_HEDGE_PERCENTILE", "95"))
+# Hedges allowed per request; 0.03 adds at most ~3% load
+HEDGE_BUDGET = float(os.getenv("YT_HEDGE_BUDGET", "0.03"))
+
+MIN_SAMPLES = 20
+WINDOW = 500
+MIN_DELAY = 0.05
+MAX_BURST = 10.0
+
+
+class Hedger:
+    """
+    Hedged requests for idempotent GETs.
+
+    If a request has not answered within the HEDGE_PERCENTILE latency of
+    its endpoint, a second identical request is started (the pool hands it
+    another connection) and whichever answers first wins; the other is
+    cancelled. Each request earns ``budget`` hedge credit and each hedge
+    spends one, so hedges stay below that fraction of traffic.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE_ENABLED,
+        percentile: float = HEDGE_PERCENTILE,
+        budget: float = HEDGE_BUDGET
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self._latencies: Dict[str, deque] = {}
+        self._delays: Dict[str, float] = {}
+        self._credit = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, key: str, seconds: float) -> None:
+        samples = self._latencies.setdefault(key, deque(maxlen=WINDOW))
+        samples.append(seconds)
+        # Recompute the percentile now and then rather than per request
+        if len(samples) >= MIN_SAMPLES and (key not in self._delays or len(samples) % 20 == 0):
+            ordered = sorted(samples)
+            index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+            self._delays[key] = max(ordered[index], MIN_DELAY)
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough samples exist"""
+        return self._delays.get(key)
+
+    def _spend(self) -> bool:
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        return False
+
+    async def run(self, key: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``send``, hedging it once if it is slow and the budget allows"""
+        self.requests += 1
+        self._credit = min(self._credit + self.budget, MAX_BURST)
+        start = time.monotonic()
+        delay = self.delay(key) if self.enabled else None
+
+        if delay is None:
+            result = await send()
+            self.observe(key, time.monotonic() - start)
+            return result
+
+        primary = asyncio.ensure_future(send())
+        tasks = [primary]
+        # Whatever happens here, including the caller being cancelled while
+        # waiting, no request is left running unowned
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._spend():
+                result = await primary
+                self.observe(key, time.monotonic() - start)
+                return result
+
+            self.hedges += 1
+            hedge = asyncio.ensure_future(send())
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        self.observe(key, time.monotonic() - start)
+                        return task.result()
+            # Both failed; surface the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark a losing request's error as retrieved
+                    task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "delays_ms": {key: round(delay * 1000, 1) for key, delay in self._delays.items()},
+        }
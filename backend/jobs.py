@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Optional, Dict, Any, Callable, Awaitable, Iterable
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# A 429 means the upstream turned the call away unprocessed; any job may retry it
+RETRYABLE_STATUS = {429}
+
+# Server errors and timeouts can hide a write that went through, so they
+# are only retried for tools where repeating the call changes nothing
+IDEMPOTENT_RETRYABLE_STATUS = {500, 502, 503, 504}
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a different tool call"""
+
+
+def _fingerprint(tool_name: str, arguments: Dict[str, Any]) -> str:
+    return json.dumps([tool_name, arguments], sort_keys=True, separators=(",", ":"), default=str)
+
+
+class JobQueue:
+    """
+    Write-behind queue for mutating tools.
+
+    Jobs run on a small worker pool with exponential-backoff retries;
+    only ``idempotent_tools`` are retried after a timeout or server error.
+    A caller-supplied idempotency key (scoped to the user) maps to a
+    single job, so a retried request never reaches the upstream twice.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str, Dict[str, Any], Optional[str]], Awaitable[Dict[str, Any]]],
+        idempotent_tools: Iterable[str] = (),
+        workers: int = 4,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+        job_ttl: int = 24 * 3600,
+        max_jobs: int = 10000
+    ):
+        self.runner = runner
+        self.idempotent_tools = frozenset(idempotent_tools)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._jobs = TTLCache(max_entries=max_jobs, default_ttl=job_ttl)
+        self._keys = TTLCache(max_entries=max_jobs, default_ttl=job_ttl)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+
+    async def submit(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        token: Optional[str],
+        owner: Optional[str],
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Enqueue a tool call, or return the job already holding this key.
+        Raises IdempotencyConflict when the key belongs to a different call.
+        """
+        fingerprint = _fingerprint(tool_name, arguments)
+        if idempotency_key:
+            existing = self._jobs.get(self._keys.get((owner, idempotency_key)))
+            if existing is not None:
+                if existing["fingerprint"] != fingerprint:
+                    raise IdempotencyConflict(
+                        f"Idempotency key already used for a different {existing['public']['tool']} call"
+                    )
+                logger.info("Idempotency key hit for %s: job %s", tool_name, existing["public"]["job_id"])
+                return existing["public"]
+
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        job = {
+            "public": {
+                "job_id": job_id,
+                "tool": tool_name,
+                "status": "queued",
+                "attempts": 0,
+                "created_at": now,
+                "updated_at": now,
+                "result": None,
+                "error": None
+            },
+            "owner": owner,
+            "fingerprint": fingerprint,
+            "arguments": arguments,
+            "token": token,
+            "done": asyncio.Event()
+        }
+        self._jobs.set(job_id, job)
+        if idempotency_key:
+            self._keys.set((owner, idempotency_key), job_id)
+
+        self._ensure_workers()
+        await self._queue.put(job_id)
+        return job["public"]
+
+    def get(self, job_id: str, owner: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Job status, visible only to the user who submitted it"""
+        job = self._jobs.get(job_id)
+        if job is None or job["owner"] != owner:
+            return None
+        return job["public"]
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until a job finishes (or the timeout passes) and return its status"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(job["done"].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job["public"]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # ------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            except Exception as e:
+                logger.error("Job worker error on %s: %s", job_id, e)
+            finally:
+                self._queue.task_done()
+
+    def _retryable(self, tool_name: str, result: Dict[str, Any]) -> bool:
+        status = result.get("status_code")
+        if status in RETRYABLE_STATUS:
+            return True
+        if tool_name not in self.idempotent_tools:
+            return False
+        return status in IDEMPOTENT_RETRYABLE_STATUS or "timeout" in str(result.get("error", "")).lower()
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        public = job["public"]
+        public["status"] = "running"
+
+        while True:
+            public["attempts"] += 1
+            public["updated_at"] = time.time()
+            result = await self.runner(public["tool"], job["arguments"], job["token"])
+
+            if result.get("success"):
+                public.update(status="succeeded", result=result.get("data"), error=None)
+                break
+
+            public["error"] = result.get("error")
+            retryable = self._retryable(public["tool"], result)
+            if not retryable or public["attempts"] >= self.max_attempts:
+                public["status"] = "failed"
+                break
+
+            delay = self.retry_delay * 2 ** (public["attempts"] - 1)
+            logger.warning("Job %s attempt %d failed, retrying in %.1fs", public["job_id"], public["attempts"], delay)
+            await asyncio.sleep(delay)
+
+        public["updated_at"] = time.time()
+        # The token is only needed while the job can still run
+        job["token"] = None
+        job["done"].set()
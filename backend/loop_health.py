@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is pinged, and how late a ping may be before the
+# loop counts as blocked and its stack is captured
+LOOP_WATCH_INTERVAL = 0.1
+STALL_THRESHOLD = float(os.getenv("LOOP_STALL_MS", "200")) / 1000
+
+LAG_WINDOW = 600
+MAX_STALLS = 20
+STACK_DEPTH = 30
+
+# Frames kept per allocation when memory tracing is on
+TRACE_FRAMES = 1
+TOP_MODULES = 25
+
+
+# ============================================================
+# EVENT LOOP WATCHDOG
+# ============================================================
+
+class LoopWatchdog:
+    """
+    Measures event loop lag with a task that sleeps a fixed interval and
+    notes how late it wakes. A helper thread watches the same heartbeat;
+    when it goes stale the loop is running something that does not yield,
+    so that thread's stack is captured while it is still on the CPU.
+    """
+
+    def __init__(self, interval: float = LOOP_WATCH_INTERVAL, threshold: float = STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: deque = deque(maxlen=LAG_WINDOW)
+        self.stalls: deque = deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._ping())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def _ping(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.lags.append(max(now - before - self.interval, 0.0))
+
+    def _watch(self) -> None:
+        stall: Optional[Dict[str, Any]] = None
+        while not self._stop.wait(self.interval / 2):
+            late = time.monotonic() - self._heartbeat - self.interval
+            if stall is None and late > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                stall = {
+                    "at": time.time(),
+                    "stack": traceback.format_stack(frame, limit=STACK_DEPTH) if frame is not None else [],
+                }
+            elif stall is not None and late <= self.threshold:
+                # The loop is back; the stall lasted until the last heartbeat
+                stall["blocked_ms"] = round((time.time() - stall["at"] + self.threshold) * 1000, 1)
+                self.stalls.append(stall)
+                self.stall_count += 1
+                logger.warning(
+                    "Event loop blocked for ~%.0f ms", stall["blocked_ms"],
+                    extra={"stack": "".join(stall["stack"])}
+                )
+                stall = None
+
+    def stats(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+
+        def pct(p: float) -> float:
+            return round(lags[min(int(len(lags) * p), len(lags) - 1)] * 1000, 2) if lags else 0.0
+
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.threshold * 1000,
+            "lag_ms": {"p50": pct(0.5), "p99": pct(0.99), "max": pct(1.0)},
+            "samples": len(lags),
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+
+# ============================================================
+# MEMORY SNAPSHOTS
+# ============================================================
+
+def _module_of(filename: str, roots: List[str]) -> str:
+    """Top-level module a file belongs to: 'youtube_tools', 'httpx', 'asyncio'..."""
+    for root in roots:
+        if filename.startswith(root):
+            relative = filename[len(root):].lstrip(os.sep)
+            first = relative.split(os.sep, 1)[0]
+            return first[:-3] if first.endswith(".py") else first
+    return filename
+
+
+def group_by_module(snapshot: tracemalloc.Snapshot) -> Dict[str, Dict[str, int]]:
+    roots = sorted({os.path.abspath(p) for p in sys.path if p}, key=len, reverse=True)
+    modules: Dict[str, Dict[str, int]] = {}
+    for stat in snapshot.statistics("filename"):
+        module = _module_of(stat.traceback[0].filename, roots)
+        entry = modules.setdefault(module, {"size": 0, "count": 0})
+        entry["size"] += stat.size
+        entry["count"] += stat.count
+    return modules
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots, compared module by module. Tracing slows every
+    allocation, so it only runs between start() and stop().
+    """
+
+    def __init__(self):
+        self._previous: Optional[Dict[str, Dict[str, int]]] = None
+        self._previous_at: Optional[float] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self._previous = None
+        self._previous_at = None
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+        self._previous_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current usage per module, and the change since the previous call.
+        Blocking; run it off the event loop.
+        """
+        if not tracemalloc.is_tracing():
+            self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        current = group_by_module(snapshot)
+        previous = self._previous or {}
+
+        rows = []
+        for module, entry in current.items():
+            before = previous.get(module, {"size": 0, "count": 0})
+            rows.append({
+                "module": module,
+                "size_kb": round(entry["size"] / 1024, 1),
+                "count": entry["count"],
+                "size_diff_kb": round((entry["size"] - before["size"]) / 1024, 1),
+                "count_diff": entry["count"] - before["count"],
+            })
+        key = "size_diff_kb" if self._previous is not None else "size_kb"
+        rows.sort(key=lambda row: abs(row[key]), reverse=True)
+
+        traced, peak = tracemalloc.get_traced_memory()
+        result = {
+            "traced_kb": round(traced / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "since": self._previous_at,
+            "modules": rows[:TOP_MODULES],
+        }
+        self._previous = current
+        self._previous_at = time.time()
+        return result
+
+
+# ============================================================
+# SINGLETON INSTANCES
+# ============================================================
+
+loop_watchdog = LoopWatchdog()
+memory_tracker = MemoryTracker()
@@ -1,16 +1,36 @@
-from fastapi import FastAPI, Request, HTTPException
+from dotenv import load_dotenv
+
+# Load .env before the modules below read their settings
+load_dotenv()
+
+from log_setup import setup_logging, stop_logging, sampled, logging_stats
+
+# Logging goes through a queue to a writer thread; set up before anything logs
+setup_logging()
+
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from mcp_server import execute_tool, MCP_TOOLS_SCHEMA
+from fastapi.responses import JSONResponse, StreamingResponse, Response, FileResponse
+from mcp_server import (
+    execute_tool, execute_with_token, stream_tool, stream_records, get_auth_token,
+    job_queue, tools_catalogue, STREAMING_TOOLS
+)
+import mcp_transport
 from oauth import router as oauth_router
+from admin import router as admin_router, profile_requested
+from profiling import profiler
+from loop_health import loop_watchdog
+from thumbnails import thumbnail_cache, ThumbnailError
+from analytics import shutdown_pool
+from youtube_tools import yt, token_identity
+from tool_cache import tool_cache
+from agent import agent
+import asyncio
+import json
 import logging
 import time
+from typing import Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI
@@ -25,24 +45,26 @@ app = FastAPI(
 # ============================================================
 
 # CORS Configuration 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://localhost:3001",
+ALLOWED_ORIGINS = [
+    "http://localhost:3000",
+    "http://localhost:3001",
+
+    # Vercel production domain
+    "https://youtube-ai-agent-two.vercel.app",
 
-        # Vercel production domain
-        "https://youtube-ai-agent-two.vercel.app",
+    # Vercel project domain
+    "https://youtube-ai-agent.vercel.app",
 
-        # Vercel project domain
-        "https://youtube-ai-agent.vercel.app",
+    # Vercel preview domain
+    "https://youtube-ai-agent-git-main-sushxx99s-projects.vercel.app",
 
-        # Vercel preview domain
-        "https://youtube-ai-agent-git-main-sushxx99s-projects.vercel.app",
+    # 🔥 REQUIRED: Backend origin itself (Render)
+    "https://youtube-ai-agent-backend.onrender.com"
+]
 
-        # 🔥 REQUIRED: Backend origin itself (Render)
-        "https://youtube-ai-agent-backend.onrender.com"
-    ],
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -55,22 +77,25 @@ app.add_middleware(
 async def log_requests(request: Request, call_next):
     start_time = time.time()
     
-    # Log request
-    logger.info(f"Request: {request.method} {request.url.path}")
-    
     try:
         response = await call_next(request)
         process_time = time.time() - start_time
         
-        # Log response
-        logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
+        # One line per request; successes are sampled, failures always logged
+        if response.status_code >= 500:
+            logger.warning("%s %s -> %d in %.3fs", request.method, request.url.path, response.status_code, process_time)
+        elif sampled():
+            logger.info(
+                "%s %s -> %d in %.3fs", request.method, request.url.path, response.status_code, process_time,
+                extra={"duration_ms": round(process_time * 1000, 1), "status": response.status_code}
+            )
         
         # Add performance header
         response.headers["X-Process-Time"] = str(process_time)
         
         return response
     except Exception as e:
-        logger.error(f"Request failed: {str(e)}")
+        logger.error("%s %s failed: %s", request.method, request.url.path, e)
         raise
 
 # ============================================================
@@ -79,6 +104,7 @@ async def log_requests(request: Request, call_next):
 
 # Include OAuth routes
 app.include_router(oauth_router, tags=["OAuth"])
+app.include_router(admin_router, tags=["Admin"])
 
 @app.get("/", tags=["Health"])
 def home():
@@ -90,7 +116,11 @@ def home():
         "endpoints": {
             "oauth": "/oauth/login",
             "mcp_tools": "/mcp/tools",
-            "mcp_call": "/mcp/call"
+            "mcp_call": "/mcp/call",
+            "mcp_stream": "/mcp/stream",
+            "mcp_rpc": "/mcp/rpc",
+            "websocket": "/ws",
+            "agent_chat": "/agent/chat"
         }
     }
 
@@ -104,19 +134,28 @@ def health_check():
             "youtube_api": "operational",
             "oauth": "operational",
             "mcp_server": "operational"
-        }
+        },
+        "hedging": yt.hedger.stats(),
+        "logging": logging_stats(),
+        "thumbnails": thumbnail_cache.stats()
     }
 
+# The catalogue is static, so it is serialized once rather than per request
+TOOLS_BODY, TOOLS_ETAG = tools_catalogue()
+
+
 @app.get("/mcp/tools", tags=["MCP"])
-def get_mcp_tools():
+def get_mcp_tools(request: Request):
     """
     Get all available MCP tools with their schemas.
     This endpoint helps clients discover available tools.
     """
-    return {
-        "tools": MCP_TOOLS_SCHEMA,
-        "total_count": len(MCP_TOOLS_SCHEMA)
-    }
+    headers = {"ETag": TOOLS_ETAG, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if TOOLS_ETAG in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(content=TOOLS_BODY, media_type="application/json", headers=headers)
 
 @app.post("/mcp/call", tags=["MCP"])
 async def call_mcp_tool(request: Request):
@@ -131,6 +170,21 @@ async def call_mcp_tool(request: Request):
             "max_results": 10
         }
     }
+    
+    Write tools also accept "async": true (or "Prefer: respond-async") to
+    return a job immediately, and "idempotency_key" (or an
+    "Idempotency-Key" header) to deduplicate retried requests.
+    
+    A "session_id" (or "X-Session-Id" header) keeps listing results on the
+    server for the session_* follow-up tools.
+    
+    "deadline_ms" (or an "X-Deadline-Ms" header) shortens the tool's
+    default deadline; work still running when it passes is abandoned.
+    A write with an idempotency key keeps running as a job instead and
+    the response (202) carries its status URL.
+    
+    Admins can send "X-Profile: 1" (with "X-Admin-Token") to have the call
+    profiled; the stored profile is named in the "X-Profile-Name" header.
     """
     try:
         body = await request.json()
@@ -142,17 +196,32 @@ async def call_mcp_tool(request: Request):
         tool_name = body.get("tool_name")
         arguments = body.get("arguments", {})
         
-        logger.info(f"Executing MCP tool: {tool_name} with args: {arguments}")
+        async_mode = bool(body.get("async")) or "respond-async" in request.headers.get("prefer", "")
+        idempotency_key = body.get("idempotency_key") or request.headers.get("idempotency-key")
+        session_id = body.get("session_id") or request.headers.get("x-session-id")
+        deadline = _deadline_seconds(body.get("deadline_ms") or request.headers.get("x-deadline-ms"))
         
-        # Execute tool
-        result = await execute_tool(tool_name, arguments, request)
+        # Execute tool, under the profiler when an admin or the sample rate asks
+        if not profiler.wanted(profile_requested(request)):
+            result = await execute_tool(tool_name, arguments, request, async_mode, idempotency_key, session_id, deadline)
+            if result.get("async"):
+                return JSONResponse(status_code=202, content=result)
+            if result.get("status_code") == 409:
+                return JSONResponse(status_code=409, content=result)
+            return result
         
-        return result
+        async with profiler.profile(tool_name) as profile:
+            result = await execute_tool(tool_name, arguments, request, async_mode, idempotency_key, session_id, deadline)
+        return JSONResponse(
+            status_code=202 if result.get("async") else 409 if result.get("status_code") == 409 else 200,
+            content=result,
+            headers={"X-Profile-Name": profile["name"]}
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"MCP call error: {str(e)}")
+        logger.error("MCP call error: %s", e)
         return JSONResponse(
             status_code=500,
             content={
@@ -161,6 +230,315 @@ async def call_mcp_tool(request: Request):
             }
         )
 
+def _deadline_seconds(value) -> Optional[float]:
+    """Client deadline in milliseconds to seconds; ignored when malformed"""
+    try:
+        ms = float(value)
+    except (TypeError, ValueError):
+        return None
+    return ms / 1000 if ms > 0 else None
+
+@app.get("/mcp/jobs/{job_id}", tags=["MCP"])
+def get_mcp_job(job_id: str, request: Request):
+    """Status of an asynchronous write job submitted by the same user"""
+    token = get_auth_token(request)
+    job = job_queue.get(job_id, token_identity(token)) if token else None
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/mcp/cache/stats", tags=["MCP"])
+def get_cache_stats():
+    """Tool result cache usage, including bytes held per tool"""
+    return tool_cache.stats()
+
+@app.post("/mcp/stream", tags=["MCP"])
+async def stream_mcp_tool(request: Request):
+    """
+    Execute a streaming MCP tool and return its records as NDJSON.
+    
+    Request body:
+    {
+        "tool_name": "export_comments",
+        "arguments": {
+            "video_id": "dQw4w9WgXcQ",
+            "cursor": null
+        }
+    }
+    """
+    body = await request.json()
+    tool_name = body.get("tool_name")
+    
+    if tool_name not in STREAMING_TOOLS:
+        raise HTTPException(status_code=400, detail=f"Not a streaming tool: {tool_name}")
+    
+    arguments = body.get("arguments", {})
+    if sampled():
+        logger.info("Streaming MCP tool: %s", tool_name)
+    
+    return StreamingResponse(
+        stream_tool(tool_name, arguments, request),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/mcp/rpc", tags=["MCP"])
+async def mcp_rpc(request: Request):
+    """
+    Model Context Protocol over streamable HTTP (JSON-RPC 2.0).
+    
+    Start with an "initialize" request; the response carries an
+    "Mcp-Session-Id" header to send on every later request. The session
+    keeps the caller's auth token, so tools/call does not re-authenticate.
+    Batches are accepted. When the client accepts text/event-stream and a
+    call carries a progressToken, the reply is an SSE stream of progress
+    notifications followed by the response.
+    """
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        return JSONResponse(
+            status_code=400,
+            content=mcp_transport.error_response(None, mcp_transport.PARSE_ERROR, f"Parse error: {str(e)}")
+        )
+    
+    session_id = request.headers.get("mcp-session-id")
+    if session_id:
+        session = mcp_transport.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired MCP session")
+        # A refreshed access token replaces the one captured at initialize
+        if request.headers.get("authorization", "").startswith("Bearer "):
+            session.token = get_auth_token(request)
+    elif mcp_transport.is_initialize(payload):
+        session = mcp_transport.sessions.create(get_auth_token(request))
+    else:
+        raise HTTPException(status_code=400, detail="Missing Mcp-Session-Id header")
+    
+    headers = {"Mcp-Session-Id": session.session_id}
+    
+    if "text/event-stream" in request.headers.get("accept", "") and mcp_transport.wants_progress(payload):
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run():
+            response = await mcp_transport.handle_payload(payload, session, queue.put)
+            await queue.put(response)
+            await queue.put(None)
+        
+        async def events():
+            task = asyncio.create_task(run())
+            try:
+                while True:
+                    message = await queue.get()
+                    if message is None:
+                        break
+                    yield f"event: message\ndata: {json.dumps(message, separators=(',', ':'))}\n\n".encode()
+            finally:
+                task.cancel()
+        
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+    
+    response = await mcp_transport.handle_payload(payload, session, _drop_notification)
+    if response is None:
+        return Response(status_code=202, headers=headers)
+    return JSONResponse(content=response, headers=headers)
+
+async def _drop_notification(message):
+    """Plain JSON replies have nowhere to put progress notifications"""
+
+@app.delete("/mcp/rpc", tags=["MCP"])
+def close_mcp_session(request: Request):
+    """End an MCP session"""
+    if not mcp_transport.sessions.close(request.headers.get("mcp-session-id", "")):
+        raise HTTPException(status_code=404, detail="Unknown or expired MCP session")
+    return Response(status_code=204)
+
+@app.get("/mcp/rpc", tags=["MCP"])
+def mcp_rpc_stream():
+    """The server sends no unsolicited messages, so there is no GET stream"""
+    return Response(status_code=405, headers={"Allow": "POST, DELETE"})
+
+# Thumbnails never change for a given source URL and width
+THUMBNAIL_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class PinnedFileResponse(FileResponse):
+    """Releases the thumbnail's cache pin once sent, or if the client goes away"""
+
+    def __init__(self, path: str, digest: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self.digest = digest
+        self.cache = thumbnail_cache
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.cache.release(self.digest)
+
+@app.get("/thumbnails", tags=["Media"])
+async def get_thumbnail(request: Request, url: str, w: Optional[int] = None):
+    """
+    YouTube thumbnail proxied through the disk cache. "w" asks for a
+    narrower variant (rounded up to a standard width; needs Pillow).
+    Range requests are honoured.
+    """
+    try:
+        # Pinned so a concurrent eviction can't delete the file mid-response
+        path, media_type, digest = await thumbnail_cache.get(url, w, pin=True)
+    except ThumbnailError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        await thumbnail_cache.release(digest)
+        return Response(status_code=304, headers=headers)
+    return PinnedFileResponse(path, digest, media_type=media_type, headers=headers)
+
+@app.post("/agent/chat", tags=["Agent"])
+async def agent_chat(request: Request):
+    """
+    Answer a chat message with an LLM that calls the MCP tools.
+    
+    Request body:
+    {
+        "message": "find python tutorials and show my subscriptions",
+        "session_id": "abc123",
+        "history": [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+    }
+    
+    Tool calls the model makes in one turn run in parallel. Plans for
+    repeated, context-free messages are cached and skip the planning call.
+    """
+    body = await request.json()
+    message = body.get("message")
+    if not message:
+        raise HTTPException(status_code=400, detail="Missing 'message' in request")
+    
+    session_id = body.get("session_id") or request.headers.get("x-session-id")
+    result = await agent.chat(message, get_auth_token(request), session_id, body.get("history"))
+    
+    if not result["success"]:
+        return JSONResponse(status_code=result.get("status_code", 503), content=result)
+    return result
+
+# ============================================================
+# WEBSOCKET CHANNEL
+# ============================================================
+
+# Concurrent calls allowed per connection
+WS_MAX_IN_FLIGHT = 16
+
+@app.websocket("/ws")
+async def websocket_channel(websocket: WebSocket):
+    """
+    Multiplexed tool channel for a chat session.
+    
+    The token is read once from the handshake (Authorization header or
+    cookie), or from an "auth" frame. Many calls can be in flight at once;
+    every frame carries the caller's request id.
+    
+    Client frames:
+        {"type": "call", "id": "1", "tool_name": "search_videos", "arguments": {...},
+         "session_id": "...", "deadline_ms": 5000}
+        {"type": "cancel", "id": "1"}
+        {"type": "auth", "token": "..."}
+    
+    Server frames:
+        {"type": "ready", "authenticated": true}
+        {"type": "partial", "id": "1", "record": {...}}   (streaming tools)
+        {"type": "result", "id": "1", "result": {...}}
+        {"type": "cancelled", "id": "1"}
+        {"type": "error", "id": "1", "error": "..."}
+    """
+    # CORS does not cover WebSockets; refuse foreign pages riding the cookie
+    origin = websocket.headers.get("origin")
+    if origin and origin not in ALLOWED_ORIGINS:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    token = get_auth_token(websocket)
+    session_id = websocket.headers.get("x-session-id") or websocket.query_params.get("session_id")
+    calls: dict = {}
+    send_lock = asyncio.Lock()
+    
+    async def send(frame: dict):
+        async with send_lock:
+            await websocket.send_json(frame)
+    
+    async def run_call(call_id, tool_name: str, arguments: dict, call_token, idempotency_key, session_id, deadline):
+        try:
+            if tool_name in STREAMING_TOOLS:
+                last = {}
+                async for record in stream_records(tool_name, arguments, call_token):
+                    last = record
+                    await send({"type": "partial", "id": call_id, "record": record})
+                result = {"success": last.get("type") != "error", "tool": tool_name, "streamed": True}
+            else:
+                result = await execute_with_token(
+                    tool_name, arguments, call_token,
+                    idempotency_key=idempotency_key, session_id=session_id, deadline=deadline
+                )
+            await send({"type": "result", "id": call_id, "result": result})
+        except Exception as e:
+            logger.error("WebSocket call %s failed: %s", tool_name, e)
+            await send({"type": "error", "id": call_id, "error": f"Internal error: {str(e)}"})
+        finally:
+            # A cancelled call's id may already belong to a newer call
+            if calls.get(call_id) is asyncio.current_task():
+                del calls[call_id]
+    
+    await send({"type": "ready", "authenticated": token is not None})
+    
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await send({"type": "error", "id": None, "error": "Frames must be JSON objects"})
+                continue
+            
+            kind = frame.get("type") if isinstance(frame, dict) else None
+            call_id = frame.get("id") if isinstance(frame, dict) else None
+            
+            if kind == "call":
+                if call_id is None or call_id in calls:
+                    await send({"type": "error", "id": call_id, "error": "Each call needs a unique 'id'"})
+                elif len(calls) >= WS_MAX_IN_FLIGHT:
+                    await send({"type": "error", "id": call_id, "error": f"Too many calls in flight (max {WS_MAX_IN_FLIGHT})"})
+                elif not frame.get("tool_name"):
+                    await send({"type": "error", "id": call_id, "error": "Missing 'tool_name'"})
+                else:
+                    if sampled():
+                        logger.info("WebSocket call %s: %s", call_id, frame["tool_name"])
+                    calls[call_id] = asyncio.create_task(run_call(
+                        call_id, frame["tool_name"], frame.get("arguments") or {},
+                        token, frame.get("idempotency_key"), frame.get("session_id") or session_id,
+                        _deadline_seconds(frame.get("deadline_ms"))
+                    ))
+            
+            elif kind == "cancel":
+                task = calls.pop(call_id, None)
+                if task is not None:
+                    task.cancel()
+                    await send({"type": "cancelled", "id": call_id})
+            
+            elif kind == "auth":
+                token = frame.get("token") or None
+                await send({"type": "ready", "authenticated": token is not None})
+            
+            else:
+                await send({"type": "error", "id": call_id, "error": f"Unknown frame type: {kind}"})
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pending = list(calls.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
 # ============================================================
 # ERROR HANDLERS
 # ============================================================
@@ -178,7 +556,7 @@ async def not_found_handler(request: Request, exc):
 
 @app.exception_handler(500)
 async def internal_error_handler(request: Request, exc):
-    logger.error(f"Internal server error: {str(exc)}")
+    logger.error("Internal server error: %s", exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -194,11 +572,20 @@ async def internal_error_handler(request: Request, exc):
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 YouTube MCP Server starting up...")
+    await tool_cache.start()
+    loop_watchdog.start()
     logger.info("✅ Server ready to accept requests")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("👋 YouTube MCP Server shutting down...")
+    await loop_watchdog.stop()
+    await job_queue.stop()
+    await tool_cache.stop()
+    shutdown_pool()
+    await yt.aclose()
+    await thumbnail_cache.aclose()
+    stop_logging()
 
 
 if __name__ == "__main__":
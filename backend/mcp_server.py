@@ -1,17 +1,27 @@
+import hashlib
+import json
 import traceback
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
 from fastapi import Request
-from youtube_tools import yt, YouTubeAPIError
+from fastapi.requests import HTTPConnection
+from youtube_tools import yt, YouTubeAPIError, token_identity
+from analytics import video_analytics, compute_video_stats, RANK_METRICS
+from jobs import JobQueue, IdempotencyConflict
+from tool_cache import tool_cache
+from sessions import session_store, LISTING_TOOLS
+from records import VideoRecord
+from deadlines import deadline_scope, no_deadline, tool_deadline, remaining
+from log_setup import sampled
 
 logger = logging.getLogger(__name__)
 
 # ============================================================
 # HELPER: EXTRACT TOKEN FROM REQUEST
 # ============================================================
-def get_auth_token(request: Request) -> Optional[str]:
+def get_auth_token(request: HTTPConnection) -> Optional[str]:
     """
-    Extract authentication token from:
+    Extract authentication token from an HTTP request or WebSocket handshake:
     1. Authorization header (preferred)
     2. Cookies
     3. Cookie header forwarded from Next.js
@@ -39,6 +49,13 @@ def get_auth_token(request: Request) -> Optional[str]:
     return None
 
 
+def _id_list(ids) -> list:
+    """Accept IDs as a list or a comma-separated string"""
+    if isinstance(ids, str):
+        return ids.split(",")
+    return list(ids)
+
+
 # ============================================================
 # MCP TOOL SCHEMAS (unchanged)
 # ============================================================
@@ -68,6 +85,12 @@ MCP_TOOLS_SCHEMA = [
                     "enum": ["relevance", "date", "viewCount", "rating"],
                     "description": "How to order results",
                     "default": "relevance"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["upstream", "index", "blend"],
+                    "description": "Use the local index of previously fetched videos: 'index' answers from it when confident, 'blend' mixes index hits with a smaller upstream search",
+                    "default": "upstream"
                 }
             },
             "required": ["query"]
@@ -113,6 +136,54 @@ MCP_TOOLS_SCHEMA = [
             }
         }
     },
+    {
+        "name": "search_videos_multi",
+        "description": "Search several phrasings of a topic at once. Results are merged, deduplicated and ranked by how well they match across all queries. Use this instead of repeated search_videos calls.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Up to 5 search queries (e.g., ['python tutorial', 'learn python', 'python for beginners'])"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Number of merged results to return (1-50)",
+                    "default": 10
+                },
+                "order": {
+                    "type": "string",
+                    "enum": ["relevance", "date", "viewCount", "rating"],
+                    "default": "relevance"
+                }
+            },
+            "required": ["queries"]
+        }
+    },
+    {
+        "name": "trending_videos_multi",
+        "description": "Compare trending videos across several regions at once. Results are merged and deduplicated; videos trending in more regions rank higher, and each lists the regions it trends in.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "region_codes": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Up to 10 two-letter country codes (e.g., ['US', 'GB', 'IN'])"
+                },
+                "category_id": {
+                    "type": "string",
+                    "description": "Category ID (e.g., '10' for Music, '20' for Gaming)"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "default": 25
+                }
+            },
+            "required": ["region_codes"]
+        }
+    },
     {
         "name": "video_details",
         "description": "Get detailed information about specific video(s). Includes statistics, description, tags, and metadata.",
@@ -150,23 +221,91 @@ MCP_TOOLS_SCHEMA = [
             "required": ["video_id"]
         }
     },
+    {
+        "name": "export_comments",
+        "description": "Stream every comment on a video, including replies, as NDJSON. Call through /mcp/stream. Resume an interrupted export by passing the last cursor record, or the cursor of an end record cut short by max_comments.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "video_id": {
+                    "type": "string",
+                    "description": "Video ID"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor from a previous export to resume from"
+                },
+                "include_replies": {
+                    "type": "boolean",
+                    "default": True
+                },
+                "max_comments": {
+                    "type": "integer",
+                    "description": "Stop after this many comments (default: no limit)"
+                }
+            },
+            "required": ["video_id"]
+        },
+        "streaming": True
+    },
+    {
+        "name": "video_analytics",
+        "description": "Compute engagement analytics for a set of videos (engagement rates, percentiles, top-N ranking) and optionally comment volume over time for one video. Use this to find the best performing video among results.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "video_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Video IDs to analyze, at most 5000 (a comma-separated string is also accepted)"
+                },
+                "comments_video_id": {
+                    "type": "string",
+                    "description": "Video whose comments should be bucketed over time"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "default": 5
+                },
+                "rank_by": {
+                    "type": "string",
+                    "enum": RANK_METRICS,
+                    "default": "engagement_rate"
+                },
+                "bucket": {
+                    "type": "string",
+                    "enum": ["hour", "day"],
+                    "default": "day"
+                },
+                "max_comments": {
+                    "type": "integer",
+                    "description": "Maximum comments to analyze",
+                    "default": 500
+                }
+            }
+        }
+    },
     {
         "name": "channel_details",
-        "description": "Get detailed information about a channel including statistics and branding.",
+        "description": "Get detailed information about one or more channels (up to 50) including statistics and branding.",
         "input_schema": {
             "type": "object",
             "properties": {
                 "channel_id": {
                     "type": "string",
-                    "description": "Channel ID"
+                    "description": "Channel ID or comma-separated list of channel IDs"
+                },
+                "channel_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of channel IDs (alternative to channel_id)"
                 }
-            },
-            "required": ["channel_id"]
+            }
         }
     },
     {
         "name": "channel_videos",
-        "description": "Get videos from a specific channel. Returns recent or popular uploads.",
+        "description": "Get videos from a specific channel with statistics. Returns recent or popular uploads.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -182,6 +321,10 @@ MCP_TOOLS_SCHEMA = [
                     "type": "string",
                     "enum": ["date", "viewCount", "rating"],
                     "default": "date"
+                },
+                "page_token": {
+                    "type": "string",
+                    "description": "Token for pagination (get from previous response nextPageToken)"
                 }
             },
             "required": ["channel_id"]
@@ -288,6 +431,25 @@ MCP_TOOLS_SCHEMA = [
             }
         }
     },
+    {
+        "name": "subscriptions_feed",
+        "description": "Get the newest videos from channels the user is subscribed to, merged by publish time. Requires authentication.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "max_results": {
+                    "type": "integer",
+                    "description": "Number of videos to return (1-50)",
+                    "default": 25
+                },
+                "max_channels": {
+                    "type": "integer",
+                    "description": "Maximum number of subscriptions to scan",
+                    "default": 200
+                }
+            }
+        }
+    },
     {
         "name": "create_playlist",
         "description": "Create a new playlist. Requires authentication.",
@@ -344,6 +506,69 @@ MCP_TOOLS_SCHEMA = [
             "required": ["playlist_item_id"]
         }
     },
+    {
+        "name": "bulk_like_videos",
+        "description": "Like (or dislike / clear rating of) many videos in one call. Returns a result per video. Requires authentication.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "video_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Video IDs to rate"
+                },
+                "rating": {
+                    "type": "string",
+                    "enum": ["like", "dislike", "none"],
+                    "default": "like"
+                }
+            },
+            "required": ["video_ids"]
+        }
+    },
+    {
+        "name": "bulk_add_to_playlist",
+        "description": "Add many videos to a playlist in the given order. Returns a result per video. Requires authentication.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "playlist_id": {
+                    "type": "string",
+                    "description": "Playlist ID"
+                },
+                "video_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Video IDs to add, in order"
+                }
+            },
+            "required": ["playlist_id", "video_ids"]
+        }
+    },
+    {
+        "name": "sync_playlist",
+        "description": "Make a playlist contain exactly the given videos in the given order, applying the minimal set of deletes, inserts and moves. Use dry_run to preview the changes. Requires authentication.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "playlist_id": {
+                    "type": "string",
+                    "description": "Playlist ID"
+                },
+                "video_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Desired video IDs, in order"
+                },
+                "dry_run": {
+                    "type": "boolean",
+                    "description": "Only compute and return the plan",
+                    "default": False
+                }
+            },
+            "required": ["playlist_id", "video_ids"]
+        }
+    },
     {
         "name": "my_playlists",
         "description": "Get user's playlists. Requires authentication.",
@@ -408,27 +633,258 @@ MCP_TOOLS_SCHEMA = [
                 }
             }
         }
+    },
+    {
+        "name": "session_next_page",
+        "description": "Show the next page of the session's last search or listing. Served from the session when it already holds the items. Requires a session_id.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "page_size": {
+                    "type": "integer",
+                    "description": "Items to return",
+                    "default": 10
+                }
+            }
+        }
+    },
+    {
+        "name": "session_best_result",
+        "description": "Pick the best items among the results already shown in this session (e.g. 'which one is best?'), without calling YouTube. Requires a session_id.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "rank_by": {
+                    "type": "string",
+                    "enum": RANK_METRICS,
+                    "default": "engagement_rate"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "default": 1
+                }
+            }
+        }
+    },
+    {
+        "name": "session_item_details",
+        "description": "Details of item N (1-based) of the session's last results, e.g. 'tell me about the third one'. Requires a session_id.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "index": {
+                    "type": "integer",
+                    "description": "Position in the results as shown, starting at 1"
+                },
+                "video_id": {
+                    "type": "string",
+                    "description": "Look the item up by ID instead, when the client reordered the results"
+                }
+            }
+        }
     }
 ]
 
 
+# ============================================================
+# WRITE TOOLS
+# ============================================================
+
+# Tools that mutate the user's account; eligible for the async job queue
+WRITE_TOOLS = {
+    "like_video",
+    "unlike_video",
+    "dislike_video",
+    "comment_on_video",
+    "subscribe_channel",
+    "unsubscribe_channel",
+    "create_playlist",
+    "add_to_playlist",
+    "remove_from_playlist",
+    "bulk_like_videos",
+    "bulk_add_to_playlist",
+    "sync_playlist",
+}
+
+# Writes whose repetition leaves the account unchanged (ratings, deletes);
+# only these are retried by the job queue after a timeout or 5xx
+IDEMPOTENT_WRITE_TOOLS = {
+    "like_video",
+    "unlike_video",
+    "dislike_video",
+    "unsubscribe_channel",
+    "remove_from_playlist",
+    "bulk_like_videos",
+}
+
+
+def tools_catalogue() -> Tuple[bytes, str]:
+    """The /mcp/tools body serialized once, with a strong ETag over its bytes"""
+    body = json.dumps(
+        {"tools": MCP_TOOLS_SCHEMA, "total_count": len(MCP_TOOLS_SCHEMA)},
+        separators=(",", ":")
+    ).encode()
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+# ============================================================
+# STREAMING TOOLS
+# ============================================================
+
+STREAMING_TOOLS = {
+    "export_comments": lambda arguments, token: yt.export_comments(
+        video_id=arguments["video_id"],
+        cursor=arguments.get("cursor"),
+        include_replies=arguments.get("include_replies", True),
+        max_comments=arguments.get("max_comments")
+    ),
+}
+
+
+async def stream_tool(tool_name: str, arguments: Dict[str, Any], request: Request) -> AsyncIterator[bytes]:
+    """Run a streaming tool for an HTTP request and yield NDJSON lines"""
+    token = get_auth_token(request)
+    async for record in stream_records(tool_name, arguments, token):
+        yield (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+
+async def stream_records(tool_name: str, arguments: Dict[str, Any], token: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a streaming tool and yield its records. Errors raised mid-stream
+    are reported as a final ``error`` record carrying the last cursor seen.
+    """
+    last_cursor = arguments.get("cursor")
+
+    try:
+        async for record in STREAMING_TOOLS[tool_name](arguments, token):
+            if record.get("type") == "cursor":
+                last_cursor = record.get("cursor")
+            yield record
+
+    except YouTubeAPIError as e:
+        logger.error("YouTube API error in %s stream: %s", tool_name, e)
+        yield {"type": "error", "error": str(e), "cursor": last_cursor}
+
+    except Exception as e:
+        logger.error("Unexpected error in %s stream: %s", tool_name, e, exc_info=True)
+        yield {"type": "error", "error": f"Internal error: {str(e)}", "cursor": last_cursor}
+
+
 # ============================================================
 # TOOL EXECUTION FUNCTIONS
 # ============================================================
 
-async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Request) -> Dict[str, Any]:
+async def execute_tool(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    request: Request,
+    async_mode: bool = False,
+    idempotency_key: Optional[str] = None,
+    session_id: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
     """
-    Main tool executor with comprehensive error handling and response formatting
+    Main tool executor with comprehensive error handling and response formatting.
+    
+    Write tools called with ``async_mode`` are enqueued and return a job
+    immediately. Writes carrying an ``idempotency_key`` always go through
+    the job queue, so a repeated key joins the original job instead of
+    reaching the upstream again.
     """
     
     # 🔥 FIX: Use helper function to get token
     token = get_auth_token(request)
     
     # Log token status for debugging
-    if token:
-        logger.info(f"Auth token found for {tool_name}")
-    else:
-        logger.warning(f"No auth token for {tool_name}")
+    if not token:
+        logger.warning("No auth token for %s", tool_name)
+    elif sampled():
+        logger.info("Auth token found for %s", tool_name)
+    
+    return await execute_with_token(tool_name, arguments, token, async_mode, idempotency_key, session_id, deadline)
+
+
+async def execute_with_token(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    token: Optional[str],
+    async_mode: bool = False,
+    idempotency_key: Optional[str] = None,
+    session_id: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    execute_tool for transports that resolve the token once per session.
+    
+    Every upstream call made for the tool shares one deadline: ``deadline``
+    seconds when the caller sets it, otherwise the tool's default.
+    """
+    with deadline_scope(min(deadline, tool_deadline(tool_name)) if deadline else tool_deadline(tool_name)):
+        return await _dispatch(tool_name, arguments, token, async_mode, idempotency_key, session_id)
+
+
+async def _dispatch(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    token: Optional[str],
+    async_mode: bool,
+    idempotency_key: Optional[str],
+    session_id: Optional[str]
+) -> Dict[str, Any]:
+    if tool_name in SESSION_TOOLS:
+        return await run_session_tool(tool_name, arguments, token, session_id)
+    
+    if session_id and tool_name in LISTING_TOOLS:
+        return await run_listing(tool_name, arguments, token, session_id)
+    
+    if tool_name in WRITE_TOOLS and (async_mode or idempotency_key):
+        if not token:
+            return {
+                "success": False,
+                "error": "Authentication required",
+                "auth_required": True
+            }
+        try:
+            job = await job_queue.submit(tool_name, arguments, token, token_identity(token), idempotency_key)
+        except IdempotencyConflict as e:
+            return {"success": False, "error": str(e), "status_code": 409, "tool": tool_name}
+        
+        if not async_mode:
+            # The job itself runs detached; only the wait is bound by the deadline
+            left = remaining()
+            job = await job_queue.wait(job["job_id"], None if left is None else max(left, 0))
+        
+        if async_mode or job["status"] in ("queued", "running"):
+            return {
+                "success": True,
+                "tool": tool_name,
+                "async": True,
+                "job": job,
+                "status_url": f"/mcp/jobs/{job['job_id']}"
+            }
+        
+        if job["status"] == "succeeded":
+            return {"success": True, "tool": tool_name, "data": job["result"], "job_id": job["job_id"]}
+        return {"success": False, "error": job["error"], "tool": tool_name, "job_id": job["job_id"]}
+    
+    return await run_tool(tool_name, arguments, token)
+
+
+def _degraded(result: Any) -> bool:
+    """Partial results (deadline cut, failed fan-out branches) must not be cached"""
+    return isinstance(result, dict) and bool(result.get("partial") or result.get("failed"))
+
+
+async def run_tool(tool_name: str, arguments: Dict[str, Any], token: Optional[str]) -> Dict[str, Any]:
+    """Route a tool call to the YouTube client with an already resolved token"""
+    cached = await tool_cache.get(tool_name, arguments, token)
+    if cached is not None:
+        return {
+            "success": True,
+            "tool": tool_name,
+            "data": cached,
+            "cached": True
+        }
     
     try:
         # Route to appropriate tool
@@ -438,7 +894,8 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 max_results=arguments.get("max_results", 10),
                 page_token=arguments.get("page_token"),
                 order=arguments.get("order", "relevance"),
-                token=token
+                token=token,
+                mode=arguments.get("mode", "upstream")
             )
             
         elif tool_name == "search_channels":
@@ -455,6 +912,22 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 token=token
             )
             
+        elif tool_name == "search_videos_multi":
+            result = await yt.search_videos_multi(
+                queries=arguments["queries"],
+                max_results=arguments.get("max_results", 10),
+                order=arguments.get("order", "relevance"),
+                token=token
+            )
+            
+        elif tool_name == "trending_videos_multi":
+            result = await yt.trending_videos_multi(
+                region_codes=arguments["region_codes"],
+                category_id=arguments.get("category_id"),
+                max_results=arguments.get("max_results", 25),
+                token=token
+            )
+            
         elif tool_name == "video_details":
             result = await yt.video_details(arguments["video_id"], token)
             
@@ -465,14 +938,27 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 order=arguments.get("order", "relevance")
             )
             
+        elif tool_name == "video_analytics":
+            result = await video_analytics(
+                video_ids=_id_list(arguments.get("video_ids", [])),
+                comments_video_id=arguments.get("comments_video_id"),
+                top_n=arguments.get("top_n", 5),
+                rank_by=arguments.get("rank_by", "engagement_rate"),
+                bucket=arguments.get("bucket", "day"),
+                max_comments=arguments.get("max_comments", 500),
+                token=token
+            )
+            
         elif tool_name == "channel_details":
-            result = await yt.channel_details(arguments["channel_id"])
+            result = await yt.channel_details(arguments.get("channel_ids") or arguments["channel_id"])
             
         elif tool_name == "channel_videos":
             result = await yt.channel_videos(
                 channel_id=arguments["channel_id"],
                 max_results=arguments.get("max_results", 10),
-                order=arguments.get("order", "date")
+                order=arguments.get("order", "date"),
+                page_token=arguments.get("page_token"),
+                token=token
             )
             
         # Authenticated tools
@@ -540,6 +1026,19 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 }
             result = await yt.my_subscriptions(token, arguments.get("max_results", 50))
             
+        elif tool_name == "subscriptions_feed":
+            if not token:
+                return {
+                    "success": False,
+                    "error": "Authentication required",
+                    "auth_required": True
+                }
+            result = await yt.subscriptions_feed(
+                token,
+                max_results=arguments.get("max_results", 25),
+                max_channels=arguments.get("max_channels", 200)
+            )
+            
         elif tool_name == "create_playlist":
             if not token:
                 return {
@@ -576,6 +1075,46 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 }
             result = await yt.remove_from_playlist(token, arguments["playlist_item_id"])
             
+        elif tool_name == "bulk_like_videos":
+            if not token:
+                return {
+                    "success": False,
+                    "error": "Authentication required",
+                    "auth_required": True
+                }
+            result = await yt.bulk_rate_videos(
+                token,
+                _id_list(arguments["video_ids"]),
+                arguments.get("rating", "like")
+            )
+            
+        elif tool_name == "bulk_add_to_playlist":
+            if not token:
+                return {
+                    "success": False,
+                    "error": "Authentication required",
+                    "auth_required": True
+                }
+            result = await yt.bulk_add_to_playlist(
+                token,
+                arguments["playlist_id"],
+                _id_list(arguments["video_ids"])
+            )
+            
+        elif tool_name == "sync_playlist":
+            if not token:
+                return {
+                    "success": False,
+                    "error": "Authentication required",
+                    "auth_required": True
+                }
+            result = await yt.sync_playlist(
+                token,
+                arguments["playlist_id"],
+                _id_list(arguments["video_ids"]),
+                arguments.get("dry_run", False)
+            )
+            
         elif tool_name == "my_playlists":
             if not token:
                 return {
@@ -625,6 +1164,13 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 }
             result = await yt.liked_videos(token, arguments.get("max_results", 50))
             
+        elif tool_name in STREAMING_TOOLS:
+            return {
+                "success": False,
+                "error": f"{tool_name} is a streaming tool; call it through /mcp/stream",
+                "tool": tool_name
+            }
+            
         else:
             return {
                 "success": False,
@@ -632,6 +1178,11 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
                 "available_tools": [t["name"] for t in MCP_TOOLS_SCHEMA]
             }
         
+        if tool_name in WRITE_TOOLS:
+            await tool_cache.invalidate_write(tool_name, arguments, token)
+        elif not _degraded(result):
+            await tool_cache.put(tool_name, arguments, token, result)
+        
         # Return standardized response
         return {
             "success": True,
@@ -640,18 +1191,147 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], request: Reque
         }
         
     except YouTubeAPIError as e:
-        logger.error(f"YouTube API error in {tool_name}: {str(e)}")
+        logger.error("YouTube API error in %s: %s", tool_name, e)
         return {
             "success": False,
             "error": str(e),
+            "status_code": e.status_code,
             "tool": tool_name
         }
         
     except Exception as e:
-        logger.error(f"Unexpected error in {tool_name}: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unexpected error in %s: %s", tool_name, e, exc_info=True)
         return {
             "success": False,
             "error": f"Internal error: {str(e)}",
             "tool": tool_name,
             "trace": traceback.format_exc()
-        }
\ No newline at end of file
+        }
+
+
+# ============================================================
+# SESSION TOOLS
+# ============================================================
+
+# Listing pages fetched upstream inside a session; search.list costs the
+# same quota for 50 results as for 10, the surplus answers "more"
+SESSION_PREFETCH = 50
+
+SESSION_TOOLS = {"session_next_page", "session_best_result", "session_item_details"}
+
+# Listing tools that accept a page_token to continue upstream
+PAGED_LISTING_TOOLS = {"search_videos", "channel_videos"}
+
+
+def _schema_default(tool_name: str, name: str, fallback: Any = None) -> Any:
+    for tool in MCP_TOOLS_SCHEMA:
+        if tool["name"] == tool_name:
+            return tool["input_schema"]["properties"].get(name, {}).get("default", fallback)
+    return fallback
+
+
+async def run_listing(tool_name: str, arguments: Dict[str, Any], token: Optional[str], session_id: str) -> Dict[str, Any]:
+    """Run a listing tool for a session: return the requested page, keep the surplus"""
+    requested = int(arguments.get("max_results") or _schema_default(tool_name, "max_results", 10))
+    result = await run_tool(tool_name, dict(arguments, max_results=max(requested, SESSION_PREFETCH)), token)
+    if not result.get("success"):
+        return result
+    
+    data = result["data"]
+    owner = token_identity(token) if token else None
+    listing = session_store.record(session_id, owner, tool_name, arguments, data, shown=requested)
+    
+    page = dict(data, items=data.get("items", [])[:requested])
+    page.pop("nextPageToken", None)
+    page["has_more"] = listing is not None and (listing.remaining > 0 or listing.next_page_token is not None)
+    return dict(result, data=page, session_id=session_id)
+
+
+async def run_session_tool(tool_name: str, arguments: Dict[str, Any], token: Optional[str], session_id: Optional[str]) -> Dict[str, Any]:
+    """Answer follow-up tools from the session's last listing"""
+    owner = token_identity(token) if token else None
+    listing = session_store.latest(session_id, owner) if session_id else None
+    if listing is None:
+        return {
+            "success": False,
+            "error": "No previous results in this session" if session_id else "session_id is required",
+            "tool": tool_name
+        }
+    
+    if tool_name == "session_next_page":
+        page_size = min(int(arguments.get("page_size", 10)), SESSION_PREFETCH)
+        upstream = False
+        
+        if listing.remaining < page_size and listing.next_page_token and listing.tool in PAGED_LISTING_TOOLS:
+            more = await run_tool(
+                listing.tool,
+                dict(listing.arguments, max_results=SESSION_PREFETCH, page_token=listing.next_page_token),
+                token
+            )
+            if not more.get("success"):
+                return more
+            listing.extend(more["data"])
+            upstream = True
+        
+        start = listing.shown
+        items = listing.items[start:start + page_size]
+        listing.shown += len(items)
+        result = {
+            "items": [record.to_dict() for record in items],
+            "first_index": start + 1,
+            "has_more": listing.remaining > 0 or (listing.next_page_token is not None and listing.tool in PAGED_LISTING_TOOLS),
+            "query": listing.arguments.get("query"),
+            "source": "upstream" if upstream else "session"
+        }
+    
+    elif tool_name == "session_best_result":
+        shown = listing.items[:listing.shown]
+        if LISTING_TOOLS[listing.tool] is not VideoRecord:
+            ranked = sorted(shown, key=lambda record: record.subscriber_count, reverse=True)
+            best = ranked[:int(arguments.get("top_n", 1))]
+            result = {"items": [record.to_dict() for record in best], "rank_by": "subscribers"}
+        else:
+            stats = compute_video_stats(
+                [
+                    (r.video_id, r.title, max(r.view_count, 0), max(r.like_count, 0), max(r.comment_count, 0))
+                    for r in shown
+                ],
+                top_n=int(arguments.get("top_n", 1)),
+                rank_by=arguments.get("rank_by", "engagement_rate")
+            )
+            by_id = {record.video_id: record for record in shown}
+            result = {
+                "items": [by_id[row["video_id"]].to_dict() for row in stats.get("top", [])],
+                "ranking": stats.get("top", []),
+                "rank_by": stats.get("rank_by")
+            }
+        result["query"] = listing.arguments.get("query")
+        result["considered"] = len(shown)
+    
+    else:
+        index = int(arguments.get("index", 0))
+        if arguments.get("video_id"):
+            ids = [getattr(record, "video_id", None) or getattr(record, "channel_id", None) for record in listing.items]
+            index = ids.index(arguments["video_id"]) + 1 if arguments["video_id"] in ids else 0
+        if not 1 <= index <= listing.shown:
+            return {
+                "success": False,
+                "error": f"Item {arguments.get('video_id') or index} is not among the {listing.shown} results shown",
+                "tool": tool_name
+            }
+        result = {"index": index, "item": listing.items[index - 1].to_dict(), "query": listing.arguments.get("query")}
+    
+    return {"success": True, "tool": tool_name, "data": result, "session_id": session_id}
+
+
+# ============================================================
+# JOB QUEUE
+# ============================================================
+
+async def _run_job(tool_name: str, arguments: Dict[str, Any], token: Optional[str]) -> Dict[str, Any]:
+    # Workers may have been started inside a request; jobs must not inherit its deadline
+    with no_deadline():
+        return await run_tool(tool_name, arguments, token)
+
+
+job_queue = JobQueue(_run_job, idempotent_tools=IDEMPOTENT_WRITE_TOOLS)
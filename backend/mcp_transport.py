@@ -0,0 +1,361 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sys
+import time
+from typing import Optional, Dict, Any, List, Set, Union, Callable, Awaitable
+
+from cache import TTLCache
+
+# mcp_server is imported where it is used, so the stdio entry point can
+# load .env before any settings are read
+
+logger = logging.getLogger(__name__)
+
+# Newest first; the client's version is echoed back when we support it
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+SERVER_INFO = {"name": "youtube-mcp-server", "version": "1.0.0"}
+
+# Idle sessions expire; every request slides the window
+SESSION_TTL = 1800
+MAX_SESSIONS = 10000
+
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+Notify = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JSONRPCError(Exception):
+    """Raised by method handlers; becomes a JSON-RPC error response"""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+# ============================================================
+# SESSIONS
+# ============================================================
+
+class MCPSession:
+    """
+    One client connection. The auth token is resolved when the session is
+    created and reused for every call, instead of re-parsing headers and
+    cookies per request.
+    """
+
+    def __init__(self, token: Optional[str] = None):
+        self.session_id = secrets.token_urlsafe(24)
+        self.token = token
+        self.protocol_version = PROTOCOL_VERSIONS[0]
+        self.client_info: Dict[str, Any] = {}
+        self.initialized = False
+        self.created_at = time.time()
+        self.calls = 0
+
+
+class SessionRegistry:
+    """Live MCP sessions by ``Mcp-Session-Id``"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = TTLCache(max_entries=max_sessions, default_ttl=ttl)
+
+    def create(self, token: Optional[str]) -> MCPSession:
+        session = MCPSession(token)
+        self._sessions.set(session.session_id, session, self.ttl)
+        return session
+
+    def get(self, session_id: str) -> Optional[MCPSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.set(session_id, session, self.ttl)
+        return session
+
+    def close(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+sessions = SessionRegistry()
+
+
+# ============================================================
+# TOOL CATALOGUE
+# ============================================================
+
+_MCP_TOOLS: Optional[List[Dict[str, Any]]] = None
+_TOOL_NAMES: Set[str] = set()
+
+
+def mcp_tools() -> List[Dict[str, Any]]:
+    """MCP_TOOLS_SCHEMA in the shape tools/list expects, built once"""
+    global _MCP_TOOLS
+    if _MCP_TOOLS is None:
+        from mcp_server import MCP_TOOLS_SCHEMA
+        _MCP_TOOLS = [
+            {
+                "name": tool["name"],
+                "description": tool["description"],
+                "inputSchema": tool["input_schema"],
+            }
+            for tool in MCP_TOOLS_SCHEMA
+        ]
+        _TOOL_NAMES.update(tool["name"] for tool in _MCP_TOOLS)
+    return _MCP_TOOLS
+
+
+def tool_names() -> Set[str]:
+    mcp_tools()
+    return _TOOL_NAMES
+
+
+def max_comments_cap() -> int:
+    """
+    tools/call answers with one message, so streaming tools are buffered;
+    they stop here and the client resumes from the end record's cursor.
+    Read at call time so the environment can be loaded after import.
+    """
+    return int(os.getenv("MCP_MAX_COMMENTS", "500"))
+
+
+# ============================================================
+# METHOD HANDLERS
+# ============================================================
+
+async def _initialize(params: Dict[str, Any], session: MCPSession, notify: Notify) -> Dict[str, Any]:
+    requested = params.get("protocolVersion")
+    session.protocol_version = requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+    session.client_info = params.get("clientInfo") or {}
+    logger.info("MCP session %s initialized by %s", session.session_id[:8], session.client_info.get("name", "unknown client"))
+    return {
+        "protocolVersion": session.protocol_version,
+        "capabilities": {"tools": {"listChanged": False}},
+        "serverInfo": SERVER_INFO,
+    }
+
+
+async def _initialized(params: Dict[str, Any], session: MCPSession, notify: Notify) -> None:
+    session.initialized = True
+
+
+async def _ping(params: Dict[str, Any], session: MCPSession, notify: Notify) -> Dict[str, Any]:
+    return {}
+
+
+async def _tools_list(params: Dict[str, Any], session: MCPSession, notify: Notify) -> Dict[str, Any]:
+    return {"tools": mcp_tools()}
+
+
+async def _tools_call(params: Dict[str, Any], session: MCPSession, notify: Notify) -> Dict[str, Any]:
+    name = params.get("name")
+    arguments = params.get("arguments") or {}
+    from mcp_server import STREAMING_TOOLS, execute_with_token, stream_records
+
+    if name not in tool_names():
+        raise JSONRPCError(INVALID_PARAMS, f"Unknown tool: {name}")
+    if not isinstance(arguments, dict):
+        raise JSONRPCError(INVALID_PARAMS, "arguments must be an object")
+
+    progress_token = (params.get("_meta") or {}).get("progressToken")
+    session.calls += 1
+
+    async def progress(done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        if progress_token is None:
+            return
+        payload = {"progressToken": progress_token, "progress": done}
+        if total is not None:
+            payload["total"] = total
+        if message:
+            payload["message"] = message
+        await notify({"jsonrpc": "2.0", "method": "notifications/progress", "params": payload})
+
+    if name in STREAMING_TOOLS:
+        cap = max_comments_cap()
+        requested = arguments.get("max_comments")
+        if not isinstance(requested, int) or not 0 < requested <= cap:
+            arguments = {**arguments, "max_comments": cap}
+        records = []
+        comments = 0
+        async for record in stream_records(name, arguments, session.token):
+            records.append(record)
+            if record.get("type") == "comment":
+                comments += 1
+            elif record.get("type") == "cursor":
+                await progress(comments, message=f"{comments} comments exported")
+        failed = bool(records) and records[-1].get("type") == "error"
+        result = {"success": not failed, "tool": name, "data": records}
+    else:
+        await progress(0, 1, f"Running {name}")
+        result = await execute_with_token(name, arguments, session.token, session_id=session.session_id)
+        await progress(1, 1)
+
+    return {
+        "content": [{"type": "text", "text": json.dumps(result.get("data", result))}],
+        "structuredContent": result,
+        "isError": not result.get("success", False),
+    }
+
+
+async def _ignore(params: Dict[str, Any], session: MCPSession, notify: Notify) -> None:
+    return None
+
+
+METHODS = {
+    "initialize": _initialize,
+    "notifications/initialized": _initialized,
+    "notifications/cancelled": _ignore,
+    "ping": _ping,
+    "tools/list": _tools_list,
+    "tools/call": _tools_call,
+}
+
+
+# ============================================================
+# JSON-RPC DISPATCH
+# ============================================================
+
+def error_response(request_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+async def handle_message(message: Any, session: MCPSession, notify: Notify) -> Optional[Dict[str, Any]]:
+    """Handle one request or notification; notifications return None"""
+    if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+        request_id = message.get("id") if isinstance(message, dict) else None
+        return error_response(request_id, INVALID_REQUEST, "Invalid JSON-RPC request")
+
+    is_notification = "id" not in message
+    request_id = message.get("id")
+    handler = METHODS.get(message["method"])
+
+    try:
+        if handler is None:
+            raise JSONRPCError(METHOD_NOT_FOUND, f"Method not found: {message['method']}")
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            raise JSONRPCError(INVALID_PARAMS, "params must be an object")
+        result = await handler(params, session, notify)
+
+    except JSONRPCError as e:
+        return None if is_notification else error_response(request_id, e.code, str(e), e.data)
+
+    except Exception as e:
+        logger.error("MCP %s failed: %s", message["method"], e)
+        return None if is_notification else error_response(request_id, INTERNAL_ERROR, f"Internal error: {str(e)}")
+
+    if is_notification:
+        return None
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+async def handle_payload(
+    payload: Any,
+    session: MCPSession,
+    notify: Notify
+) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Handle a single message or a batch. Batch members run concurrently and
+    the responses come back as one array; a batch of notifications only
+    yields None, as does a single notification.
+    """
+    if isinstance(payload, list):
+        if not payload:
+            return error_response(None, INVALID_REQUEST, "Empty batch")
+        responses = await asyncio.gather(*(handle_message(m, session, notify) for m in payload))
+        responses = [r for r in responses if r is not None]
+        return responses or None
+    return await handle_message(payload, session, notify)
+
+
+def is_initialize(payload: Any) -> bool:
+    messages = payload if isinstance(payload, list) else [payload]
+    return any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages)
+
+
+def wants_progress(payload: Any) -> bool:
+    messages = payload if isinstance(payload, list) else [payload]
+    return any(
+        isinstance(m, dict) and "progressToken" in ((m.get("params") or {}).get("_meta") or {})
+        for m in messages
+    )
+
+
+# ============================================================
+# STDIO TRANSPORT
+# ============================================================
+
+async def serve_stdio(token: Optional[str] = None) -> None:
+    """
+    Newline-delimited JSON-RPC over stdin/stdout for local agents. One
+    session lives for the whole process; requests are handled concurrently
+    so a slow call does not hold up the ones behind it.
+    """
+    session = MCPSession(token)
+    loop = asyncio.get_running_loop()
+    write_lock = asyncio.Lock()
+    pending = set()
+
+    async def send(message: Any) -> None:
+        async with write_lock:
+            sys.stdout.write(json.dumps(message, separators=(",", ":")) + "\n")
+            sys.stdout.flush()
+
+    async def handle_line(line: str) -> None:
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            await send(error_response(None, PARSE_ERROR, f"Parse error: {str(e)}"))
+            return
+        response = await handle_payload(payload, session, send)
+        if response is not None:
+            await send(response)
+
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.create_task(handle_line(line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _run_stdio() -> None:
+    from mcp_server import job_queue
+    from youtube_tools import yt
+
+    try:
+        await serve_stdio(os.getenv("YOUTUBE_ACCESS_TOKEN"))
+    finally:
+        await job_queue.stop()
+        await yt.aclose()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from log_setup import setup_logging
+
+    # Nothing above has imported mcp_server yet, so its settings see .env
+    load_dotenv()
+    # stdout carries the protocol, so logs go to stderr
+    setup_logging(stream=sys.stderr)
+    asyncio.run(_run_stdio())
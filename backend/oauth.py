@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import RedirectResponse, JSONResponse
 import os, httpx
 from urllib.parse import urlencode
+from youtube_tools import yt
 
 router = APIRouter()
 
@@ -67,6 +68,9 @@ async def oauth_callback(request: Request):
     if not access_token:
         return JSONResponse(tokens, status_code=400)
 
+    # Re-authentication replaces the old token; drop its cached profile
+    yt.invalidate_user(request.cookies.get("yt_access_token"))
+
     response = RedirectResponse(f"{FRONTEND_URL}?connected=true")
 
     # CORRECT COOKIE SETTINGS
@@ -140,7 +144,9 @@ async def userinfo(request: Request):
 # LOGOUT
 # -------------------------------------------------
 @router.get("/oauth/logout")
-def logout():
+def logout(request: Request):
+    yt.invalidate_user(request.cookies.get("yt_access_token"))
+
     resp = RedirectResponse(f"{FRONTEND_URL}/?logout=true")
     resp.delete_cookie("yt_access_token", path="/")
     resp.delete_cookie("yt_refresh_token", path="/")
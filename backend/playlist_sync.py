@@ -0,0 +1,105 @@
+from bisect import bisect_left
+from collections import defaultdict, deque
+from typing import Dict, Any, List, Tuple
+
+
+# ============================================================
+# SEQUENCE HELPERS
+# ============================================================
+
+def longest_increasing_subsequence(values: List[int]) -> List[int]:
+    """Indices into ``values`` of one longest strictly increasing subsequence"""
+    tails: List[int] = []        # smallest tail value for each length
+    tail_index: List[int] = []   # index in values of that tail
+    parents = [-1] * len(values)
+
+    for i, value in enumerate(values):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[pos] = value
+            tail_index[pos] = i
+        parents[i] = tail_index[pos - 1] if pos > 0 else -1
+
+    result = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        result.append(i)
+        i = parents[i]
+    return result[::-1]
+
+
+# ============================================================
+# PLANNING
+# ============================================================
+
+def plan_playlist_sync(
+    current: List[Tuple[str, str]],
+    target: List[str]
+) -> Dict[str, Any]:
+    """
+    Compute the minimal operations turning a playlist into ``target``.
+
+    ``current`` is the playlist as ``(playlist_item_id, video_id)`` pairs
+    in order; ``target`` the desired video IDs. Existing items are matched
+    to target slots by video ID (duplicates included); unmatched items are
+    deleted and missing videos inserted. Among the kept items, a longest
+    increasing subsequence of target positions stays put and only the
+    rest are moved, which is the fewest possible moves.
+
+    Inserts and moves are returned in execution order with the position
+    each one must be written at once all deletes have been applied.
+    """
+    available: Dict[str, deque] = defaultdict(deque)
+    for item_id, video_id in current:
+        available[video_id].append(item_id)
+
+    # Target slot -> existing item reused for it (None means insert)
+    slot_items: List[Any] = []
+    for video_id in target:
+        slot_items.append(available[video_id].popleft() if available[video_id] else None)
+
+    kept = {item_id: slot for slot, item_id in enumerate(slot_items) if item_id is not None}
+    deletes = [
+        {"item_id": item_id, "video_id": video_id}
+        for item_id, video_id in current if item_id not in kept
+    ]
+
+    # Kept items in current order, then the ones that can stay where they are
+    kept_order = [item_id for item_id, _ in current if item_id in kept]
+    stable_idx = longest_increasing_subsequence([kept[item_id] for item_id in kept_order])
+    stable = {kept_order[i] for i in stable_idx}
+
+    # Simulate the playlist after deletes; place every non-stable slot
+    # right after its target predecessor, in target order
+    playlist = list(kept_order)
+    operations = []
+    for slot, video_id in enumerate(target):
+        item_id = slot_items[slot]
+        if item_id in stable:
+            continue
+        if item_id is not None:
+            playlist.remove(item_id)
+        position = playlist.index(slot_items[slot - 1]) + 1 if slot > 0 else 0
+        key = item_id if item_id is not None else ("insert", slot)
+        playlist.insert(position, key)
+        slot_items[slot] = key
+        if item_id is None:
+            operations.append({"op": "insert", "video_id": video_id, "position": position})
+        else:
+            operations.append({"op": "move", "item_id": item_id, "video_id": video_id, "position": position})
+
+    return {
+        "deletes": deletes,
+        "operations": operations,
+        "unchanged": len(stable),
+        "summary": {
+            "delete": len(deletes),
+            "insert": sum(1 for op in operations if op["op"] == "insert"),
+            "move": sum(1 for op in operations if op["op"] == "move"),
+            "keep": len(stable),
+        }
+    }
+
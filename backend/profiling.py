@@ -0,0 +1,171 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+# Fraction of /mcp/call requests profiled without being asked; 0 disables
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "yt-mcp-profiles")
+
+# Seconds between stack samples
+PROFILE_INTERVAL = 0.002
+# Newest profiles kept on disk, and profiles allowed to run at once
+MAX_PROFILES = 50
+MAX_ACTIVE = 2
+
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.collapsed$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """A stack as one root-first ``a;b;c`` line, the collapsed-stack format"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Samples one thread's stack from a helper thread. Run against the event
+    loop thread it measures wall-clock time: samples taken while the loop
+    waits on the network land in the selector, and concurrent requests
+    show up too, since they share the thread.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Output for flamegraph.pl, speedscope or inferno"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """
+    Opt-in profiles of single requests, written as collapsed stacks to a
+    directory that keeps only the newest ``max_profiles`` files.
+    """
+
+    def __init__(
+        self,
+        directory: str = PROFILE_DIR,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        max_profiles: int = MAX_PROFILES,
+        max_active: int = MAX_ACTIVE
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.max_active = max_active
+        self.active = 0
+        self.recorded = 0
+
+    def wanted(self, requested: bool) -> bool:
+        """Profile this request? ``requested`` is an authorized explicit ask"""
+        if not requested and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return False
+        return self.active < self.max_active
+
+    @asynccontextmanager
+    async def profile(self, label: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Sample the event loop thread for the duration of the block. The
+        yielded dict gets the profile's ``name`` once it is written.
+        """
+        info: Dict[str, Any] = {"name": None}
+        sampler = StackSampler(threading.get_ident())
+        self.active += 1
+        started = time.time()
+        sampler.start()
+        try:
+            yield info
+        finally:
+            sampler.stop()
+            self.active -= 1
+            safe_label = re.sub(r"[^\w-]", "_", label or "request")[:40]
+            name = f"{int(started * 1000)}-{safe_label}-{os.getpid()}.collapsed"
+            await asyncio.to_thread(self._write, name, sampler.collapsed())
+            info.update(name=name, samples=sampler.samples, seconds=round(time.time() - started, 3))
+            self.recorded += 1
+
+    def _write(self, name: str, body: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(body)
+        for old in self._files()[self.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def _files(self) -> List[str]:
+        """Profile file names, newest first"""
+        try:
+            names = [n for n in os.listdir(self.directory) if PROFILE_NAME_RE.match(n)]
+        except FileNotFoundError:
+            return []
+        return sorted(names, reverse=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for name in self._files():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            profiles.append({"name": name, "bytes": stat.st_size, "created": stat.st_mtime})
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None for unknown or unsafe names"""
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "active": self.active,
+            "recorded": self.recorded,
+            "directory": self.directory,
+        }
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+profiler = Profiler()
@@ -0,0 +1,397 @@
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple
+
+# ============================================================
+# FIELD PARSERS
+# ============================================================
+
+DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def parse_duration(value: Optional[str]) -> int:
+    """ISO-8601 duration ("PT1H2M3S") to seconds; 0 for live/unknown"""
+    if not value:
+        return 0
+    match = DURATION_RE.match(value)
+    if not match:
+        return 0
+    parts = {k: int(v) for k, v in match.groupdict(default="0").items()}
+    return parts["days"] * 86400 + parts["hours"] * 3600 + parts["minutes"] * 60 + parts["seconds"]
+
+
+def format_duration(seconds: int) -> str:
+    """Seconds back to an ISO-8601 duration as YouTube reports it"""
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    out = "PT"
+    if hours:
+        out += f"{hours}H"
+    if minutes:
+        out += f"{minutes}M"
+    if secs or out == "PT":
+        out += f"{secs}S"
+    return out
+
+
+def parse_count(value: Any) -> int:
+    """YouTube count strings ("12345") to int; -1 when hidden or absent"""
+    if value is None or value == "":
+        return -1
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def parse_timestamp(value: Optional[str]) -> int:
+    """RFC 3339 timestamp to POSIX seconds; 0 when absent"""
+    if not value:
+        return 0
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+def format_timestamp(ts: int) -> Optional[str]:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else None
+
+
+def _thumbnail(snippet: Dict[str, Any]) -> Optional[str]:
+    """Keep a single thumbnail URL instead of the per-size map"""
+    thumbnails = snippet.get("thumbnails") or {}
+    for size in ("high", "medium", "standard", "default", "maxres"):
+        if size in thumbnails:
+            return thumbnails[size].get("url")
+    return None
+
+
+def _count_str(value: int) -> Optional[str]:
+    return None if value < 0 else str(value)
+
+
+# ============================================================
+# RECORD TYPES
+# ============================================================
+
+class VideoRecord:
+    """Compact video built from a search result or videos.list item"""
+
+    __slots__ = (
+        "video_id", "title", "description", "channel_id", "channel_title",
+        "published_at", "thumbnail", "tags", "category_id", "language",
+        "duration", "view_count", "like_count", "comment_count",
+    )
+
+    def __init__(
+        self,
+        video_id: str,
+        title: str = "",
+        description: str = "",
+        channel_id: Optional[str] = None,
+        channel_title: Optional[str] = None,
+        published_at: int = 0,
+        thumbnail: Optional[str] = None,
+        tags: Tuple[str, ...] = (),
+        category_id: Optional[str] = None,
+        language: Optional[str] = None,
+        duration: int = -1,
+        view_count: int = -1,
+        like_count: int = -1,
+        comment_count: int = -1
+    ):
+        self.video_id = video_id
+        self.title = title
+        self.description = description
+        self.channel_id = channel_id
+        self.channel_title = channel_title
+        self.published_at = published_at
+        self.thumbnail = thumbnail
+        self.tags = tags
+        self.category_id = category_id
+        self.language = language
+        self.duration = duration
+        self.view_count = view_count
+        self.like_count = like_count
+        self.comment_count = comment_count
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> Optional["VideoRecord"]:
+        video_id = item.get("id")
+        if isinstance(video_id, dict):
+            video_id = video_id.get("videoId")
+        if not video_id:
+            return None
+
+        snippet = item.get("snippet") or {}
+        stats = item.get("statistics") or {}
+        content = item.get("contentDetails") or {}
+        return cls(
+            video_id=video_id,
+            title=snippet.get("title", ""),
+            description=snippet.get("description", ""),
+            channel_id=_intern(snippet.get("channelId")),
+            channel_title=_intern(snippet.get("channelTitle")),
+            published_at=parse_timestamp(snippet.get("publishedAt")),
+            thumbnail=_thumbnail(snippet),
+            tags=tuple(sys.intern(t) for t in snippet.get("tags") or ()),
+            category_id=_intern(snippet.get("categoryId")),
+            language=_intern(snippet.get("defaultAudioLanguage") or snippet.get("defaultLanguage")),
+            duration=parse_duration(content["duration"]) if content.get("duration") else -1,
+            view_count=parse_count(stats.get("viewCount")),
+            like_count=parse_count(stats.get("likeCount")),
+            comment_count=parse_count(stats.get("commentCount"))
+        )
+
+    def merge(self, older: "VideoRecord") -> "VideoRecord":
+        """Fill fields this (partial) record lacks from an older one"""
+        for name in ("channel_id", "channel_title", "published_at", "thumbnail", "tags", "category_id", "language"):
+            if not getattr(self, name):
+                setattr(self, name, getattr(older, name))
+        for name in ("duration", "view_count", "like_count", "comment_count"):
+            if getattr(self, name) < 0:
+                setattr(self, name, getattr(older, name))
+        # Search snippets truncate descriptions
+        if len(older.description) > len(self.description):
+            self.description = older.description
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Search-result shaped dict, as returned by search_videos"""
+        snippet = {
+            "title": self.title,
+            "description": self.description,
+            "channelId": self.channel_id,
+            "channelTitle": self.channel_title,
+            "publishedAt": format_timestamp(self.published_at),
+        }
+        if self.thumbnail:
+            snippet["thumbnails"] = {"high": {"url": self.thumbnail}}
+        if self.tags:
+            snippet["tags"] = list(self.tags)
+        if self.category_id:
+            snippet["categoryId"] = self.category_id
+
+        result = {
+            "kind": "youtube#searchResult",
+            "id": {"kind": "youtube#video", "videoId": self.video_id},
+            "snippet": snippet,
+        }
+        stats = {
+            key: _count_str(value)
+            for key, value in (
+                ("viewCount", self.view_count),
+                ("likeCount", self.like_count),
+                ("commentCount", self.comment_count),
+            )
+            if value >= 0
+        }
+        if stats:
+            result["statistics"] = stats
+        if self.duration >= 0:
+            result["contentDetails"] = {"duration": format_duration(self.duration)}
+        return result
+
+
+class ChannelRecord:
+    """Compact channel built from a search result or channels.list item"""
+
+    __slots__ = (
+        "channel_id", "title", "description", "custom_url", "country",
+        "thumbnail", "keywords", "uploads_playlist", "subscriber_count",
+        "video_count", "view_count",
+    )
+
+    def __init__(
+        self,
+        channel_id: str,
+        title: str = "",
+        description: str = "",
+        custom_url: Optional[str] = None,
+        country: Optional[str] = None,
+        thumbnail: Optional[str] = None,
+        keywords: str = "",
+        uploads_playlist: Optional[str] = None,
+        subscriber_count: int = -1,
+        video_count: int = -1,
+        view_count: int = -1
+    ):
+        self.channel_id = channel_id
+        self.title = title
+        self.description = description
+        self.custom_url = custom_url
+        self.country = country
+        self.thumbnail = thumbnail
+        self.keywords = keywords
+        self.uploads_playlist = uploads_playlist
+        self.subscriber_count = subscriber_count
+        self.video_count = video_count
+        self.view_count = view_count
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> Optional["ChannelRecord"]:
+        channel_id = item.get("id")
+        if isinstance(channel_id, dict):
+            channel_id = channel_id.get("channelId")
+        if not channel_id:
+            return None
+
+        snippet = item.get("snippet") or {}
+        stats = item.get("statistics") or {}
+        related = (item.get("contentDetails") or {}).get("relatedPlaylists") or {}
+        branding = (item.get("brandingSettings") or {}).get("channel") or {}
+        return cls(
+            channel_id=sys.intern(channel_id),
+            title=snippet.get("title") or snippet.get("channelTitle", ""),
+            description=snippet.get("description", ""),
+            custom_url=snippet.get("customUrl"),
+            country=_intern(snippet.get("country")),
+            thumbnail=_thumbnail(snippet),
+            keywords=branding.get("keywords", ""),
+            uploads_playlist=related.get("uploads"),
+            subscriber_count=-1 if stats.get("hiddenSubscriberCount") else parse_count(stats.get("subscriberCount")),
+            video_count=parse_count(stats.get("videoCount")),
+            view_count=parse_count(stats.get("viewCount"))
+        )
+
+    def merge(self, older: "ChannelRecord") -> "ChannelRecord":
+        """Fill fields this (partial) record lacks from an older one"""
+        for name in ("custom_url", "country", "thumbnail", "keywords", "uploads_playlist"):
+            if not getattr(self, name):
+                setattr(self, name, getattr(older, name))
+        for name in ("subscriber_count", "video_count", "view_count"):
+            if getattr(self, name) < 0:
+                setattr(self, name, getattr(older, name))
+        if len(older.description) > len(self.description):
+            self.description = older.description
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        snippet = {
+            "channelId": self.channel_id,
+            "title": self.title,
+            "description": self.description,
+        }
+        if self.thumbnail:
+            snippet["thumbnails"] = {"high": {"url": self.thumbnail}}
+        if self.custom_url:
+            snippet["customUrl"] = self.custom_url
+        if self.country:
+            snippet["country"] = self.country
+
+        result = {
+            "kind": "youtube#searchResult",
+            "id": {"kind": "youtube#channel", "channelId": self.channel_id},
+            "snippet": snippet,
+        }
+        stats = {
+            key: _count_str(value)
+            for key, value in (
+                ("subscriberCount", self.subscriber_count),
+                ("videoCount", self.video_count),
+                ("viewCount", self.view_count),
+            )
+            if value >= 0
+        }
+        if stats:
+            result["statistics"] = stats
+        return result
+
+
+class PlaylistItemRecord:
+    """Compact playlistItems entry"""
+
+    __slots__ = (
+        "item_id", "playlist_id", "video_id", "position", "title", "description",
+        "channel_id", "channel_title", "published_at", "thumbnail",
+    )
+
+    def __init__(
+        self,
+        item_id: str,
+        playlist_id: Optional[str],
+        video_id: str,
+        position: int = -1,
+        title: str = "",
+        description: str = "",
+        channel_id: Optional[str] = None,
+        channel_title: Optional[str] = None,
+        published_at: int = 0,
+        thumbnail: Optional[str] = None
+    ):
+        self.item_id = item_id
+        self.playlist_id = playlist_id
+        self.video_id = video_id
+        self.position = position
+        self.title = title
+        self.description = description
+        self.channel_id = channel_id
+        self.channel_title = channel_title
+        self.published_at = published_at
+        self.thumbnail = thumbnail
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any]) -> Optional["PlaylistItemRecord"]:
+        snippet = item.get("snippet") or {}
+        content = item.get("contentDetails") or {}
+        video_id = content.get("videoId") or (snippet.get("resourceId") or {}).get("videoId")
+        if not video_id:
+            return None
+        return cls(
+            item_id=item.get("id"),
+            playlist_id=_intern(snippet.get("playlistId")),
+            video_id=video_id,
+            position=snippet.get("position", -1),
+            title=snippet.get("title", ""),
+            description=snippet.get("description", ""),
+            channel_id=_intern(snippet.get("videoOwnerChannelId")),
+            channel_title=_intern(snippet.get("videoOwnerChannelTitle")),
+            published_at=parse_timestamp(content.get("videoPublishedAt")),
+            thumbnail=_thumbnail(snippet)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        snippet = {
+            "playlistId": self.playlist_id,
+            "position": self.position,
+            "title": self.title,
+            "description": self.description,
+            "videoOwnerChannelId": self.channel_id,
+            "videoOwnerChannelTitle": self.channel_title,
+            "resourceId": {"kind": "youtube#video", "videoId": self.video_id},
+        }
+        if self.thumbnail:
+            snippet["thumbnails"] = {"high": {"url": self.thumbnail}}
+        return {
+            "kind": "youtube#playlistItem",
+            "id": self.item_id,
+            "snippet": snippet,
+            "contentDetails": {
+                "videoId": self.video_id,
+                "videoPublishedAt": format_timestamp(self.published_at),
+            },
+        }
+
+    def to_search_result(self) -> Dict[str, Any]:
+        """The video this entry points at, shaped like a search.list result"""
+        snippet = {
+            "title": self.title,
+            "description": self.description,
+            "channelId": self.channel_id,
+            "channelTitle": self.channel_title,
+            "publishedAt": format_timestamp(self.published_at),
+        }
+        if self.thumbnail:
+            snippet["thumbnails"] = {"high": {"url": self.thumbnail}}
+        return {
+            "kind": "youtube#searchResult",
+            "id": {"kind": "youtube#video", "videoId": self.video_id},
+            "snippet": snippet,
+        }
@@ -0,0 +1,265 @@
+import math
+import re
+import time
+import unicodedata
+import logging
+from collections import Counter, OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from records import VideoRecord, ChannelRecord
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# QUERY NORMALIZATION
+# ============================================================
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "the", "to", "with", "video", "videos",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents and split text into index terms"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return [_stem(t) for t in TOKEN_RE.findall(text) if t not in STOPWORDS]
+
+
+def _stem(term: str) -> str:
+    """Fold simple plurals so 'tutorials' and 'tutorial' share a term"""
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query: casing, accents, punctuation, stopwords
+    and word order do not change the key. Queries with no index terms
+    (stopwords only, emoji, non-Latin scripts) fall back to their
+    casefolded text so they do not all share one empty key.
+    """
+    terms = sorted(set(tokenize(query)))
+    if terms:
+        return " ".join(terms)
+    raw = " ".join((query or "").casefold().split())
+    return f"raw:{raw}" if raw else ""
+
+
+# ============================================================
+# INVERTED INDEX
+# ============================================================
+
+class SearchIndex:
+    """
+    In-memory BM25 inverted index over video and channel metadata.
+
+    Fields are weighted (BM25F-style) so a title hit counts more than a
+    description hit. The index is bounded by ``max_docs``; the least
+    recently updated documents are evicted first.
+    """
+
+    FIELD_WEIGHTS = {
+        "title": 3.0,
+        "tags": 2.0,
+        "channel": 1.5,
+        "description": 1.0,
+    }
+
+    def __init__(
+        self,
+        max_docs: int = 20000,
+        k1: float = 1.2,
+        b: float = 0.75,
+        query_ttl: int = 3600,
+        max_queries: int = 2000
+    ):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        self.query_ttl = query_ttl
+        self.max_queries = max_queries
+
+        self._docs: "OrderedDict[str, Tuple[str, Dict[str, float], float]]" = OrderedDict()
+        self._payloads: Dict[str, Any] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._total_length = 0.0
+        self._queries: "OrderedDict[str, Tuple[float, List[str], Optional[str]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------
+
+    def add(self, doc_id: str, kind: str, fields: Dict[str, str], payload: Any) -> None:
+        """Insert or replace a document"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        weights: Counter = Counter()
+        for field, text in fields.items():
+            weight = self.FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(text):
+                weights[term] += weight
+
+        length = float(sum(weights.values()))
+        self._docs[doc_id] = (kind, dict(weights), length)
+        self._payloads[doc_id] = payload
+        self._total_length += length
+
+        for term, tf in weights.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+        while len(self._docs) > self.max_docs:
+            oldest = next(iter(self._docs))
+            self.remove(oldest)
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document and its postings"""
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        _, weights, length = entry
+        self._payloads.pop(doc_id, None)
+        self._total_length -= length
+        for term in weights:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def get(self, doc_id: str) -> Optional[Any]:
+        """The stored VideoRecord/ChannelRecord for a document"""
+        return self._payloads.get(doc_id)
+
+    def add_video(self, item: Dict[str, Any]) -> None:
+        """Index a video from a search result or a videos.list item"""
+        record = VideoRecord.from_api(item)
+        if record is None:
+            return
+
+        # The index is shared by every caller; private and unlisted videos
+        # fetched with a user's token must not surface in anyone's search
+        privacy = (item.get("status") or {}).get("privacyStatus", "public")
+        if privacy != "public":
+            self.remove(record.video_id)
+            return
+
+        # Search snippets carry no tags/statistics; keep what we already know
+        previous = self._payloads.get(record.video_id)
+        if isinstance(previous, VideoRecord):
+            record.merge(previous)
+
+        self.add(record.video_id, "video", {
+            "title": record.title,
+            "description": record.description,
+            "tags": " ".join(record.tags),
+            "channel": record.channel_title or "",
+        }, record)
+
+    def add_channel(self, item: Dict[str, Any]) -> None:
+        """Index a channel from a search result or a channels.list item"""
+        record = ChannelRecord.from_api(item)
+        if record is None:
+            return
+
+        previous = self._payloads.get(record.channel_id)
+        if isinstance(previous, ChannelRecord):
+            record.merge(previous)
+
+        self.add(record.channel_id, "channel", {
+            "title": record.title,
+            "description": record.description,
+            "tags": record.keywords,
+        }, record)
+
+    # ------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank documents with BM25. Each hit reports its score and the
+        fraction of query terms it matched (``coverage``).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._docs:
+            return []
+
+        n_docs = len(self._docs)
+        avg_length = self._total_length / n_docs or 1.0
+        scores: Dict[str, float] = {}
+        matched: Counter = Counter()
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                doc_kind, _, length = self._docs[doc_id]
+                if kind and doc_kind != kind:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id] += 1
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [
+            {
+                "id": doc_id,
+                "score": round(score, 4),
+                "coverage": matched[doc_id] / len(terms),
+                "item": self._payloads[doc_id].to_dict(),
+            }
+            for doc_id, score in ranked
+        ]
+
+    # ------------------------------------------------------------
+    # Served-query memo
+    # ------------------------------------------------------------
+
+    def remember_query(self, key: str, doc_ids: List[str], next_page_token: Optional[str] = None) -> None:
+        """Record which documents upstream returned for a normalized query"""
+        if not key:
+            return
+        self._queries.pop(key, None)
+        self._queries[key] = (time.monotonic(), list(doc_ids), next_page_token)
+        while len(self._queries) > self.max_queries:
+            self._queries.popitem(last=False)
+
+    def recall_query(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """Return the remembered results for a query if still fresh and indexed"""
+        entry = self._queries.get(key)
+        if entry is None:
+            return None
+        stored_at, doc_ids, next_page_token = entry
+        if time.monotonic() - stored_at > self.query_ttl:
+            del self._queries[key]
+            return None
+        items = [self._payloads[d].to_dict() for d in doc_ids if d in self._payloads]
+        if len(items) < len(doc_ids):
+            return None
+        return items, next_page_token
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+search_index = SearchIndex()
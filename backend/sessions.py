@@ -0,0 +1,122 @@
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from cache import TTLCache
+from records import VideoRecord, ChannelRecord
+
+# Idle sessions expire; every use slides the window
+SESSION_TTL = 1800
+MAX_SESSIONS = 5000
+
+# Recent listings kept per session, and items kept per listing
+MAX_LISTINGS = 4
+MAX_ITEMS_PER_LISTING = 200
+
+# Listing tools a session remembers, with the record type of their items
+LISTING_TOOLS = {
+    "search_videos": VideoRecord,
+    "trending_videos": VideoRecord,
+    "search_videos_multi": VideoRecord,
+    "trending_videos_multi": VideoRecord,
+    "channel_videos": VideoRecord,
+    "search_channels": ChannelRecord,
+}
+
+
+class SessionListing:
+    """One listing result: its items as records, and how many the client has seen"""
+
+    __slots__ = ("tool", "arguments", "items", "shown", "next_page_token", "created_at")
+
+    def __init__(self, tool: str, arguments: Dict[str, Any]):
+        self.tool = tool
+        self.arguments = arguments
+        self.items: List[Any] = []
+        self.shown = 0
+        self.next_page_token: Optional[str] = None
+        self.created_at = time.time()
+
+    def extend(self, data: Dict[str, Any]) -> int:
+        """Append items from a tool response; returns how many were kept"""
+        record_type = LISTING_TOOLS[self.tool]
+        room = MAX_ITEMS_PER_LISTING - len(self.items)
+        added = 0
+        for item in data.get("items", []):
+            if added >= room:
+                break
+            record = record_type.from_api(item)
+            if record is not None:
+                self.items.append(record)
+                added += 1
+        self.next_page_token = data.get("nextPageToken") if added == len(data.get("items", [])) else None
+        return added
+
+    @property
+    def remaining(self) -> int:
+        return len(self.items) - self.shown
+
+
+class ChatSession:
+    __slots__ = ("session_id", "owner", "listings")
+
+    def __init__(self, session_id: str, owner: Optional[str]):
+        self.session_id = session_id
+        self.owner = owner
+        self.listings: deque = deque(maxlen=MAX_LISTINGS)
+
+
+class SessionStore:
+    """
+    Per-conversation listing results, so follow-ups ("more", "the best
+    one", "details of the third") can be answered without calling
+    YouTube again. Sessions are namespaced by token identity: another
+    identity presenting the same ID gets its own, separate session.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = TTLCache(max_entries=max_sessions, default_ttl=ttl)
+
+    def get(self, session_id: str, owner: Optional[str], create: bool = False) -> Optional[ChatSession]:
+        key = (owner, session_id)
+        session = self._sessions.get(key)
+        if session is None:
+            if not create:
+                return None
+            session = ChatSession(session_id, owner)
+        self._sessions.set(key, session, self.ttl)
+        return session
+
+    def record(
+        self,
+        session_id: str,
+        owner: Optional[str],
+        tool: str,
+        arguments: Dict[str, Any],
+        data: Dict[str, Any],
+        shown: int
+    ) -> SessionListing:
+        """Remember a listing result; ``shown`` items were returned to the client"""
+        session = self.get(session_id, owner, create=True)
+        listing = SessionListing(tool, {k: v for k, v in arguments.items() if k != "page_token"})
+        listing.extend(data)
+        listing.shown = min(shown, len(listing.items))
+        session.listings.append(listing)
+        return listing
+
+    def latest(self, session_id: str, owner: Optional[str]) -> Optional[SessionListing]:
+        session = self.get(session_id, owner)
+        if session is None or not session.listings:
+            return None
+        return session.listings[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+session_store = SessionStore()
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+import agent as agent_module
+from agent import Agent, StubLLMClient, set_llm_client, normalize_utterance
+from mcp_server import yt
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Replace the YouTube calls behind the tools; record calls and overlap"""
+    state = {"calls": [], "active": 0, "max_active": 0}
+
+    def tool(name):
+        async def run(*args, **kwargs):
+            state["calls"].append(name)
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+            await asyncio.sleep(0.02)
+            state["active"] -= 1
+            return {"items": [{"id": f"{name}-1"}]}
+        return run
+
+    for name in ("search_videos", "trending_videos", "my_subscriptions", "like_video"):
+        monkeypatch.setattr(yt, name, tool(name))
+    return state
+
+
+@pytest.fixture
+def stub():
+    client = StubLLMClient()
+    set_llm_client(client)
+    yield client
+    set_llm_client(None)
+
+
+SEARCH_AND_TRENDING = {
+    "tool_calls": [
+        {"name": "search_videos", "arguments": {"query": "agent routing test"}},
+        {"name": "trending_videos", "arguments": {"region_code": "GB"}},
+    ]
+}
+
+
+def test_tool_calls_of_one_turn_run_in_parallel(fake_tools, stub):
+    stub.turns = [SEARCH_AND_TRENDING, {"content": "Here you go."}]
+    result = asyncio.run(Agent().chat("find agent videos and what's trending"))
+
+    assert result["success"] and result["reply"] == "Here you go."
+    assert [call["name"] for call in result["tool_calls"]] == ["search_videos", "trending_videos"]
+    assert all(call["result"]["success"] for call in result["tool_calls"])
+    assert sorted(fake_tools["calls"]) == ["search_videos", "trending_videos"]
+    assert fake_tools["max_active"] == 2
+    # Tool results are handed back to the model on the second turn
+    assert [m["role"] for m in stub.requests[1]][-2:] == ["tool", "tool"]
+
+
+def test_unknown_tool_is_reported_to_the_model(fake_tools, stub):
+    stub.turns = [{"tool_calls": [{"name": "no_such_tool", "arguments": {}}]}, {"content": "Sorry."}]
+    result = asyncio.run(Agent().chat("do something odd"))
+    assert result["tool_calls"][0]["result"]["success"] is False
+    assert fake_tools["calls"] == []
+
+
+def test_plan_is_cached_for_equivalent_messages(fake_tools, stub):
+    agent = Agent()
+    stub.turns = [SEARCH_AND_TRENDING, {"content": "First."}, {"content": "Second."}]
+
+    first = asyncio.run(agent.chat("Find agent videos, and trending!"))
+    second = asyncio.run(agent.chat("  find AGENT videos and trending"))
+
+    assert normalize_utterance("Find agent videos, and trending!") == normalize_utterance("  find AGENT videos and trending")
+    assert first["plan_cached"] is False and first["model_calls"] == 2
+    assert second["plan_cached"] is True and second["model_calls"] == 1
+    assert [call["name"] for call in second["tool_calls"]] == ["search_videos", "trending_videos"]
+
+
+def test_plans_with_writes_are_not_cached(fake_tools, stub):
+    agent = Agent()
+    like = {"tool_calls": [{"name": "like_video", "arguments": {"video_id": "v1"}}]}
+    stub.turns = [like, {"content": "Liked."}, like, {"content": "Liked again."}]
+
+    asyncio.run(agent.chat("like video v1", token="token"))
+    second = asyncio.run(agent.chat("like video v1", token="token"))
+    assert second["plan_cached"] is False and second["model_calls"] == 2
+
+
+def test_plans_from_conversations_with_history_are_not_reused(fake_tools, stub):
+    agent = Agent()
+    stub.turns = [SEARCH_AND_TRENDING, {"content": "One."}, SEARCH_AND_TRENDING, {"content": "Two."}]
+    history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "reply"}]
+
+    asyncio.run(agent.chat("same words", history=history))
+    second = asyncio.run(agent.chat("same words", history=history))
+    assert second["plan_cached"] is False
+
+
+def test_provider_failure_is_a_structured_error(fake_tools):
+    class FailingClient:
+        async def complete(self, messages, tools):
+            raise RuntimeError("upstream overloaded")
+
+    result = asyncio.run(Agent().chat("anything", llm=FailingClient()))
+    assert result == {
+        "success": False,
+        "error": "LLM provider error: upstream overloaded",
+        "status_code": 502,
+        "tool_calls": []
+    }
+
+
+def test_missing_llm_is_503(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    set_llm_client(None)
+    result = asyncio.run(Agent().chat("anything"))
+    assert result["success"] is False and result["status_code"] == 503
+    assert agent_module.get_llm_client() is None
+
+
+def test_agent_chat_endpoint_maps_provider_failure_to_502():
+    from fastapi.testclient import TestClient
+    import main
+
+    class FailingClient:
+        async def complete(self, messages, tools):
+            raise TimeoutError("provider timed out")
+
+    set_llm_client(FailingClient())
+    try:
+        response = TestClient(main.app).post("/agent/chat", json={"message": "hello"})
+    finally:
+        set_llm_client(None)
+    assert response.status_code == 502
+    assert response.json()["error"].startswith("LLM provider error")
@@ -0,0 +1,131 @@
+import asyncio
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import analytics
+from analytics import (
+    POOL_THRESHOLD, MAX_VIDEO_IDS, VIDEO_FETCH_CONCURRENCY,
+    compute_video_stats, compute_comment_stats, run_stats, video_analytics, shutdown_pool
+)
+from youtube_tools import YouTubeAPIError, yt
+
+
+# Plain-Python references for the vectorized passes
+
+def percentile(values, p):
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    low, high = math.floor(k), math.ceil(k)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def reference_video_stats(rows, top_n):
+    engagement = {row[0]: (row[3] + row[4]) / max(row[2], 1) for row in rows}
+    return {
+        "count": len(rows),
+        "totals": {
+            "views": sum(row[2] for row in rows),
+            "likes": sum(row[3] for row in rows),
+            "comments": sum(row[4] for row in rows),
+        },
+        "mean_engagement_rate": round(sum(engagement.values()) / len(rows), 6),
+        "p50_views": round(percentile([row[2] for row in rows], 50), 6),
+        "p90_engagement": round(percentile(list(engagement.values()), 90), 6),
+        "top": sorted(engagement, key=engagement.get, reverse=True)[:top_n],
+    }
+
+
+def reference_comment_stats(rows, bucket, top_n):
+    width = 13 if bucket == "hour" else 10
+    counts = Counter(row[1][:width] for row in rows)
+    return {
+        "count": len(rows),
+        "buckets": [counts[key] for key in sorted(counts)],
+        "p75_likes": round(percentile([row[2] for row in rows], 75), 6),
+        "top_liked": [row[0] for row in sorted(rows, key=lambda r: r[2], reverse=True)[:top_n]],
+    }
+
+
+def video_rows(n, seed=1):
+    rng = random.Random(seed)
+    views = rng.sample(range(1, 50 * n), n)
+    return [(f"v{i}", f"title {i}", views[i], rng.randrange(0, views[i]), rng.randrange(0, 500)) for i in range(n)]
+
+
+def comment_rows(n, seed=2):
+    rng = random.Random(seed)
+    likes = rng.sample(range(10 * n), n)
+    return [
+        (f"c{i}", f"2024-03-{rng.randrange(1, 29):02d}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00Z", likes[i], rng.randrange(5))
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    yield
+    shutdown_pool()
+
+
+@pytest.mark.parametrize("n", [40, POOL_THRESHOLD + 10])
+def test_video_stats_match_reference(n):
+    rows = video_rows(n)
+    stats = asyncio.run(run_stats(compute_video_stats, rows, top_n=5))
+    expected = reference_video_stats(rows, 5)
+
+    assert stats["count"] == expected["count"]
+    assert stats["totals"] == expected["totals"]
+    assert stats["mean_engagement_rate"] == pytest.approx(expected["mean_engagement_rate"], abs=1e-6)
+    assert stats["percentiles"]["views"]["p50"] == pytest.approx(expected["p50_views"])
+    assert stats["percentiles"]["engagement_rate"]["p90"] == pytest.approx(expected["p90_engagement"], abs=1e-6)
+    assert [row["video_id"] for row in stats["top"]] == expected["top"]
+
+
+@pytest.mark.parametrize("n,bucket", [(60, "day"), (60, "hour"), (POOL_THRESHOLD + 10, "day")])
+def test_comment_stats_match_reference(n, bucket):
+    rows = comment_rows(n)
+    stats = asyncio.run(run_stats(compute_comment_stats, rows, bucket=bucket, top_n=3))
+    expected = reference_comment_stats(rows, bucket, 3)
+
+    assert stats["count"] == expected["count"]
+    assert [b["comments"] for b in stats["buckets"]] == expected["buckets"]
+    assert stats["percentiles"]["likes"]["p75"] == pytest.approx(expected["p75_likes"])
+    assert [c["comment_id"] for c in stats["top_liked"]] == expected["top_liked"]
+
+
+def test_only_large_batches_use_the_pool(monkeypatch):
+    used = []
+    get_pool = analytics._get_pool
+    monkeypatch.setattr(analytics, "_get_pool", lambda: used.append(True) or get_pool())
+
+    asyncio.run(run_stats(compute_video_stats, video_rows(10)))
+    assert used == []
+    asyncio.run(run_stats(compute_video_stats, video_rows(POOL_THRESHOLD)))
+    assert used == [True]
+
+
+def test_video_fetches_are_bounded(monkeypatch):
+    state = {"calls": 0, "active": 0, "max_active": 0}
+
+    async def video_details(ids, token=None):
+        state["calls"] += 1
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return {"items": [{"id": v, "statistics": {"viewCount": "10"}} for v in ids.split(",")]}
+
+    monkeypatch.setattr(yt, "video_details", video_details)
+    result = asyncio.run(video_analytics([f"v{i}" for i in range(600)]))
+
+    assert result["videos"]["count"] == 600
+    assert state["calls"] == 12
+    assert state["max_active"] == VIDEO_FETCH_CONCURRENCY
+
+    with pytest.raises(YouTubeAPIError) as error:
+        asyncio.run(video_analytics([f"v{i}" for i in range(MAX_VIDEO_IDS + 1)]))
+    assert error.value.status_code == 400
+    assert state["calls"] == 12
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from youtube_tools import YouTubeAPIError, yt
+
+
+def comment(comment_id):
+    return {"id": comment_id, "snippet": {"textDisplay": comment_id}}
+
+
+def thread(thread_id, replies=()):
+    return {
+        "id": thread_id,
+        "snippet": {"topLevelComment": comment(thread_id), "totalReplyCount": len(replies)},
+        "replies": {"comments": [comment(r) for r in replies]},
+    }
+
+
+PAGES = {
+    None: {"items": [thread("t1", ["t1.r1", "t1.r2"]), thread("t2")], "nextPageToken": "p2"},
+    "p2": {"items": [thread("t3", ["t3.r1"])]},
+}
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    requested = []
+
+    async def public_get(endpoint, params):
+        requested.append(params.get("pageToken"))
+        return PAGES[params.get("pageToken")]
+
+    monkeypatch.setattr(yt, "public_get", public_get)
+    return requested
+
+
+def export(**kwargs):
+    async def collect():
+        return [record async for record in yt.export_comments("v1", **kwargs)]
+    return asyncio.run(collect())
+
+
+def comment_ids(records):
+    return [r["id"] for r in records if r["type"] == "comment"]
+
+
+def test_full_export(fake_pages):
+    records = export()
+    assert comment_ids(records) == ["t1", "t1.r1", "t1.r2", "t2", "t3", "t3.r1"]
+    assert records[-1] == {"type": "end", "threads": 3, "comments": 6, "truncated": False}
+
+
+def test_max_comments_is_exact_and_resumable(fake_pages):
+    exported = []
+    cursor = None
+    for _ in range(10):
+        records = export(cursor=cursor, max_comments=2)
+        assert len(comment_ids(records)) <= 2
+        exported += comment_ids(records)
+        end = records[-1]
+        if not end["truncated"]:
+            break
+        cursor = end["cursor"]
+
+    assert exported == ["t1", "t1.r1", "t1.r2", "t2", "t3", "t3.r1"]
+    # Stopping at a page boundary hands over the next page token without fetching it
+    assert fake_pages == [None, None, "p2"]
+
+
+def test_truncation_mid_thread(fake_pages):
+    records = export(max_comments=2)
+    assert comment_ids(records) == ["t1", "t1.r1"]
+    assert records[-1] == {"type": "end", "threads": 1, "comments": 2, "truncated": True, "cursor": "|2"}
+
+
+def test_invalid_cursor(fake_pages):
+    with pytest.raises(YouTubeAPIError):
+        export(cursor="p2|x")
@@ -0,0 +1,65 @@
+import asyncio
+
+from hedging import Hedger
+
+
+def warmed_hedger(delay=0.05):
+    hedger = Hedger(enabled=True, budget=1.0)
+    for _ in range(20):
+        hedger.observe("videos", delay)
+    return hedger
+
+
+def test_cancelling_the_caller_cancels_the_primary():
+    async def scenario():
+        started = []
+        hedger = warmed_hedger()
+
+        async def send():
+            started.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        caller = asyncio.ensure_future(hedger.run("videos", send))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0)
+        # Checked before asyncio.run cancels whatever is left
+        return [task.cancelled() for task in started]
+
+    assert asyncio.run(scenario()) == [True]
+
+
+def test_cancelling_the_caller_cancels_primary_and_hedge():
+    async def scenario():
+        started = []
+        hedger = warmed_hedger()
+
+        async def send():
+            started.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        caller = asyncio.ensure_future(hedger.run("videos", send))
+        await asyncio.sleep(0.1)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0)
+        return [task.cancelled() for task in started], hedger.hedges
+
+    assert asyncio.run(scenario()) == ([True, True], 1)
+
+
+def test_hedge_wins_when_primary_is_slow():
+    async def scenario():
+        hedger = warmed_hedger()
+        calls = []
+
+        async def send():
+            calls.append(None)
+            await asyncio.sleep(1 if len(calls) == 1 else 0.01)
+            return len(calls)
+
+        return await hedger.run("videos", send), hedger
+
+    result, hedger = asyncio.run(scenario())
+    assert result == 2 and hedger.hedge_wins == 1
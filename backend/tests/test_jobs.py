@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from jobs import JobQueue, IdempotencyConflict
+
+
+def make_queue(responses, idempotent_tools=()):
+    calls = []
+
+    async def runner(tool_name, arguments, token):
+        calls.append(tool_name)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    return JobQueue(runner, idempotent_tools=idempotent_tools, retry_delay=0), calls
+
+
+async def run_job(queue, tool_name, arguments=None, key=None):
+    job = await queue.submit(tool_name, arguments or {}, "token", "owner", key)
+    job = await queue.wait(job["job_id"], timeout=5)
+    await queue.stop()
+    return job
+
+
+def test_timeout_is_not_retried_for_non_idempotent_write():
+    queue, calls = make_queue([{"success": False, "error": "Request timeout", "status_code": 504}])
+    job = asyncio.run(run_job(queue, "comment_on_video"))
+    assert job["status"] == "failed"
+    assert calls == ["comment_on_video"]
+
+
+def test_timeout_is_retried_for_idempotent_write():
+    queue, calls = make_queue(
+        [{"success": False, "error": "Request timeout", "status_code": 504}, {"success": True, "data": {}}],
+        idempotent_tools={"like_video"}
+    )
+    job = asyncio.run(run_job(queue, "like_video"))
+    assert job["status"] == "succeeded"
+    assert len(calls) == 2
+
+
+def test_rate_limit_is_retried_for_any_write():
+    queue, calls = make_queue([{"success": False, "error": "Rate limited", "status_code": 429}, {"success": True, "data": {}}])
+    job = asyncio.run(run_job(queue, "create_playlist"))
+    assert job["status"] == "succeeded"
+    assert len(calls) == 2
+
+
+def test_idempotency_key_reuse():
+    async def scenario():
+        queue, calls = make_queue([{"success": True, "data": {"id": "c1"}}])
+        first = await queue.submit("comment_on_video", {"video_id": "v", "text": "hi"}, "token", "owner", "k1")
+        again = await queue.submit("comment_on_video", {"text": "hi", "video_id": "v"}, "token", "owner", "k1")
+        assert again["job_id"] == first["job_id"]
+        with pytest.raises(IdempotencyConflict):
+            await queue.submit("comment_on_video", {"video_id": "v", "text": "other"}, "token", "owner", "k1")
+        # Keys are scoped per user
+        other = await queue.submit("comment_on_video", {"video_id": "v", "text": "other"}, "token", "someone", "k1")
+        assert other["job_id"] != first["job_id"]
+        await queue.wait(first["job_id"], timeout=5)
+        await queue.wait(other["job_id"], timeout=5)
+        await queue.stop()
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import mcp_server
+from mcp_server import run_tool, tool_cache, yt
+
+
+def test_partial_results_are_not_cached(monkeypatch):
+    calls = []
+
+    async def search_videos(**kwargs):
+        calls.append(kwargs)
+        return {"items": [], "partial": len(calls) == 1}
+
+    monkeypatch.setattr(yt, "search_videos", search_videos)
+
+    async def scenario():
+        first = await run_tool("search_videos", {"query": "partial test"}, None)
+        second = await run_tool("search_videos", {"query": "partial test"}, None)
+        third = await run_tool("search_videos", {"query": "partial test"}, None)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first["data"]["partial"] and "cached" not in first
+    assert "cached" not in second
+    assert third.get("cached") is True
+    assert len(calls) == 2
+
+
+def test_failed_fanout_branches_are_not_cached(monkeypatch):
+    async def trending_videos_multi(**kwargs):
+        return {"items": [], "failed": {"GB": "quota"}, "partial": True}
+
+    monkeypatch.setattr(yt, "trending_videos_multi", trending_videos_multi)
+    asyncio.run(run_tool("trending_videos_multi", {"region_codes": ["US", "GB"]}, None))
+    assert asyncio.run(tool_cache.get("trending_videos_multi", {"region_codes": ["US", "GB"]}, None)) is None
+    assert mcp_server._degraded({"items": [], "failed": {}}) is False
+
+
+def test_idempotent_write_wait_respects_deadline(monkeypatch):
+    async def like_video(token, video_id):
+        await asyncio.sleep(0.3)
+        return {"rating": "like"}
+
+    monkeypatch.setattr(yt, "like_video", like_video)
+
+    async def scenario():
+        started = time.monotonic()
+        result = await mcp_server.execute_with_token(
+            "like_video", {"video_id": "v1"}, "token", idempotency_key="deadline-test", deadline=0.05
+        )
+        elapsed = time.monotonic() - started
+        job = await mcp_server.job_queue.wait(result["job"]["job_id"], timeout=5)
+        await mcp_server.job_queue.stop()
+        return result, elapsed, job
+
+    result, elapsed, job = asyncio.run(scenario())
+    assert result["async"] is True and result["status_url"].startswith("/mcp/jobs/")
+    assert elapsed < 0.2
+    assert job["status"] == "succeeded"
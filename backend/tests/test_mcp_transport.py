@@ -0,0 +1,69 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+
+import mcp_transport
+from mcp_transport import MCPSession, handle_message
+from youtube_tools import yt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_streaming_tool_is_capped_on_tools_call(monkeypatch):
+    async def public_get(endpoint, params):
+        threads = [
+            {"id": f"t{i}", "snippet": {"topLevelComment": {"id": f"t{i}", "snippet": {}}, "totalReplyCount": 0}}
+            for i in range(10)
+        ]
+        return {"items": threads, "nextPageToken": "next"}
+
+    monkeypatch.setattr(yt, "public_get", public_get)
+    monkeypatch.setenv("MCP_MAX_COMMENTS", "3")
+
+    def call(arguments):
+        message = {
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "export_comments", "arguments": arguments}
+        }
+        response = asyncio.run(handle_message(message, MCPSession(), lambda m: None))
+        return response["result"]["structuredContent"]["data"]
+
+    unbounded = call({"video_id": "v1"})
+    assert [r["type"] for r in unbounded] == ["comment"] * 3 + ["end"]
+    assert unbounded[-1]["truncated"] and unbounded[-1]["cursor"] == "|3"
+
+    # A smaller limit from the client is kept; a larger one is capped
+    assert len(call({"video_id": "v1", "max_comments": 2})) == 3
+    assert len(call({"video_id": "v1", "max_comments": 50})) == 4
+
+
+def test_stdio_entry_point_loads_dotenv_before_settings(tmp_path):
+    # Run a copy of the script as __main__ so load_dotenv() finds the .env beside it
+    script = tmp_path / "mcp_transport.py"
+    shutil.copy(os.path.join(BACKEND_DIR, "mcp_transport.py"), script)
+    (tmp_path / ".env").write_text("TOOL_DEADLINE_SECONDS=7\n")
+    env = {k: v for k, v in os.environ.items() if k != "TOOL_DEADLINE_SECONDS"}
+    env["PYTHONPATH"] = BACKEND_DIR
+    runner = (
+        "import runpy, sys; runpy.run_path(sys.argv[1], run_name='__main__'); "
+        "import deadlines; print(deadlines.DEFAULT_TOOL_DEADLINE, file=sys.stderr)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", runner, str(script)],
+        cwd=tmp_path, env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True
+    )
+    assert output.stdout == ""
+    assert output.stderr.strip().splitlines()[-1] == "7.0"
+
+
+def test_importing_the_transport_has_no_side_effects(tmp_path):
+    (tmp_path / ".env").write_text("TOOL_DEADLINE_SECONDS=7\n")
+    env = {k: v for k, v in os.environ.items() if k != "TOOL_DEADLINE_SECONDS"}
+    env["PYTHONPATH"] = BACKEND_DIR
+    output = subprocess.run(
+        [sys.executable, "-c", "import mcp_transport, sys; print('mcp_server' in sys.modules, 'TOOL_DEADLINE_SECONDS' in __import__('os').environ)"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "False False"
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from search_index import normalize_query, search_index
+from youtube_tools import yt
+
+
+def test_normalize_query_is_order_and_case_insensitive():
+    assert normalize_query("Python Tutorials for Beginners") == normalize_query("beginner python tutorial")
+
+
+@pytest.mark.parametrize("first,second", [
+    ("日本 料理", "한국 음식"),
+    ("🎸🔥", "🍕"),
+    ("the and of", "to be or not"),
+])
+def test_queries_without_index_terms_keep_distinct_keys(first, second):
+    assert normalize_query(first) and normalize_query(second)
+    assert normalize_query(first) != normalize_query(second)
+    assert normalize_query("  日本   料理 ") == normalize_query("日本 料理")
+
+
+def test_blank_query_has_no_key():
+    assert normalize_query("   ") == ""
+
+
+def test_non_latin_searches_do_not_share_a_memo_entry(monkeypatch):
+    calls = []
+
+    async def search_list(query, max_results, order, region_code, token, page_token=None):
+        calls.append(query)
+        return {"items": [
+            {"id": {"videoId": f"{len(calls)}-{i}"}, "snippet": {"title": query}}
+            for i in range(max_results)
+        ]}
+
+    async def enrich(items, token):
+        for item in items:
+            search_index.add_video(item)
+
+    monkeypatch.setattr(yt, "_search_list", search_list)
+    monkeypatch.setattr(yt, "_enrich_with_details", enrich)
+
+    async def scenario():
+        first = await yt.search_videos("日本 料理", max_results=3, mode="index")
+        second = await yt.search_videos("🎸🔥", max_results=3, mode="index")
+        again = await yt.search_videos("日本 料理", max_results=3, mode="index")
+        return first, second, again
+
+    first, second, again = asyncio.run(scenario())
+    assert calls == ["日本 料理", "🎸🔥"]
+    assert second["source"] == "upstream"
+    assert second["items"][0]["snippet"]["title"] == "🎸🔥"
+    assert again["source"] == "index"
+    assert [item["id"]["videoId"] for item in again["items"]] == ["1-0", "1-1", "1-2"]
+
+
+def test_private_videos_fetched_with_a_token_are_not_indexed(monkeypatch):
+    def video(video_id, privacy):
+        return {
+            "id": video_id,
+            "snippet": {"title": "quarterly roadmap walkthrough"},
+            "status": {"privacyStatus": privacy},
+        }
+
+    async def public_get_oauth(endpoint, params, token):
+        return {"items": [video("privateVid1", "private"), video("unlistedVid", "unlisted"), video("publicVid01", "public")]}
+
+    monkeypatch.setattr(yt, "public_get_oauth", public_get_oauth)
+    asyncio.run(yt.video_details("privateVid1,unlistedVid,publicVid01", token="owner-token"))
+
+    hits = [hit["item"]["id"]["videoId"] for hit in search_index.search("quarterly roadmap walkthrough", kind="video")]
+    assert hits == ["publicVid01"]
+
+    # A video that was public and is now private drops out
+    search_index.add_video(video("publicVid01", "private"))
+    assert search_index.search("quarterly roadmap walkthrough", kind="video") == []
@@ -0,0 +1,14 @@
+from sessions import SessionStore
+
+DATA = {"items": [{"id": {"videoId": f"v{i}"}} for i in range(3)]}
+
+
+def test_identities_sharing_a_session_id_get_separate_sessions():
+    store = SessionStore()
+    for owner in ("alice", "bob", None):
+        store.record("default", owner, "search_videos", {"query": owner or "anon"}, DATA, shown=1)
+
+    assert store.latest("default", "alice").arguments == {"query": "alice"}
+    assert store.latest("default", "bob").arguments == {"query": "bob"}
+    assert store.latest("default", None).arguments == {"query": "anon"}
+    assert store.latest("default", "carol") is None
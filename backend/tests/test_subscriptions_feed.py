@@ -0,0 +1,119 @@
+import asyncio
+
+from records import PlaylistItemRecord
+from youtube_tools import YouTubeClient
+
+MISSING = {f"UCmissing{i}" for i in range(5)}
+NO_UPLOADS = {f"UCempty{i}" for i in range(3)}
+CHANNELS = [f"UCchannel{i}" for i in range(112)] + sorted(MISSING) + sorted(NO_UPLOADS)
+
+
+def fake_client():
+    client = YouTubeClient()
+    state = {"channels_calls": [], "playlists": [], "active": 0, "max_active": 0}
+
+    async def my_subscriptions(token, max_results, page_token=None):
+        start = int(page_token or 0)
+        items = [
+            {"snippet": {"resourceId": {"channelId": cid}}}
+            for cid in CHANNELS[start:start + max_results]
+        ]
+        end = start + max_results
+        return {"items": items, "nextPageToken": str(end) if end < len(CHANNELS) else None}
+
+    async def public_get(endpoint, params):
+        if endpoint == "channels":
+            ids = params["id"].split(",")
+            state["channels_calls"].append(ids)
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return {"items": [
+                {"id": cid, "contentDetails": {"relatedPlaylists": {} if cid in NO_UPLOADS else {"uploads": "UU" + cid[2:]}}}
+                for cid in ids if cid not in MISSING
+            ]}
+        state["playlists"].append(params["playlistId"])
+        return {"items": [{
+            "snippet": {"title": params["playlistId"], "resourceId": {"videoId": params["playlistId"][-11:]}},
+            "contentDetails": {"videoPublishedAt": "2024-01-01T00:00:00Z"}
+        }]}
+
+    async def enrich(items, token):
+        pass
+
+    client.my_subscriptions = my_subscriptions
+    client.public_get = public_get
+    client._enrich_with_details = enrich
+    return client, state
+
+
+def test_uploads_playlists_resolve_in_concurrent_batches():
+    client, state = fake_client()
+    feed = asyncio.run(client.subscriptions_feed("token", max_results=5))
+
+    assert feed["channels_scanned"] == 112
+    assert len(state["channels_calls"]) == 3
+    assert state["max_active"] > 1
+    assert not MISSING & set(state["playlists"])
+
+
+def test_channels_without_uploads_are_negative_cached():
+    client, state = fake_client()
+    asyncio.run(client.subscriptions_feed("token", max_results=5))
+    state["channels_calls"].clear()
+
+    asyncio.run(client.subscriptions_feed("token", max_results=5))
+    assert state["channels_calls"] == []
+    assert asyncio.run(client.uploads_playlist_id("UCmissing0")) is None
+    assert asyncio.run(client.uploads_playlist_id("UCempty0")) is None
+    assert state["channels_calls"] == []
+
+
+def test_uploads_pages_are_cached_as_records():
+    client = YouTubeClient()
+    calls = []
+
+    async def public_get(endpoint, params):
+        calls.append(params["playlistId"])
+        return {"items": [
+            {
+                "id": "item1",
+                "snippet": {
+                    "title": "New upload",
+                    "description": "About it",
+                    "thumbnails": {"high": {"url": "https://i.ytimg.com/vi/abc/hq.jpg"}},
+                    "videoOwnerChannelId": "UCowner",
+                    "videoOwnerChannelTitle": "Owner",
+                    "resourceId": {"videoId": "abcdefghijk"},
+                },
+                "contentDetails": {"videoId": "abcdefghijk", "videoPublishedAt": "2024-05-01T12:00:00Z"},
+            },
+            # Private uploads have no publish date
+            {"id": "item2", "snippet": {"title": "Private video"}, "contentDetails": {"videoId": "privateVid1"}},
+        ], "nextPageToken": "next"}
+
+    client.public_get = public_get
+
+    async def scenario():
+        first, token = await client.uploads_page("UUowner", 10)
+        first[0]["statistics"] = {"viewCount": "1"}
+        again, _ = await client.uploads_page("UUowner", 10)
+        return first, token, again
+
+    first, token, again = asyncio.run(scenario())
+    assert calls == ["UUowner"] and token == "next"
+    assert again == [{
+        "kind": "youtube#searchResult",
+        "id": {"kind": "youtube#video", "videoId": "abcdefghijk"},
+        "snippet": {
+            "title": "New upload",
+            "description": "About it",
+            "channelId": "UCowner",
+            "channelTitle": "Owner",
+            "publishedAt": "2024-05-01T12:00:00Z",
+            "thumbnails": {"high": {"url": "https://i.ytimg.com/vi/abc/hq.jpg"}},
+        },
+    }]
+    records, _ = client.uploads_page_cache.get(("UUowner", 10, None))
+    assert all(isinstance(record, PlaylistItemRecord) for record in records)
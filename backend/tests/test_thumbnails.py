@@ -0,0 +1,251 @@
+import asyncio
+import io
+import os
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+from PIL import Image
+
+from thumbnails import ThumbnailCache, ThumbnailError, MAX_IMAGE_BYTES
+
+
+def png(width: int, height: int, color) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+class FakeOrigin(BaseHTTPRequestHandler):
+    """Local stand-in for the YouTube image CDN"""
+
+    hits: Counter = Counter()
+
+    def do_GET(self):
+        FakeOrigin.hits[self.path] += 1
+        if self.path.startswith("/slow/"):
+            time.sleep(0.2)
+        if self.path == "/missing.jpg":
+            return self.reply(404, b"", "text/plain")
+        if self.path == "/page.html":
+            return self.reply(200, b"<html></html>", "text/html")
+        if self.path == "/garbage.jpg":
+            return self.reply(200, b"not really a jpeg", "image/jpeg")
+        if self.path == "/huge.jpg":
+            # No Content-Length: the size is only known while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.end_headers()
+            chunk = b"x" * 65536
+            try:
+                for _ in range(MAX_IMAGE_BYTES // len(chunk) + 8):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        if self.path.startswith("/same/"):
+            return self.reply(200, png(64, 36, (10, 20, 30)), "image/png")
+        shade = sum(self.path.encode()) % 256
+        return self.reply(200, png(800, 450, (shade, 0, 0)), "image/png")
+
+    def reply(self, status, body, media_type):
+        self.send_response(status)
+        self.send_header("Content-Type", media_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOrigin)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(max_bytes=10 * 1024 * 1024, directory=None):
+        return ThumbnailCache(
+            directory=str(directory or tmp_path / "thumbs"),
+            max_bytes=max_bytes,
+            allowed_hosts={"127.0.0.1"},
+            scheme="http"
+        )
+    return make
+
+
+def run(cache, coro):
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await cache.aclose()
+    return asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_fetch(origin, make_cache):
+    cache = make_cache()
+    url = f"{origin}/slow/a.png"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get(url) for _ in range(10)))
+
+    results = run(cache, scenario())
+    assert FakeOrigin.hits["/slow/a.png"] == 1
+    assert len({path for path, _, _ in results}) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_identical_images_are_stored_once(origin, make_cache):
+    cache = make_cache()
+
+    async def scenario():
+        first = await cache.get(f"{origin}/same/1.png")
+        second = await cache.get(f"{origin}/same/2.png")
+        return first, second
+
+    first, second = run(cache, scenario())
+    assert first[2] == second[2]
+    assert cache.stats()["images"] == 2 and cache.stats()["objects"] == 1
+
+
+def test_lru_eviction_by_size_and_restart(origin, make_cache, tmp_path):
+    cache = make_cache()
+
+    async def scenario():
+        await cache.get(f"{origin}/lru/a.png")
+        # Room for two of these images but not three
+        cache.max_bytes = int(cache.total_bytes * 2.5)
+        await cache.get(f"{origin}/lru/b.png")
+        await cache.get(f"{origin}/lru/a.png")
+        await cache.get(f"{origin}/lru/c.png")
+
+    run(cache, scenario())
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["images"] == 2
+    objects = [f for _, _, files in os.walk(tmp_path / "thumbs" / "objects") for f in files]
+    assert len(objects) == 2
+
+    # A new instance rebuilds the index from disk: a and c are hits, b was evicted
+    restarted = make_cache(max_bytes=cache.max_bytes)
+    fetched = FakeOrigin.hits["/lru/a.png"]
+    run(restarted, restarted.get(f"{origin}/lru/a.png"))
+    assert FakeOrigin.hits["/lru/a.png"] == fetched
+    assert restarted.stats()["hits"] == 1
+
+
+def test_pinned_object_outlives_eviction_until_released(origin, make_cache):
+    cache = make_cache()
+
+    async def scenario():
+        path, _, digest = await cache.get(f"{origin}/pin/a.png", pin=True)
+        cache.max_bytes = int(cache.total_bytes * 1.5)
+        await cache.get(f"{origin}/pin/b.png")
+        evicted = cache.stats()["evictions"] == 1 and os.path.exists(path)
+        await cache.release(digest)
+        return path, evicted
+
+    path, evicted = run(cache, scenario())
+    assert evicted
+    assert not os.path.exists(path)
+    assert cache.stats()["pinned"] == 0
+
+
+def test_image_evicted_before_its_requester_resumes_is_fetched_again(origin, make_cache):
+    cache = make_cache()
+    fill = cache._fill
+    evicted = []
+
+    async def fill_then_evict(key, url, width):
+        result = await fill(key, url, width)
+        if not evicted:
+            # What a concurrent request's fill can do before this one resumes
+            evicted.append(key)
+            cache._remove(cache._unlink(key))
+        return result
+
+    cache._fill = fill_then_evict
+    path, _, _ = run(cache, cache.get(f"{origin}/raced.png"))
+    assert os.path.exists(path)
+    assert FakeOrigin.hits["/raced.png"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_resized_variant(origin, make_cache):
+    cache = make_cache()
+    path, media_type, _ = run(cache, cache.get(f"{origin}/resize.png", width=300))
+    with Image.open(path) as image:
+        assert image.width == 320 and media_type == "image/jpeg"
+
+
+def test_undecodable_image_is_served_unresized(origin, make_cache):
+    cache = make_cache()
+    path, media_type, _ = run(cache, cache.get(f"{origin}/garbage.jpg", width=240))
+    assert media_type == "image/jpeg"
+    with open(path, "rb") as f:
+        assert f.read() == b"not really a jpeg"
+
+
+@pytest.mark.parametrize("path,status", [
+    ("/missing.jpg", 404),
+    ("/page.html", 502),
+    ("/huge.jpg", 502),
+])
+def test_upstream_errors(origin, make_cache, path, status):
+    cache = make_cache()
+    with pytest.raises(ThumbnailError) as error:
+        run(cache, cache.get(origin + path))
+    assert error.value.status_code == status
+
+
+@pytest.mark.parametrize("url", [
+    "https://evil.example.com/x.jpg",
+    "http://localhost/x.jpg",
+    "http://user@127.0.0.1/x.jpg",
+    "file:///etc/passwd",
+])
+def test_only_allowed_hosts_are_proxied(make_cache, url):
+    cache = make_cache()
+    with pytest.raises(ThumbnailError) as error:
+        run(cache, cache.get(url))
+    assert error.value.status_code == 400
+
+
+def test_disk_errors_become_502(origin, make_cache, tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    cache = make_cache(directory=blocker)
+    with pytest.raises(ThumbnailError) as error:
+        run(cache, cache.get(f"{origin}/disk.png"))
+    assert error.value.status_code == 502
+
+
+def test_endpoint_serves_ranges_and_etags(origin, make_cache, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, "thumbnail_cache", make_cache())
+    url = f"{origin}/endpoint.png"
+    with TestClient(main.app) as client:
+        full = client.get("/thumbnails", params={"url": url})
+        assert full.status_code == 200
+        assert "immutable" in full.headers["cache-control"]
+
+        partial = client.get("/thumbnails", params={"url": url}, headers={"Range": "bytes=0-99"})
+        assert partial.status_code == 206
+        assert partial.content == full.content[:100]
+
+        cached = client.get("/thumbnails", params={"url": url}, headers={"If-None-Match": full.headers["etag"]})
+        assert cached.status_code == 304
+
+        assert client.get("/thumbnails", params={"url": "https://evil.example.com/x.jpg"}).status_code == 400
+        assert main.thumbnail_cache.stats()["pinned"] == 0
+    assert FakeOrigin.hits["/endpoint.png"] == 1
@@ -0,0 +1,147 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from tool_cache import ToolResultCache, RedisTier
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+VIDEO_ARGS = {"video_id": "v1"}
+RESULT = {"items": [{"id": "v1", "statistics": {"viewCount": "10"}}]}
+
+
+def two_workers():
+    """Two caches sharing one in-process fake Redis, like two uvicorn workers"""
+    server = fakeredis.FakeServer()
+    return [
+        ToolResultCache(shared=RedisTier(fakeredis.aioredis.FakeRedis(server=server), prefix="test:"))
+        for _ in range(2)
+    ]
+
+
+async def settle(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_shared_tier_serves_other_workers():
+    async def scenario():
+        a, b = two_workers()
+        await a.put("video_details", VIDEO_ARGS, None, RESULT)
+        shared_hit = await b.get("video_details", VIDEO_ARGS, None)
+        # The hit is now in b's own L1 as well
+        local_hit = b.store.get(ToolResultCache.key("video_details", VIDEO_ARGS, None))
+        return shared_hit, local_hit
+
+    shared_hit, local_hit = asyncio.run(scenario())
+    assert shared_hit == RESULT
+    assert local_hit == RESULT
+
+
+def test_write_invalidates_shared_tier_by_tag():
+    async def scenario():
+        a, b = two_workers()
+        await a.put("video_details", VIDEO_ARGS, None, RESULT)
+        await a.put("video_details", {"video_id": "v2"}, None, RESULT)
+        tags = await a.invalidate_write("like_video", VIDEO_ARGS, "token")
+        b_v1 = await b.get("video_details", VIDEO_ARGS, None)
+        b_v2 = await b.get("video_details", {"video_id": "v2"}, None)
+        return tags, b_v1, b_v2
+
+    tags, b_v1, b_v2 = asyncio.run(scenario())
+    assert "video:v1" in tags
+    assert b_v1 is None
+    assert b_v2 == RESULT
+
+
+def test_invalidation_reaches_other_workers_l1():
+    async def scenario():
+        a, b = two_workers()
+        await a.start()
+        await b.start()
+        await asyncio.sleep(0.05)
+
+        await a.put("video_details", VIDEO_ARGS, None, RESULT)
+        assert await b.get("video_details", VIDEO_ARGS, None) == RESULT
+        key = ToolResultCache.key("video_details", VIDEO_ARGS, None)
+
+        await a.invalidate_write("like_video", VIDEO_ARGS, "token")
+        await settle(lambda: b.store.get(key) is None)
+        evicted = b.store.get(key) is None
+
+        await a.stop()
+        await b.stop()
+        return evicted
+
+    assert asyncio.run(scenario())
+
+
+_real_sleep = asyncio.sleep
+
+
+async def _no_sleep(delay, *args):
+    await _real_sleep(0)
+
+
+class FlakyPubSub:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.closed = False
+
+    async def subscribe(self, channel):
+        if self.fail:
+            raise ConnectionError("connection reset")
+
+    async def listen(self):
+        await asyncio.Event().wait()
+        yield {}
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FlakyClient:
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FlakyPubSub(fail=not self.pubsubs)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def aclose(self):
+        pass
+
+
+def test_listener_closes_pubsub_before_reconnecting(monkeypatch):
+    monkeypatch.setattr("tool_cache.asyncio.sleep", _no_sleep)
+
+    async def scenario():
+        client = FlakyClient()
+        tier = RedisTier(client, prefix="test:")
+        tier.start(lambda tags: None)
+        await settle(lambda: len(client.pubsubs) >= 2)
+        await tier.close()
+        return client.pubsubs
+
+    pubsubs = asyncio.run(scenario())
+    assert len(pubsubs) == 2
+    assert all(p.closed for p in pubsubs)
+
+
+def test_token_backed_reads_are_not_shared_with_other_callers():
+    async def scenario():
+        cache = ToolResultCache()
+        private = {"items": [{"id": "v1", "snippet": {"title": "private draft"}}]}
+        await cache.put("video_details", VIDEO_ARGS, "owner-token", private)
+        return (
+            await cache.get("video_details", VIDEO_ARGS, None),
+            await cache.get("video_details", VIDEO_ARGS, "other-token"),
+            await cache.get("video_details", VIDEO_ARGS, "owner-token"),
+        )
+
+    anonymous, other, owner = asyncio.run(scenario())
+    assert anonymous is None and other is None
+    assert owner["items"][0]["snippet"]["title"] == "private draft"
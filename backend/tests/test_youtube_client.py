@@ -0,0 +1,44 @@
+import asyncio
+
+import httpx
+import pytest
+
+from youtube_tools import YouTubeAPIError, YouTubeClient
+
+
+def timing_out_client():
+    """A client whose every request times out; records what was sent"""
+    sent = []
+
+    def handler(request):
+        sent.append((request.method, request.url.path.rsplit("/v3/", 1)[-1]))
+        raise httpx.ReadTimeout("read timed out", request=request)
+
+    client = YouTubeClient()
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, sent
+
+
+@pytest.mark.parametrize("call", [
+    lambda yt: yt.comment("token", "v1", "hello"),
+    lambda yt: yt.create_playlist("token", "Mix"),
+    lambda yt: yt.subscribe("token", "UCchannel"),
+])
+def test_inserts_are_not_resent_after_a_timeout(call):
+    client, sent = timing_out_client()
+    with pytest.raises(YouTubeAPIError) as error:
+        asyncio.run(call(client))
+    assert len(sent) == 1
+    assert error.value.status_code == 504
+
+
+@pytest.mark.parametrize("call,method", [
+    (lambda yt: yt.public_get("videos", {"id": "v1"}), "GET"),
+    (lambda yt: yt.like_video("token", "v1"), "POST"),
+    (lambda yt: yt.unsubscribe("token", "sub1"), "DELETE"),
+])
+def test_idempotent_requests_are_retried_after_a_timeout(call, method):
+    client, sent = timing_out_client()
+    with pytest.raises(YouTubeAPIError):
+        asyncio.run(call(client))
+    assert len(sent) == 3 and {m for m, _ in sent} == {method}
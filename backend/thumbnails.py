@@ -0,0 +1,358 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import secrets
+import tempfile
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR") or os.path.join(tempfile.gettempdir(), "yt-thumbnails")
+THUMBNAIL_CACHE_MB = float(os.getenv("THUMBNAIL_CACHE_MB", "256"))
+
+# Only YouTube's image hosts are proxied; anything else is refused
+ALLOWED_HOSTS = ("i.ytimg.com", "i9.ytimg.com", "yt3.ggpht.com", "yt3.googleusercontent.com")
+
+# Resized variants are rounded up to one of these widths, so the cache
+# holds a handful of sizes per image instead of one per requested width
+VARIANT_WIDTHS = (120, 240, 320, 480, 640)
+
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+FETCH_TIMEOUT = 10
+# A fresh image can be evicted by a concurrent fill before its requester
+# resumes; it is fetched again at most this many times
+FILL_ATTEMPTS = 3
+
+
+class ThumbnailError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def variant_width(width: Optional[int]) -> Optional[int]:
+    """Nearest variant at least ``width`` wide; None serves the original"""
+    if not width or width <= 0:
+        return None
+    for candidate in VARIANT_WIDTHS:
+        if candidate >= width:
+            return candidate
+    return None
+
+
+def _resize(data: bytes, width: int) -> Optional[bytes]:
+    """
+    JPEG ``width`` pixels wide, or None (serve the original) without
+    Pillow, when the image is already smaller, or when it cannot be decoded
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= width:
+                return None
+            height = max(1, round(image.height * width / image.width))
+            resized = image.convert("RGB").resize((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format="JPEG", quality=85, optimize=True)
+            return out.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # UnidentifiedImageError is an OSError
+        logger.warning("Serving thumbnail unresized: %s", e)
+        return None
+
+
+class ThumbnailCache:
+    """
+    Proxy cache for thumbnails, stored on disk by content.
+
+    Image bytes live under ``objects/<sha256>`` so identical images (the
+    same thumbnail reached through different URLs) are stored once. A
+    ``refs/<key>`` file maps each source URL and width to its object and
+    lets the index be rebuilt after a restart. Refs are evicted least
+    recently used first once objects exceed ``max_bytes``; an object is
+    deleted when no ref points at it any more, or once the last response
+    that pinned it has released it.
+    """
+
+    def __init__(
+        self,
+        directory: str = THUMBNAIL_DIR,
+        max_bytes: int = int(THUMBNAIL_CACHE_MB * 1024 * 1024),
+        allowed_hosts: Iterable[str] = ALLOWED_HOSTS,
+        scheme: str = "https"
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.allowed_hosts = set(allowed_hosts)
+        self.scheme = scheme
+        # ref key -> (digest, media type), least recently used first
+        self._refs: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        # digest -> [size, refcount]
+        self._objects: Dict[str, list] = {}
+        self.total_bytes = 0
+        # digest -> responses still reading the file
+        self._pins: Dict[str, int] = {}
+        # Unreferenced objects kept on disk until their pins are released
+        self._doomed: set = set()
+        self._fetching: Dict[str, asyncio.Task] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=FETCH_TIMEOUT,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ------------------------------------------------------------
+    # DISK LAYOUT
+    # ------------------------------------------------------------
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.directory, "refs", key)
+
+    def _scan(self) -> List[Tuple[str, str, str, int]]:
+        """Refs on disk with their object sizes, oldest first"""
+        refs_dir = os.path.join(self.directory, "refs")
+        os.makedirs(refs_dir, exist_ok=True)
+        entries = []
+        for key in os.listdir(refs_dir):
+            path = os.path.join(refs_dir, key)
+            try:
+                with open(path) as f:
+                    digest, media_type = f.read().split()
+                mtime = os.stat(path).st_mtime
+                size = os.stat(self._object_path(digest)).st_size
+            except (OSError, ValueError):
+                continue
+            entries.append((mtime, key, digest, media_type, size))
+        return [entry[1:] for entry in sorted(entries)]
+
+    def _write(self, key: str, data: bytes, media_type: str) -> str:
+        """Write the object (unless already stored) and its ref; returns the digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{secrets.token_hex(4)}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with open(self._ref_path(key), "w") as f:
+            f.write(f"{digest} {media_type}")
+        return digest
+
+    @staticmethod
+    def _remove(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # The index below is only touched from the event loop; files are
+    # written and removed in worker threads.
+
+    def _link(self, key: str, digest: str, media_type: str, size: int) -> List[str]:
+        """Point ``key`` at an object; returns object files no longer referenced"""
+        entry = self._objects.get(digest)
+        if entry is None:
+            entry = self._objects[digest] = [size, 0]
+            self.total_bytes += size
+            self._doomed.discard(digest)
+        entry[1] += 1
+        garbage = self._unlink(key) if key in self._refs else []
+        self._refs[key] = (digest, media_type)
+        return garbage
+
+    def _unlink(self, key: str) -> List[str]:
+        digest, _ = self._refs.pop(key)
+        entry = self._objects[digest]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return []
+        del self._objects[digest]
+        self.total_bytes -= entry[0]
+        if digest in self._pins:
+            self._doomed.add(digest)
+            return []
+        return [self._object_path(digest)]
+
+    def _evict(self, keep: str) -> List[str]:
+        """Drop least recently used refs until under max_bytes; returns files to delete"""
+        garbage = []
+        while self.total_bytes > self.max_bytes and len(self._refs) > 1:
+            key = next(iter(self._refs))
+            if key == keep:
+                self._refs.move_to_end(key)
+                continue
+            garbage.append(self._ref_path(key))
+            garbage.extend(self._unlink(key))
+            self.evictions += 1
+        return garbage
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self._scan))
+        try:
+            entries = await asyncio.shield(self._loading)
+        except OSError as e:
+            # Let the next request retry the scan
+            self._loading = None
+            logger.warning("Thumbnail cache directory unavailable: %s", e)
+            raise ThumbnailError("Thumbnail cache unavailable", 502)
+        if not self._loaded:
+            for key, digest, media_type, size in entries:
+                self._link(key, digest, media_type, size)
+            self._loaded = True
+
+    # ------------------------------------------------------------
+    # LOOKUP
+    # ------------------------------------------------------------
+
+    def validate(self, url: str) -> str:
+        parts = urlsplit(url or "")
+        if parts.scheme != self.scheme or parts.hostname not in self.allowed_hosts or parts.username:
+            raise ThumbnailError("Only YouTube thumbnail URLs can be proxied", 400)
+        return url
+
+    async def _download(self, url: str) -> Tuple[bytes, str]:
+        """The image body, read as a stream and abandoned once it passes MAX_IMAGE_BYTES"""
+        try:
+            async with self._get_http().stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ThumbnailError(
+                        f"Upstream returned {response.status_code}",
+                        404 if response.status_code == 404 else 502
+                    )
+                media_type = response.headers.get("content-type", "").split(";")[0].strip()
+                if not media_type.startswith("image/"):
+                    raise ThumbnailError("Upstream did not return an image", 502)
+                if int(response.headers.get("content-length") or 0) > MAX_IMAGE_BYTES:
+                    raise ThumbnailError("Image too large", 502)
+
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > MAX_IMAGE_BYTES:
+                        raise ThumbnailError("Image too large", 502)
+                    chunks.append(chunk)
+                return b"".join(chunks), media_type
+        except httpx.HTTPError as e:
+            logger.warning("Thumbnail fetch failed for %s: %s", url, e)
+            raise ThumbnailError("Upstream unavailable", 502)
+
+    async def _fetch(self, url: str, width: Optional[int]) -> Tuple[bytes, str]:
+        data, media_type = await self._download(url)
+        if width is not None:
+            resized = await asyncio.to_thread(_resize, data, width)
+            if resized is not None:
+                return resized, "image/jpeg"
+        return data, media_type
+
+    async def get(self, url: str, width: Optional[int] = None, pin: bool = False) -> Tuple[str, str, str]:
+        """
+        Local path, media type and digest of the image at ``url``, fetched
+        once and then served from disk. Concurrent misses for the same
+        image share one upstream fetch. With ``pin`` the file stays on disk,
+        even if evicted meanwhile, until ``release(digest)`` is awaited.
+        """
+        self.validate(url)
+        width = variant_width(width)
+        key = hashlib.sha256(f"{url}|{width or ''}".encode()).hexdigest()
+
+        await self._ensure_loaded()
+
+        filled = False
+        for _ in range(FILL_ATTEMPTS):
+            ref = self._refs.get(key)
+            if ref is not None:
+                digest, media_type = ref
+                path = self._object_path(digest)
+                if os.path.exists(path):
+                    self._refs.move_to_end(key)
+                    if not filled:
+                        self.hits += 1
+                    if pin:
+                        self._pins[digest] = self._pins.get(digest, 0) + 1
+                    return path, media_type, digest
+
+            task = self._fetching.get(key)
+            if task is None:
+                self.misses += 1
+                task = asyncio.ensure_future(self._fill(key, url, width))
+                self._fetching[key] = task
+                task.add_done_callback(lambda _: self._fetching.pop(key, None))
+            # Another request's fill may evict this image before we resume,
+            # so look it up again rather than trusting the fill's result
+            await asyncio.shield(task)
+            filled = True
+        raise ThumbnailError("Thumbnail cache is too busy", 503)
+
+    async def release(self, digest: str) -> None:
+        """Drop a pin taken by ``get``; deletes the file if it was evicted meanwhile"""
+        count = self._pins.get(digest, 0) - 1
+        if count > 0:
+            self._pins[digest] = count
+            return
+        self._pins.pop(digest, None)
+        if digest in self._doomed:
+            self._doomed.discard(digest)
+            await asyncio.to_thread(self._remove, [self._object_path(digest)])
+
+    async def _fill(self, key: str, url: str, width: Optional[int]) -> Tuple[str, str, str]:
+        data, media_type = await self._fetch(url, width)
+        try:
+            digest = await asyncio.to_thread(self._write, key, data, media_type)
+        except OSError as e:
+            logger.warning("Thumbnail cache write failed: %s", e)
+            raise ThumbnailError("Thumbnail cache unavailable", 502)
+        garbage = self._link(key, digest, media_type, len(data)) + self._evict(keep=key)
+        if garbage:
+            await asyncio.to_thread(self._remove, garbage)
+        return self._object_path(digest), media_type, digest
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "images": len(self._refs),
+            "objects": len(self._objects),
+            "bytes": self.total_bytes,
+            "pinned": len(self._pins),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+thumbnail_cache = ThumbnailCache()
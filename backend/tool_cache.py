@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Optional, Dict, Any, List, Callable
+
+from cache import ByteBudgetCache
+from youtube_tools import token_identity
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Shared tier across uvicorn workers; disabled when unset
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_PREFIX = os.getenv("REDIS_CACHE_PREFIX", "ytmcp:")
+
+# Read-only tools whose results are cached, with their TTL in seconds
+CACHE_TTLS = {
+    "search_videos": 600,
+    "search_channels": 600,
+    "trending_videos": 300,
+    "search_videos_multi": 600,
+    "trending_videos_multi": 300,
+    "video_details": 300,
+    "video_comments": 120,
+    "channel_videos": 300,
+    "video_analytics": 120,
+    "my_subscriptions": 120,
+    "subscriptions_feed": 120,
+    "my_playlists": 120,
+    "playlist_videos": 60,
+    "liked_videos": 60,
+    "watch_history": 60,
+}
+
+# Tools whose results depend on who is asking
+USER_SCOPED_TOOLS = {
+    "my_subscriptions",
+    "subscriptions_feed",
+    "my_playlists",
+    "playlist_videos",
+    "liked_videos",
+    "watch_history",
+}
+
+# Reads made with the caller's token when one is given; they can return that
+# user's private or unlisted videos, so only token-less results are shared
+TOKEN_SCOPED_TOOLS = {
+    "video_details",
+    "channel_videos",
+    "video_analytics",
+}
+
+
+# ============================================================
+# ENTITY TAGS
+# ============================================================
+
+def _ids(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return [v.strip() for v in value or [] if v and v.strip()]
+
+
+def read_tags(tool_name: str, arguments: Dict[str, Any], user: Optional[str]) -> List[str]:
+    """Entities a cached read depends on"""
+    if tool_name == "video_details":
+        return [f"video:{v}" for v in _ids(arguments.get("video_id"))]
+    if tool_name == "video_comments":
+        return [f"video:{arguments.get('video_id')}"]
+    if tool_name == "liked_videos":
+        return [f"user:{user}:likes"]
+    if tool_name in ("my_subscriptions", "subscriptions_feed"):
+        return [f"user:{user}:subscriptions"]
+    if tool_name == "my_playlists":
+        return [f"user:{user}:playlists"]
+    if tool_name == "playlist_videos":
+        return [f"playlist:{arguments.get('playlist_id')}", f"user:{user}:playlist_items"]
+    if tool_name == "watch_history":
+        return [f"user:{user}:activity"]
+    return []
+
+
+def write_tags(tool_name: str, arguments: Dict[str, Any], user: Optional[str]) -> List[str]:
+    """Entities a successful write changes"""
+    if tool_name in ("like_video", "unlike_video", "dislike_video"):
+        return [f"user:{user}:likes", f"user:{user}:activity", f"video:{arguments.get('video_id')}"]
+    if tool_name == "bulk_like_videos":
+        return [f"user:{user}:likes", f"user:{user}:activity"] + [
+            f"video:{v}" for v in _ids(arguments.get("video_ids"))
+        ]
+    if tool_name == "comment_on_video":
+        return [f"video:{arguments.get('video_id')}", f"user:{user}:activity"]
+    if tool_name in ("subscribe_channel", "unsubscribe_channel"):
+        return [f"user:{user}:subscriptions", f"user:{user}:activity"]
+    if tool_name == "create_playlist":
+        return [f"user:{user}:playlists"]
+    if tool_name in ("add_to_playlist", "bulk_add_to_playlist", "sync_playlist"):
+        return [f"playlist:{arguments.get('playlist_id')}", f"user:{user}:playlists", f"user:{user}:activity"]
+    if tool_name == "remove_from_playlist":
+        # Only the item ID is known, so drop every playlist listing of this user
+        return [f"user:{user}:playlist_items", f"user:{user}:playlists"]
+    return []
+
+
+# ============================================================
+# SHARED REDIS TIER
+# ============================================================
+
+class RedisTier:
+    """
+    Shared L2 for tool results plus a pub/sub channel for invalidations.
+
+    Values are the L1's encoded blobs prefixed with one flag byte
+    (``z`` compressed, ``j`` plain JSON). Every tag is a Redis set of the
+    keys carrying it, so an invalidation deletes shared entries directly
+    and then tells the other workers to drop their L1 copies.
+    """
+
+    def __init__(self, client, prefix: str = REDIS_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidate"
+        self.worker_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisTier":
+        import redis.asyncio as aioredis
+        return cls(aioredis.from_url(url))
+
+    async def get(self, key: str) -> Optional[tuple]:
+        """Return (blob, compressed, remaining_ttl) or None"""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+            value, pttl = await pipe.execute()
+        if not value or pttl is None or pttl <= 0:
+            return None
+        return value[1:], value[:1] == b"z", pttl / 1000
+
+    async def set(self, key: str, blob: bytes, compressed: bool, ttl: float, tags: List[str]) -> None:
+        full_key = self.prefix + key
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(full_key, (b"z" if compressed else b"j") + blob, ex=int(ttl))
+            for tag in tags:
+                tag_key = f"{self.prefix}tag:{tag}"
+                pipe.sadd(tag_key, full_key)
+                # Tag sets only need to outlive the longest entry they index
+                pipe.expire(tag_key, int(max(CACHE_TTLS.values())))
+            await pipe.execute()
+
+    async def invalidate(self, tags: List[str]) -> None:
+        tag_keys = [f"{self.prefix}tag:{tag}" for tag in tags]
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+        keys = {key for group in members for key in group}
+        if keys or tag_keys:
+            await self.client.delete(*keys, *tag_keys)
+        await self.client.publish(
+            self.channel,
+            json.dumps({"origin": self.worker_id, "tags": tags})
+        )
+
+    def start(self, on_tags: Callable[[List[str]], None]) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(on_tags))
+
+    async def _listen(self, on_tags: Callable[[List[str]], None]) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self.worker_id:
+                        on_tags(payload.get("tags", []))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Redis invalidation listener error, reconnecting: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                # Each attempt holds its own connection; release it before the next
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.client.aclose()
+
+
+# ============================================================
+# TOOL RESULT CACHE
+# ============================================================
+
+class ToolResultCache:
+    """
+    Caches successful read-only tool results.
+
+    L1 is this worker's byte-budgeted store; the optional Redis L2 is
+    shared by all workers. Writes invalidate both tiers and broadcast
+    their tags so every worker drops its stale L1 entries. Redis errors
+    degrade to L1-only operation.
+    """
+
+    def __init__(self, max_bytes: int = TOOL_CACHE_MAX_BYTES, shared: Optional[RedisTier] = None):
+        self.store = ByteBudgetCache(max_bytes=max_bytes)
+        self.shared = shared
+
+    @staticmethod
+    def key(tool_name: str, arguments: Dict[str, Any], user: Optional[str]) -> str:
+        args = json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(args.encode()).hexdigest()[:24]
+        return f"{tool_name}:{user or '-'}:{digest}"
+
+    @staticmethod
+    def user_for(tool_name: str, token: Optional[str]) -> Optional[str]:
+        return token_identity(token) if token else None
+
+    @staticmethod
+    def scope_for(tool_name: str, user: Optional[str]) -> Optional[str]:
+        """Whose entry a result is: one user's, or shared (None)"""
+        if tool_name in USER_SCOPED_TOOLS or tool_name in TOKEN_SCOPED_TOOLS:
+            return user
+        return None
+
+    async def get(self, tool_name: str, arguments: Dict[str, Any], token: Optional[str]) -> Optional[Dict[str, Any]]:
+        if tool_name not in CACHE_TTLS:
+            return None
+        user = self.user_for(tool_name, token)
+        key = self.key(tool_name, arguments, self.scope_for(tool_name, user))
+        
+        value = self.store.get(key)
+        if value is not None or self.shared is None:
+            return value
+        
+        try:
+            hit = await self.shared.get(key)
+        except Exception as e:
+            logger.warning("Redis cache read failed: %s", e)
+            return None
+        if hit is None:
+            return None
+        blob, compressed, remaining = hit
+        self.store.set_encoded(
+            key, blob, compressed, remaining,
+            group=tool_name, tags=read_tags(tool_name, arguments, user)
+        )
+        return self.store.decode(blob, compressed)
+
+    async def put(self, tool_name: str, arguments: Dict[str, Any], token: Optional[str], result: Dict[str, Any]) -> None:
+        if tool_name not in CACHE_TTLS:
+            return
+        user = self.user_for(tool_name, token)
+        key = self.key(tool_name, arguments, self.scope_for(tool_name, user))
+        tags = read_tags(tool_name, arguments, user)
+        ttl = CACHE_TTLS[tool_name]
+        
+        blob, compressed = self.store.encode(result)
+        self.store.set_encoded(key, blob, compressed, ttl, group=tool_name, tags=tags)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, blob, compressed, ttl, tags)
+            except Exception as e:
+                logger.warning("Redis cache write failed: %s", e)
+
+    async def invalidate_write(self, tool_name: str, arguments: Dict[str, Any], token: Optional[str]) -> List[str]:
+        """Drop entries a successful write made stale, in every worker"""
+        tags = write_tags(tool_name, arguments, self.user_for(tool_name, token))
+        if not tags:
+            return tags
+        self.invalidate_local(tags)
+        if self.shared is not None:
+            try:
+                await self.shared.invalidate(tags)
+            except Exception as e:
+                logger.warning("Redis invalidation failed: %s", e)
+        return tags
+
+    def invalidate_local(self, tags: List[str]) -> None:
+        removed = self.store.invalidate_tags(tags)
+        if removed:
+            logger.info("Invalidated %d cached results for %s", removed, tags)
+
+    async def start(self) -> None:
+        if self.shared is not None:
+            self.shared.start(self.invalidate_local)
+
+    async def stop(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.store.stats()
+        stats["shared_tier"] = "redis" if self.shared is not None else None
+        return stats
+
+
+# ============================================================
+# SINGLETON INSTANCE
+# ============================================================
+
+tool_cache = ToolResultCache(shared=RedisTier.from_url(REDIS_URL) if REDIS_URL else None)
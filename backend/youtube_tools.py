@@ -1,81 +1,176 @@
 import os
+import asyncio
+import hashlib
+import heapq
 import httpx
 import logging
-from typing import Optional, Dict, Any, List
-from dotenv import load_dotenv
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, AsyncIterator, Iterable, Union
+from cache import TTLCache
+from deadlines import remaining, expired
+from hedging import Hedger
+from playlist_sync import plan_playlist_sync
+from records import PlaylistItemRecord
+from search_index import search_index, normalize_query
 
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 BASE_URL = "https://www.googleapis.com/youtube/v3"
 
+# Freshness per channels.list part: statistics move, metadata barely does
+CHANNEL_PART_TTLS = {
+    "snippet": 24 * 3600,
+    "contentDetails": 24 * 3600,
+    "brandingSettings": 24 * 3600,
+    "statistics": 10 * 60,
+}
+CHANNEL_PARTS = ("snippet", "statistics", "contentDetails", "brandingSettings")
+MAX_IDS_PER_CALL = 50
+
+# Per-user channel profile; access tokens live an hour, so does the entry
+PROFILE_TTL = 3600
+
+# Channels without an uploads playlist (deleted, terminated) are remembered
+NO_UPLOADS_TTL = 3600
+
+# Upper bound per HTTP attempt; a request deadline can only shorten it
+REQUEST_TIMEOUT = 15
+
+# Writes that can be resent after a timeout without a second effect.
+# Other POST/PUT calls insert or update and are never sent twice.
+RETRY_SAFE_WRITES = {"videos/rate"}
+
+# Fan-out tools: branches allowed per call (each search.list costs 100
+# quota units), and the k of reciprocal rank fusion
+MAX_FANOUT_QUERIES = 5
+MAX_FANOUT_REGIONS = 10
+RRF_K = 60
+
 
 class YouTubeAPIError(Exception):
     """Custom exception for YouTube API errors"""
-    pass
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DeadlineExceeded(YouTubeAPIError):
+    """The request's deadline passed before the upstream answered"""
+    
+    def __init__(self, message: str = "Request deadline exceeded"):
+        super().__init__(message, status_code=504)
 
 
 class YouTubeClient:
     """Professional YouTube API Client with comprehensive error handling"""
     
     def __init__(self):
-        self.api_key = YOUTUBE_API_KEY  # Keep as fallback but won't use
         self.base_url = BASE_URL
+        # (channel_id, part) -> part payload, expiring per CHANNEL_PART_TTLS
+        self.channel_cache = TTLCache(max_entries=20000)
+        # (uploads_playlist_id, page_size, page_token) -> playlistItems page
+        self.uploads_page_cache = TTLCache(max_entries=5000, default_ttl=300)
+        # channel_id -> True when the channel has no uploads playlist
+        self.no_uploads_cache = TTLCache(max_entries=20000, default_ttl=NO_UPLOADS_TTL)
+        # token_identity(token) -> user channel profile
+        self.profile_cache = TTLCache(max_entries=10000, default_ttl=PROFILE_TTL)
+        self._http: Optional[httpx.AsyncClient] = None
+        # Tail-latency hedging for GETs; off unless YT_HEDGE_GETS is set
+        self.hedger = Hedger()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """Read at call time so the environment can be loaded after import"""
+        return os.getenv("YOUTUBE_API_KEY")
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, so calls reuse keep-alive connections"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     async def _safe_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Generic safe request handler with retries and error handling"""
         max_retries = 3
+        # A timed out insert may still have been applied; only resend what is idempotent
+        retry_safe = method.lower() in ("get", "delete") or endpoint in RETRY_SAFE_WRITES
     
         for attempt in range(max_retries):
+            # Each attempt only gets what is left of the request deadline
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"Deadline exceeded before {endpoint} attempt {attempt + 1}")
+            if left is not None:
+                kwargs["timeout"] = min(REQUEST_TIMEOUT, left)
+            
             try:
                 url = f"{self.base_url}/{endpoint}"
+                client = self._get_http()
             
-                async with httpx.AsyncClient(timeout=15) as client:
-                    if method.lower() == "get":
-                        response = await client.get(url, **kwargs)
-                    elif method.lower() == "post":
-                        response = await client.post(url, **kwargs)
-                    elif method.lower() == "delete":
-                        response = await client.delete(url, **kwargs)
-                    else:
-                        raise ValueError(f"Unsupported HTTP method: {method}")
+                if method.lower() == "get":
+                    # GETs are idempotent, so a slow one may be raced by a duplicate
+                    response = await self.hedger.run(endpoint, lambda: client.get(url, **kwargs))
+                elif method.lower() == "post":
+                    response = await client.post(url, **kwargs)
+                elif method.lower() == "put":
+                    response = await client.put(url, **kwargs)
+                elif method.lower() == "delete":
+                    response = await client.delete(url, **kwargs)
+                else:
+                    raise ValueError(f"Unsupported HTTP method: {method}")
 
                 # 🌟 FIX: Handle success with empty body (e.g., 204 No Content)
-                    if response.status_code == 204 or not response.content:
-                        return {"success": True}
+                if response.status_code == 204 or not response.content:
+                    return {"success": True}
 
                 # Handle rate limiting
-                    if response.status_code == 429:
-                        logger.warning(f"Rate limited. Attempt {attempt + 1}/{max_retries}")
-                        if attempt < max_retries - 1:
-                            continue
+                if response.status_code == 429:
+                    logger.warning("Rate limited. Attempt %d/%d", attempt + 1, max_retries)
+                    if attempt < max_retries - 1:
+                        delay = 0.5 * 2 ** attempt
+                        left = remaining()
+                        if left is not None and left <= delay:
+                            raise DeadlineExceeded("Deadline exceeded while rate limited")
+                        await asyncio.sleep(delay)
+                        continue
 
                 # Handle errors
-                    if response.status_code >= 400:
-                        error_data = response.json() if response.content else {}
-                        error_msg = error_data.get("error", {}).get("message", "Unknown error")
-                        raise YouTubeAPIError(
-                            f"API Error {response.status_code}: {error_msg}"
+                if response.status_code >= 400:
+                    error_data = response.json() if response.content else {}
+                    error_msg = error_data.get("error", {}).get("message", "Unknown error")
+                    raise YouTubeAPIError(
+                        f"API Error {response.status_code}: {error_msg}",
+                        status_code=response.status_code
                     )
 
                 # Normal JSON response
-                    return response.json()
+                return response.json()
 
             except httpx.TimeoutException:
-                logger.error(f"Timeout on attempt {attempt + 1}")
+                logger.error("Timeout on attempt %d", attempt + 1)
+                if expired():
+                    raise DeadlineExceeded(f"Deadline exceeded waiting for {endpoint}")
+                if not retry_safe:
+                    raise YouTubeAPIError(f"Request timeout on {method.upper()} {endpoint}", status_code=504)
                 if attempt == max_retries - 1:
-                    raise YouTubeAPIError("Request timeout after retries")
+                    raise YouTubeAPIError("Request timeout after retries", status_code=504)
 
             except YouTubeAPIError:
                 raise
 
             except Exception as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"Request failed: {str(e)}")
+                if not retry_safe or attempt == max_retries - 1:
+                    logger.error("Request failed: %s", e)
                     raise
 
         raise YouTubeAPIError("Max retries exceeded")
@@ -118,7 +213,13 @@ class YouTubeClient:
         if json:
             kwargs["json"] = json
         
-        return await self._safe_request(method, endpoint, **kwargs)
+        try:
+            return await self._safe_request(method, endpoint, **kwargs)
+        except YouTubeAPIError as e:
+            # Revoked or expired token: drop anything cached for this identity
+            if e.status_code == 401:
+                self.invalidate_user(token)
+            raise
 
     # ============================================================
     # SEARCH & DISCOVERY
@@ -131,9 +232,86 @@ class YouTubeClient:
         page_token: Optional[str] = None,
         order: str = "relevance",
         region_code: str = "US",
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        mode: str = "upstream"
+    ) -> Dict[str, Any]:
+        """
+        Search for videos with advanced filtering.
+
+        ``mode`` controls use of the local index:
+        - "upstream": always call the search endpoint (default)
+        - "index": answer from the index when confident, else call upstream
+        - "blend": confident index hits plus a smaller upstream call
+        """
+        max_results = min(max_results, 50)
+        terms = normalize_query(query)
+        # A blank query has no key; remember_query/recall_query ignore ""
+        query_key = f"{region_code}|{order}|{terms}" if terms else ""
+        use_index = mode in ("index", "blend") and not page_token and order == "relevance"
+
+        if use_index:
+            recalled = search_index.recall_query(query_key)
+            if recalled and len(recalled[0]) >= max_results:
+                items, next_page_token = recalled
+                logger.info("Index answered search '%s' from query memo", query)
+                return self._index_response(items[:max_results], next_page_token, "index")
+
+            hits = search_index.search(query, kind="video", limit=max_results)
+            strong = [hit["item"] for hit in hits if hit["coverage"] >= 1.0]
+
+            if mode == "index" and len(strong) >= max_results:
+                logger.info("Index answered search '%s' with %d hits", query, len(strong))
+                return self._index_response(strong, None, "index")
+
+            if mode == "blend" and strong:
+                upstream = await self.search_videos(
+                    query,
+                    max_results=max(max_results - len(strong), 1),
+                    order=order,
+                    region_code=region_code,
+                    token=token
+                )
+                seen = {item["id"]["videoId"] for item in strong}
+                merged = strong + [
+                    item for item in upstream.get("items", [])
+                    if item["id"]["videoId"] not in seen
+                ]
+                return self._index_response(merged[:max_results], upstream.get("nextPageToken"), "blend")
+
+        result = await self._search_list(query, max_results, order, region_code, token, page_token)
+        
+        # Enrich with video details
+        if result.get("items"):
+            try:
+                await self._enrich_with_details(result["items"], token)
+            except DeadlineExceeded:
+                # The results are still useful without statistics
+                logger.warning("Returning search '%s' without details: deadline exceeded", query)
+                result["partial"] = True
+                result["source"] = "upstream"
+                return result
+
+            # video_details has already indexed the enriched items
+            if not page_token:
+                search_index.remember_query(
+                    query_key,
+                    [item["id"]["videoId"] for item in result["items"]],
+                    result.get("nextPageToken")
+                )
+        
+        result["source"] = "upstream"
+        return result
+
+    async def _search_list(
+        self,
+        query: str,
+        max_results: int,
+        order: str,
+        region_code: str,
+        token: Optional[str],
+        page_token: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Search for videos with advanced filtering"""
+        """One search.list call, without enrichment"""
         params = {
             "part": "snippet",
             "q": query,
@@ -150,25 +328,36 @@ class YouTubeClient:
         
         # Use OAuth if token provided, otherwise use API key
         if token:
-            result = await self.public_get_oauth("search", params, token)
-        else:
-            result = await self.public_get("search", params)
+            return await self.public_get_oauth("search", params, token)
+        return await self.public_get("search", params)
+
+    async def _enrich_with_details(self, items: List[Dict[str, Any]], token: Optional[str] = None) -> None:
+        """Attach statistics and contentDetails to search-shaped items, 50 IDs per videos.list call"""
+        video_ids = list(dict.fromkeys(item["id"]["videoId"] for item in items))
+        chunks = [video_ids[i:i + MAX_IDS_PER_CALL] for i in range(0, len(video_ids), MAX_IDS_PER_CALL)]
+        responses = await asyncio.gather(*(self.video_details(",".join(chunk), token) for chunk in chunks))
         
-        # Enrich with video details
-        if result.get("items"):
-            video_ids = [item["id"]["videoId"] for item in result["items"]]
-            details = await self.video_details(",".join(video_ids), token)
-            
-            details_map = {
-                item["id"]: item for item in details.get("items", [])
-            }
-            
-            for item in result["items"]:
-                video_id = item["id"]["videoId"]
-                if video_id in details_map:
-                    item["statistics"] = details_map[video_id].get("statistics", {})
-                    item["contentDetails"] = details_map[video_id].get("contentDetails", {})
+        details_map = {
+            item["id"]: item for details in responses for item in details.get("items", [])
+        }
         
+        for item in items:
+            video_id = item["id"]["videoId"]
+            if video_id in details_map:
+                item["statistics"] = details_map[video_id].get("statistics", {})
+                item["contentDetails"] = details_map[video_id].get("contentDetails", {})
+
+    @staticmethod
+    def _index_response(items: List[Dict[str, Any]], next_page_token: Optional[str], source: str) -> Dict[str, Any]:
+        """Shape index hits like a search.list response"""
+        result = {
+            "kind": "youtube#searchListResponse",
+            "items": items,
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+            "source": source
+        }
+        if next_page_token:
+            result["nextPageToken"] = next_page_token
         return result
 
     async def search_channels(self, query: str, max_results: int = 10) -> Dict[str, Any]:
@@ -180,7 +369,20 @@ class YouTubeClient:
             "type": "channel",
             "order": "relevance"
         }
-        return await self.public_get("search", params)
+        result = await self.public_get("search", params)
+        
+        # Enrich with subscriber/video counts in one batched channels.list call
+        if result.get("items"):
+            channel_ids = [item["snippet"]["channelId"] for item in result["items"]]
+            details = await self.channel_details(channel_ids, parts=("statistics",))
+            details_map = {item["id"]: item for item in details.get("items", [])}
+            
+            for item in result["items"]:
+                channel = details_map.get(item["snippet"]["channelId"])
+                if channel:
+                    item["statistics"] = channel.get("statistics", {})
+                search_index.add_channel(item)
+        return result
 
     async def trending_videos(
         self, 
@@ -201,8 +403,93 @@ class YouTubeClient:
             params["videoCategoryId"] = category_id
         
         if token:
-            return await self.public_get_oauth("videos", params, token)
-        return await self.public_get("videos", params)
+            result = await self.public_get_oauth("videos", params, token)
+        else:
+            result = await self.public_get("videos", params)
+        for item in result.get("items", []):
+            search_index.add_video(item)
+        return result
+
+    async def search_videos_multi(
+        self,
+        queries: Union[str, List[str]],
+        max_results: int = 10,
+        order: str = "relevance",
+        region_code: str = "US",
+        token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run several phrasings of a search at once and merge them by
+        reciprocal rank fusion. Enrichment runs once, on the merged page,
+        so it costs one videos.list call however many queries there are.
+        """
+        # Queries may contain commas, so a single string is one query
+        if isinstance(queries, str):
+            queries = [queries]
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))[:MAX_FANOUT_QUERIES]
+        if not queries:
+            raise YouTubeAPIError("At least one query is required", 400)
+        max_results = min(max_results, 50)
+        
+        responses = await asyncio.gather(
+            *(self._search_list(query, max_results, order, region_code, token) for query in queries),
+            return_exceptions=True
+        )
+        rankings, failed = _fanout_rankings(queries, responses)
+        items = _rrf_merge(rankings, lambda item: item["id"]["videoId"])[:max_results]
+        
+        result = {
+            "kind": "youtube#searchListResponse",
+            "items": items,
+            "queries": queries,
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+            "source": "upstream"
+        }
+        if failed:
+            result["failed"] = failed
+            result["partial"] = True
+        if items:
+            try:
+                await self._enrich_with_details(items, token)
+            except DeadlineExceeded:
+                logger.warning("Returning multi-query search without details: deadline exceeded")
+                result["partial"] = True
+        return result
+
+    async def trending_videos_multi(
+        self,
+        region_codes: Union[str, List[str]],
+        category_id: Optional[str] = None,
+        max_results: int = 25,
+        token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Trending charts of several regions fetched concurrently and merged
+        by reciprocal rank fusion, so videos trending in more regions rank
+        higher. Chart items already carry statistics; no enrichment needed.
+        """
+        region_codes = list(dict.fromkeys(code.upper() for code in _split_ids(region_codes)))[:MAX_FANOUT_REGIONS]
+        if not region_codes:
+            raise YouTubeAPIError("At least one region code is required", 400)
+        max_results = min(max_results, 50)
+        
+        responses = await asyncio.gather(
+            *(self.trending_videos(category_id, code, max_results, token) for code in region_codes),
+            return_exceptions=True
+        )
+        rankings, failed = _fanout_rankings(region_codes, responses)
+        items = _rrf_merge(rankings, lambda item: item["id"])[:max_results]
+        
+        result = {
+            "kind": "youtube#videoListResponse",
+            "items": items,
+            "regions": region_codes,
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+        }
+        if failed:
+            result["failed"] = failed
+            result["partial"] = True
+        return result
 
     # ============================================================
     # VIDEO OPERATIONS
@@ -215,14 +502,19 @@ class YouTubeClient:
             "id": video_id
         }
         if token:
-            return await self.public_get_oauth("videos", params, token)
-        return await self.public_get("videos", params)
+            result = await self.public_get_oauth("videos", params, token)
+        else:
+            result = await self.public_get("videos", params)
+        for item in result.get("items", []):
+            search_index.add_video(item)
+        return result
 
     async def video_comments(
         self, 
         video_id: str, 
         max_results: int = 20,
-        order: str = "relevance"
+        order: str = "relevance",
+        page_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get comments for a video"""
         params = {
@@ -232,35 +524,260 @@ class YouTubeClient:
             "order": order,
             "textFormat": "plainText"
         }
+        if page_token:
+            params["pageToken"] = page_token
         return await self.public_get("commentThreads", params)
 
+    async def comment_replies(self, parent_id: str) -> List[Dict[str, Any]]:
+        """Get every reply to a top-level comment, following pagination"""
+        replies = []
+        page_token = None
+        while True:
+            params = {
+                "part": "snippet",
+                "parentId": parent_id,
+                "maxResults": 100,
+                "textFormat": "plainText"
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            result = await self.public_get("comments", params)
+            replies.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return replies
+
+    async def export_comments(
+        self,
+        video_id: str,
+        cursor: Optional[str] = None,
+        include_replies: bool = True,
+        max_comments: Optional[int] = None,
+        reply_concurrency: int = 8
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream every comment on a video as flat records.
+
+        One commentThreads page is held in memory at a time. Threads whose
+        replies were not all inlined are expanded concurrently through
+        comments.list. After each page a ``cursor`` record is yielded;
+        passing it back as ``cursor`` resumes right after that page. When
+        ``max_comments`` stops the export early, the ``end`` record carries
+        a cursor that resumes at the first comment not yet exported.
+        """
+        semaphore = asyncio.Semaphore(reply_concurrency)
+        # A cursor is a page token, optionally followed by "|<records to skip>"
+        page_token, _, skip = (cursor or "").partition("|")
+        page_token = page_token or None
+        try:
+            skip = int(skip or 0)
+        except ValueError:
+            raise YouTubeAPIError(f"Invalid cursor: {cursor}")
+        threads = 0
+        emitted = 0
+
+        async def expand(thread: Dict[str, Any]) -> List[Dict[str, Any]]:
+            inline = (thread.get("replies") or {}).get("comments", [])
+            total = thread["snippet"].get("totalReplyCount", 0)
+            if not include_replies or total == 0:
+                return []
+            if len(inline) >= total:
+                return inline
+            async with semaphore:
+                return await self.comment_replies(thread["id"])
+
+        def truncated(resume: str) -> Dict[str, Any]:
+            return {"type": "end", "threads": threads, "comments": emitted, "truncated": True, "cursor": resume}
+
+        while True:
+            params = {
+                "part": "snippet,replies" if include_replies else "snippet",
+                "videoId": video_id,
+                "maxResults": 100,
+                "order": "time",
+                "textFormat": "plainText"
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            page = await self.public_get("commentThreads", params)
+            items = page.get("items", [])
+            replies = await asyncio.gather(*(expand(thread) for thread in items))
+
+            # Records of this page in export order; position counts skipped ones too
+            position = 0
+            for thread, thread_replies in zip(items, replies):
+                top = thread["snippet"]["topLevelComment"]
+                records = [(top, None, thread["snippet"].get("totalReplyCount", 0))]
+                records.extend((reply, thread["id"], None) for reply in thread_replies)
+                for comment, parent_id, reply_count in records:
+                    position += 1
+                    if position <= skip:
+                        continue
+                    if max_comments and emitted >= max_comments:
+                        yield truncated(f"{page_token or ''}|{position - 1}")
+                        return
+                    if parent_id is None:
+                        threads += 1
+                    yield _comment_record(comment, video_id, parent_id, reply_count)
+                    emitted += 1
+            skip = 0
+
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                yield {"type": "end", "threads": threads, "comments": emitted, "truncated": False}
+                return
+            if max_comments and emitted >= max_comments:
+                yield truncated(page_token)
+                return
+            yield {"type": "cursor", "cursor": page_token}
+
     # ============================================================
     # CHANNEL OPERATIONS
     # ============================================================
 
-    async def channel_details(self, channel_id: str) -> Dict[str, Any]:
-        """Get detailed channel information"""
+    async def channel_details(
+        self,
+        channel_id: Union[str, List[str]],
+        parts: Iterable[str] = CHANNEL_PARTS
+    ) -> Dict[str, Any]:
+        """
+        Get detailed information for up to 50 channels.
+
+        Parts are cached per channel with their own freshness, so only
+        channels with a stale or missing part are fetched, in one
+        channels.list call.
+        """
+        channel_ids = _split_ids(channel_id)
+        if len(channel_ids) > MAX_IDS_PER_CALL:
+            raise YouTubeAPIError(f"At most {MAX_IDS_PER_CALL} channel IDs per call")
+        parts = [part for part in parts if part in CHANNEL_PART_TTLS]
+        
+        stale_ids = []
+        stale_parts = set()
+        for cid in channel_ids:
+            missing = [part for part in parts if (cid, part) not in self.channel_cache]
+            if missing:
+                stale_ids.append(cid)
+                stale_parts.update(missing)
+        
+        if stale_ids:
+            params = {
+                "part": ",".join(sorted(stale_parts)),
+                "id": ",".join(stale_ids),
+                "maxResults": MAX_IDS_PER_CALL
+            }
+            fetched = await self.public_get("channels", params)
+            for item in fetched.get("items", []):
+                for part in stale_parts:
+                    if part in item:
+                        self.channel_cache.set((item["id"], part), item[part], CHANNEL_PART_TTLS[part])
+                if "snippet" in item:
+                    search_index.add_channel(item)
+        
+        items = []
+        for cid in channel_ids:
+            item = {"kind": "youtube#channel", "id": cid}
+            for part in parts:
+                value = self.channel_cache.get((cid, part))
+                if value is not None:
+                    item[part] = value
+            if len(item) > 2:
+                items.append(item)
+        
+        return {
+            "kind": "youtube#channelListResponse",
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+            "items": items
+        }
+
+    async def uploads_playlist_id(self, channel_id: str) -> Optional[str]:
+        """Resolve a channel's uploads playlist (cached with channel contentDetails)"""
+        if channel_id in self.no_uploads_cache:
+            return None
+        details = await self.channel_details(channel_id, parts=("contentDetails",))
+        uploads = None
+        if details["items"]:
+            related = details["items"][0].get("contentDetails", {}).get("relatedPlaylists", {})
+            uploads = related.get("uploads")
+        if not uploads:
+            self.no_uploads_cache.set(channel_id, True)
+        return uploads
+
+    async def uploads_page(
+        self,
+        uploads_id: str,
+        page_size: int = 50,
+        page_token: Optional[str] = None
+    ) -> tuple:
+        """
+        One page of an uploads playlist as search-shaped items, newest first.
+        Pages are cached briefly as compact records; returns (items,
+        next_page_token) with fresh dicts the caller may modify.
+        """
+        key = (uploads_id, page_size, page_token)
+        cached = self.uploads_page_cache.get(key)
+        if cached is not None:
+            records, next_page_token = cached
+            return [record.to_search_result() for record in records], next_page_token
+        
         params = {
-            "part": "snippet,statistics,contentDetails,brandingSettings",
-            "id": channel_id
+            "part": "snippet,contentDetails",
+            "playlistId": uploads_id,
+            "maxResults": page_size
         }
-        return await self.public_get("channels", params)
+        if page_token:
+            params["pageToken"] = page_token
+        page = await self.public_get("playlistItems", params)
+        records = tuple(
+            record for record in map(PlaylistItemRecord.from_api, page.get("items", []))
+            # Private and deleted uploads have no publish date
+            if record is not None and record.published_at
+        )
+        self.uploads_page_cache.set(key, (records, page.get("nextPageToken")))
+        return [record.to_search_result() for record in records], page.get("nextPageToken")
 
     async def channel_videos(
         self, 
         channel_id: str,
         max_results: int = 10,
-        order: str = "date"
+        order: str = "date",
+        page_token: Optional[str] = None,
+        token: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get videos from a channel"""
-        params = {
-            "part": "snippet",
-            "channelId": channel_id,
-            "maxResults": min(max_results, 50),
-            "order": order,
-            "type": "video"
-        }
-        return await self.public_get("search", params)
+        """
+        Get videos from a channel.
+
+        Newest-first listings page through the uploads playlist (1 quota
+        unit per page). Other orderings need the search endpoint.
+        """
+        uploads = await self.uploads_playlist_id(channel_id) if order == "date" else None
+        
+        if uploads:
+            items, next_page_token = await self.uploads_page(uploads, min(max_results, 50), page_token)
+            result = {
+                "kind": "youtube#searchListResponse",
+                "items": [dict(item) for item in items],
+                "pageInfo": {"resultsPerPage": len(items)},
+                "source": "uploads_playlist"
+            }
+            if next_page_token:
+                result["nextPageToken"] = next_page_token
+        else:
+            params = {
+                "part": "snippet",
+                "channelId": channel_id,
+                "maxResults": min(max_results, 50),
+                "order": order,
+                "type": "video"
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            result = await self.public_get("search", params)
+            result["source"] = "search"
+        
+        if result.get("items"):
+            await self._enrich_with_details(result["items"], token)
+        return result
 
     # ============================================================
     # USER ACTIONS (Authenticated)
@@ -330,15 +847,124 @@ class YouTubeClient:
         await self.auth_request("delete", "subscriptions", token, params=params)
         return {"success": True, "message": "Successfully unsubscribed"}
 
-    async def my_subscriptions(self, token: str, max_results: int = 50) -> Dict[str, Any]:
+    async def my_subscriptions(
+        self,
+        token: str,
+        max_results: int = 50,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Get user's subscriptions"""
         params = {
             "part": "snippet,contentDetails",
             "mine": "true",
             "maxResults": min(max_results, 50)
         }
+        if page_token:
+            params["pageToken"] = page_token
         return await self.auth_request("get", "subscriptions", token, params=params)
 
+    async def subscriptions_feed(
+        self,
+        token: str,
+        max_results: int = 25,
+        max_channels: int = 200,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Latest uploads across the user's subscriptions, newest first.
+
+        Subscriptions are paged, uploads playlists resolved in batches of 50,
+        and each channel's first page fetched, with at most ``concurrency``
+        requests in flight throughout. Channels are then k-way merged on a heap; a
+        channel's next page is only fetched once its buffered items have
+        all been emitted, and merging stops at ``max_results`` items.
+        """
+        max_results = min(max_results, 50)
+        
+        channel_ids: List[str] = []
+        page_token = None
+        while len(channel_ids) < max_channels:
+            page = await self.my_subscriptions(token, 50, page_token)
+            channel_ids.extend(
+                item["snippet"]["resourceId"]["channelId"] for item in page.get("items", [])
+            )
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+        channel_ids = channel_ids[:max_channels]
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def resolve_batch(batch: List[str]) -> None:
+            async with semaphore:
+                details = await self.channel_details(batch, parts=("contentDetails",))
+            # Channels channels.list did not return have no uploads to offer
+            found = {item["id"] for item in details["items"]}
+            for cid in batch:
+                if cid not in found:
+                    self.no_uploads_cache.set(cid, True)
+        
+        async def resolve(channel_id: str) -> Optional[str]:
+            async with semaphore:
+                return await self.uploads_playlist_id(channel_id)
+        
+        unknown = [cid for cid in channel_ids if cid not in self.no_uploads_cache]
+        await asyncio.gather(*(
+            resolve_batch(unknown[i:i + MAX_IDS_PER_CALL])
+            for i in range(0, len(unknown), MAX_IDS_PER_CALL)
+        ))
+        uploads_ids = [uid for uid in await asyncio.gather(*(resolve(cid) for cid in channel_ids)) if uid]
+        
+        page_size = min(max_results, 10)
+        
+        async def fetch(uploads_id: str, token_: Optional[str]) -> tuple:
+            async with semaphore:
+                try:
+                    return await self.uploads_page(uploads_id, page_size, token_)
+                except YouTubeAPIError as e:
+                    logger.warning("Skipping uploads playlist %s: %s", uploads_id, e)
+                    return [], None
+        
+        first_pages = await asyncio.gather(*(fetch(uid, None) for uid in uploads_ids))
+        
+        # Per channel: buffered items, read position and next page token
+        buffers = [list(items) for items, _ in first_pages]
+        positions = [0] * len(uploads_ids)
+        next_tokens = [next_token for _, next_token in first_pages]
+        heap = [
+            (-_published_ts(buffers[i][0]), i)
+            for i in range(len(uploads_ids)) if buffers[i]
+        ]
+        heapq.heapify(heap)
+        
+        feed = []
+        while heap and len(feed) < max_results:
+            _, i = heapq.heappop(heap)
+            feed.append(dict(buffers[i][positions[i]]))
+            positions[i] += 1
+            
+            if positions[i] == len(buffers[i]) and next_tokens[i]:
+                buffers[i], next_tokens[i] = await fetch(uploads_ids[i], next_tokens[i])
+                positions[i] = 0
+            if positions[i] < len(buffers[i]):
+                heapq.heappush(heap, (-_published_ts(buffers[i][positions[i]]), i))
+        
+        # Channels whose pages were cut off by the deadline are missing
+        partial = expired()
+        if feed and not partial:
+            try:
+                await self._enrich_with_details(feed, token)
+            except DeadlineExceeded:
+                partial = True
+        
+        return {
+            "kind": "youtube#searchListResponse",
+            "items": feed,
+            "partial": partial,
+            "pageInfo": {"totalResults": len(feed), "resultsPerPage": len(feed)},
+            "channels_scanned": len(uploads_ids)
+        }
+
     # ============================================================
     # PLAYLIST OPERATIONS
     # ============================================================
@@ -373,9 +999,10 @@ class YouTubeClient:
         self, 
         token: str, 
         playlist_id: str, 
-        video_id: str
+        video_id: str,
+        position: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Add video to playlist"""
+        """Add video to playlist (appended unless a position is given)"""
         body = {
             "snippet": {
                 "playlistId": playlist_id,
@@ -385,6 +1012,8 @@ class YouTubeClient:
                 }
             }
         }
+        if position is not None:
+            body["snippet"]["position"] = position
         
         params = {"part": "snippet"}
         result = await self.auth_request("post", "playlistItems", token, params=params, json=body)
@@ -417,7 +1046,8 @@ class YouTubeClient:
         self, 
         token: str, 
         playlist_id: str,
-        max_results: int = 50
+        max_results: int = 50,
+        page_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get videos in a playlist"""
         params = {
@@ -425,19 +1055,222 @@ class YouTubeClient:
             "playlistId": playlist_id,
             "maxResults": min(max_results, 50)
         }
+        if page_token:
+            params["pageToken"] = page_token
         return await self.auth_request("get", "playlistItems", token, params=params)
 
+    async def all_playlist_items(self, token: str, playlist_id: str) -> List[Dict[str, Any]]:
+        """Every item of a playlist in playlist order, following pagination"""
+        items = []
+        page_token = None
+        while True:
+            page = await self.playlist_videos(token, playlist_id, 50, page_token)
+            items.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return items
+
+    async def move_playlist_item(
+        self,
+        token: str,
+        playlist_id: str,
+        playlist_item_id: str,
+        video_id: str,
+        position: int
+    ) -> Dict[str, Any]:
+        """Move an existing playlist item to a new position"""
+        body = {
+            "id": playlist_item_id,
+            "snippet": {
+                "playlistId": playlist_id,
+                "resourceId": {
+                    "kind": "youtube#video",
+                    "videoId": video_id
+                },
+                "position": position
+            }
+        }
+        
+        params = {"part": "snippet"}
+        await self.auth_request("put", "playlistItems", token, params=params, json=body)
+        return {"success": True, "message": "Playlist item moved", "position": position}
+
+    # ============================================================
+    # BULK OPERATIONS (Authenticated)
+    # ============================================================
+
+    async def _run_bulk(
+        self,
+        keys: List[str],
+        worker,
+        concurrency: int = 4,
+        min_interval: float = 0.1
+    ) -> Dict[str, Any]:
+        """
+        Run ``worker(key)`` for each distinct key with bounded concurrency
+        and paced starts, collecting a result per key in input order.
+        A 429 slows the pacer down for the remaining writes.
+        """
+        keys = list(dict.fromkeys(k.strip() for k in keys if k and k.strip()))
+        semaphore = asyncio.Semaphore(concurrency)
+        pacer = _Pacer(min_interval)
+
+        async def run(key: str) -> Dict[str, Any]:
+            async with semaphore:
+                await pacer.wait()
+                if expired():
+                    return {"id": key, "success": False, "skipped": True, "error": "Deadline exceeded before this item ran"}
+                try:
+                    result = await worker(key)
+                    return {"id": key, "success": True, **result}
+                except YouTubeAPIError as e:
+                    if e.status_code == 429:
+                        pacer.backoff()
+                    return {"id": key, "success": False, "error": str(e)}
+
+        results = await asyncio.gather(*(run(key) for key in keys))
+        succeeded = sum(1 for r in results if r["success"])
+        skipped = sum(1 for r in results if r.get("skipped"))
+        return {
+            "success": succeeded == len(results),
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded - skipped,
+            "skipped": skipped,
+            "results": results
+        }
+
+    async def bulk_rate_videos(
+        self,
+        token: str,
+        video_ids: List[str],
+        rating: str = "like"
+    ) -> Dict[str, Any]:
+        """Like, dislike or clear the rating of many videos"""
+        if rating not in ("like", "dislike", "none"):
+            raise YouTubeAPIError(f"Invalid rating: {rating}")
+
+        async def rate(video_id: str) -> Dict[str, Any]:
+            await self.auth_request("post", "videos/rate", token, params={"id": video_id, "rating": rating})
+            return {}
+
+        return await self._run_bulk(video_ids, rate)
+
+    async def bulk_add_to_playlist(
+        self,
+        token: str,
+        playlist_id: str,
+        video_ids: List[str]
+    ) -> Dict[str, Any]:
+        """Add many videos to a playlist, keeping their order"""
+        async def add(video_id: str) -> Dict[str, Any]:
+            result = await self.add_to_playlist(token, playlist_id, video_id)
+            return {"item_id": result.get("item_id")}
+
+        # Inserts append to the playlist, so they must run one at a time
+        return await self._run_bulk(video_ids, add, concurrency=1)
+
+    async def sync_playlist(
+        self,
+        token: str,
+        playlist_id: str,
+        video_ids: List[str],
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Make a playlist contain exactly ``video_ids`` in that order using
+        the fewest deletes, inserts and moves. Deletes run concurrently;
+        positional inserts and moves run in order, paced.
+        """
+        target = [v.strip() for v in video_ids if v and v.strip()]
+        items = await self.all_playlist_items(token, playlist_id)
+        current = [(item["id"], item["contentDetails"]["videoId"]) for item in items]
+        plan = plan_playlist_sync(current, target)
+        
+        if dry_run:
+            return {"dry_run": True, "playlist_id": playlist_id, **plan}
+        
+        deleted = await self._run_bulk(
+            [d["item_id"] for d in plan["deletes"]],
+            lambda item_id: self.remove_from_playlist(token, item_id)
+        )
+        if deleted["failed"] or deleted["skipped"]:
+            # Positions below assume every delete happened
+            return {
+                "success": False,
+                "playlist_id": playlist_id,
+                "error": "Some deletes failed; inserts and moves were not applied",
+                "deletes": deleted["results"],
+                "summary": plan["summary"]
+            }
+        
+        pacer = _Pacer(0.1)
+        results = []
+        for index, op in enumerate(plan["operations"]):
+            await pacer.wait()
+            try:
+                if op["op"] == "insert":
+                    added = await self.add_to_playlist(token, playlist_id, op["video_id"], op["position"])
+                    results.append({**op, "success": True, "item_id": added.get("item_id")})
+                else:
+                    await self.move_playlist_item(token, playlist_id, op["item_id"], op["video_id"], op["position"])
+                    results.append({**op, "success": True})
+            except YouTubeAPIError as e:
+                results.append({**op, "success": False, "error": str(e)})
+                # Later positions depend on this one; stop instead of scrambling the playlist
+                results.extend({**rest, "success": False, "error": "Skipped"} for rest in plan["operations"][index + 1:])
+                break
+        
+        return {
+            "success": all(r["success"] for r in results),
+            "playlist_id": playlist_id,
+            "summary": plan["summary"],
+            "deletes": deleted["results"],
+            "operations": results
+        }
+
     # ============================================================
     # USER DATA
     # ============================================================
 
-    async def my_channel(self, token: str) -> Dict[str, Any]:
-        """Get authenticated user's channel info"""
+    async def user_profile(self, token: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Cached profile of the authenticated user's channel: channel ID,
+        related playlists and the raw channels.list response. Refetched
+        when older than ``max_age`` seconds.
+        """
+        key = token_identity(token)
+        profile = self.profile_cache.get(key)
+        if profile is not None and (max_age is None or time.time() - profile["fetched_at"] <= max_age):
+            return profile
+        
         params = {
             "part": "snippet,statistics,contentDetails",
             "mine": "true"
         }
-        return await self.auth_request("get", "channels", token, params=params)
+        channel = await self.auth_request("get", "channels", token, params=params)
+        items = channel.get("items") or []
+        related = items[0].get("contentDetails", {}).get("relatedPlaylists", {}) if items else {}
+        
+        profile = {
+            "channel_id": items[0]["id"] if items else None,
+            "related_playlists": related,
+            "uploads": related.get("uploads"),
+            "channel": channel,
+            "fetched_at": time.time()
+        }
+        self.profile_cache.set(key, profile)
+        return profile
+
+    def invalidate_user(self, token: Optional[str]) -> None:
+        """Forget cached data for a token (logout, re-auth, revoked token)"""
+        if token:
+            self.profile_cache.pop(token_identity(token))
+
+    async def my_channel(self, token: str) -> Dict[str, Any]:
+        """Get authenticated user's channel info"""
+        profile = await self.user_profile(token, max_age=CHANNEL_PART_TTLS["statistics"])
+        return profile["channel"]
 
     async def watch_history(self, token: str, max_results: int = 50) -> Dict[str, Any]:
         """Get user's watch history"""
@@ -450,13 +1283,13 @@ class YouTubeClient:
 
     async def liked_videos(self, token: str, max_results: int = 50) -> Dict[str, Any]:
         """Get user's liked videos"""
-        # First get the user's channel to find their likes playlist
-        channel = await self.my_channel(token)
+        # The likes playlist comes from the cached user profile
+        profile = await self.user_profile(token)
         
-        if not channel.get("items"):
+        if not profile["channel_id"]:
             return {"items": [], "message": "No channel found"}
         
-        likes_playlist = channel["items"][0]["contentDetails"]["relatedPlaylists"].get("likes")
+        likes_playlist = profile["related_playlists"].get("likes")
         
         if not likes_playlist:
             return {"items": [], "message": "Likes playlist not found"}
@@ -464,6 +1297,111 @@ class YouTubeClient:
         return await self.playlist_videos(token, likes_playlist, max_results)
 
 
+class _Pacer:
+    """Spaces out request starts; the interval doubles on backoff"""
+
+    def __init__(self, interval: float, max_interval: float = 5.0):
+        self.interval = interval
+        self.max_interval = max_interval
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        start_at = max(now, self._next_at)
+        self._next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def backoff(self) -> None:
+        self.interval = min(max(self.interval * 2, 0.1), self.max_interval)
+
+
+def token_identity(token: str) -> str:
+    """Stable, non-reversible cache key for an OAuth token"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _split_ids(ids: Union[str, List[str]]) -> List[str]:
+    """Normalize a comma-separated string or list of IDs, dropping duplicates"""
+    if isinstance(ids, str):
+        ids = ids.split(",")
+    return list(dict.fromkeys(i.strip() for i in ids if i and i.strip()))
+
+
+def _fanout_rankings(labels: List[str], responses: List[Any]) -> tuple:
+    """
+    Split fan-out responses into (label, items) rankings and failures.
+    Re-raises the first error when every branch failed.
+    """
+    rankings, failed = [], {}
+    for label, response in zip(labels, responses):
+        if isinstance(response, BaseException):
+            if not isinstance(response, Exception):
+                raise response
+            failed[label] = str(response)
+        else:
+            rankings.append((label, response.get("items", [])))
+    if not rankings:
+        first = next(r for r in responses if isinstance(r, Exception))
+        raise first
+    return rankings, failed
+
+
+def _rrf_merge(rankings: List[tuple], key) -> List[Dict[str, Any]]:
+    """
+    Reciprocal rank fusion of several (label, items) rankings. An item
+    scores sum(1 / (RRF_K + rank)) over the rankings it appears in; each
+    item is kept once and notes which rankings matched it.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+    for label, items in rankings:
+        for rank, item in enumerate(items, start=1):
+            item_id = key(item)
+            if item_id not in merged:
+                merged[item_id] = dict(item, fanout={"matched": []})
+                scores[item_id] = 0.0
+            scores[item_id] += 1.0 / (RRF_K + rank)
+            merged[item_id]["fanout"]["matched"].append(label)
+    ordered = sorted(merged, key=lambda item_id: scores[item_id], reverse=True)
+    for item_id in ordered:
+        merged[item_id]["fanout"]["score"] = round(scores[item_id], 5)
+    return [merged[item_id] for item_id in ordered]
+
+
+def _published_ts(item: Dict[str, Any]) -> float:
+    """Publish time of a search-shaped item as a POSIX timestamp"""
+    published = item.get("snippet", {}).get("publishedAt")
+    if not published:
+        return 0.0
+    return datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp()
+
+
+def _comment_record(
+    comment: Dict[str, Any],
+    video_id: str,
+    parent_id: Optional[str],
+    reply_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """Flatten a comment resource into an export record"""
+    snippet = comment.get("snippet", {})
+    record = {
+        "type": "comment",
+        "id": comment.get("id"),
+        "video_id": video_id,
+        "parent_id": parent_id,
+        "author": snippet.get("authorDisplayName"),
+        "author_channel_id": (snippet.get("authorChannelId") or {}).get("value"),
+        "text": snippet.get("textDisplay") or snippet.get("textOriginal"),
+        "like_count": snippet.get("likeCount", 0),
+        "published_at": snippet.get("publishedAt"),
+        "updated_at": snippet.get("updatedAt")
+    }
+    if reply_count is not None:
+        record["reply_count"] = reply_count
+    return record
+
+
 # ============================================================
 # SINGLETON INSTANCE
 # ============================================================
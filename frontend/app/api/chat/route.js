@@ -7,10 +7,9 @@ const sessions = new Map();
 function getSession(id) {
   if (!sessions.has(id)) {
     sessions.set(id, { 
-      lastResults: null,
       lastQuery: null,
       videos: [],
-      pageToken: null
+      hasMore: false
     });
   }
   return sessions.get(id);
@@ -19,7 +18,7 @@ function getSession(id) {
 /* ------------------------------------------
    CALL MCP TOOL - FIXED WITH COOKIE FORWARDING
 ------------------------------------------ */
-async function callMCP(tool, args, request) {
+async function callMCP(tool, args, request, sessionId) {
   const authHeader = request.headers.get("authorization") || "";
   const token = authHeader.startsWith("Bearer ") ? authHeader.replace("Bearer ", "") : "";
 
@@ -38,6 +37,8 @@ async function callMCP(tool, args, request) {
     body: JSON.stringify({
       tool_name: tool,
       arguments: args,
+      // Listing results stay on the backend for the session_* follow-up tools
+      session_id: sessionId,
     }),
   });
 
@@ -47,12 +48,23 @@ async function callMCP(tool, args, request) {
 /* ------------------------------------------
    INTENT DETECTION (unchanged)
 ------------------------------------------ */
+// "details of the third one", "tell me about #3", "info on result 2": only
+// references to a position in the last listing, never free-text topics
+const LISTING_REF = String.raw`(?:#\d+|(?:result|video|item|number)\s*#?\d+|(?:the\s+)?(?:first|second|third|fourth|fifth|last|\d+(?:st|nd|rd|th))(?:\s+(?:one|video|result))?)`;
+const DETAILS_RE = new RegExp(
+  String.raw`^(?:(?:show|give|get)\s+(?:me\s+)?)?(?:(?:the\s+)?details|(?:more\s+)?info|more about|tell me (?:more\s+)?about)\s+(?:(?:of|on|for|about)\s+)?${LISTING_REF}\s*[?.!]*$`,
+  "i"
+);
+
 function detectIntent(text) {
   const t = text.toLowerCase().trim();
 
   if (/^(more|some more|show more|load more|next|next page)$/i.test(t))
     return "more";
 
+  if (DETAILS_RE.test(t))
+    return "details";
+
   if (/^unlike\b/.test(t) || /remove\s+like/i.test(t) || /take.*like\s*off/i.test(t))
     return "unlike";
 
@@ -110,6 +122,17 @@ function scoreVideo(v, query) {
   return score + Math.log(views + 1) * 0.1;
 }
 
+const ORDINALS = { first: 1, second: 2, third: 3, fourth: 4, fifth: 5 };
+
+function extractPosition(text, count) {
+  const t = text.toLowerCase();
+  if (/\blast\b/.test(t)) return count;
+  const word = Object.keys(ORDINALS).find(w => new RegExp(`\\b${w}\\b`).test(t));
+  if (word) return ORDINALS[word];
+  const match = t.match(/#?(\d+)/);
+  return match ? parseInt(match[1]) : null;
+}
+
 function extractVideoId(text) {
   const match = text.match(/[a-zA-Z0-9_-]{11}/);
   return match ? match[0] : null;
@@ -125,7 +148,13 @@ function extractChannelId(text) {
 ------------------------------------------ */
 export async function POST(req) {
   try {
-    const { message, session_id = "default" } = await req.json();
+    const { message, session_id } = await req.json();
+    if (!session_id) {
+      return Response.json(
+        { reply: "❌ Missing session_id.", type: "text" },
+        { status: 400 }
+      );
+    }
     const session = getSession(session_id);
     const intent = detectIntent(message);
 
@@ -140,11 +169,9 @@ export async function POST(req) {
         });
       }
 
-      const result = await callMCP("search_videos", { 
-        query: session.lastQuery,
-        max_results: 10,
-        page_token: session.pageToken
-      }, req);  // 🔥 PASS REQUEST
+      // Served from the backend session; it only calls YouTube once its
+      // prefetched results run out
+      const result = await callMCP("session_next_page", { page_size: 10 }, req, session_id);
 
       if (result.success && result.data?.items) {
         const items = result.data.items
@@ -152,7 +179,7 @@ export async function POST(req) {
           .sort((a, b) => b.score - a.score)
           .map(x => x.video);
 
-        session.pageToken = result.data.nextPageToken || null;
+        session.hasMore = result.data.has_more;
         session.videos.push(...items.map(v => v.id?.videoId || v.id));
 
         return Response.json({
@@ -163,6 +190,31 @@ export async function POST(req) {
       }
     }
 
+    /* ------------------------------------------
+       DETAILS OF ITEM N
+    ------------------------------------------ */
+    if (intent === "details") {
+      const position = extractPosition(message, session.videos.length);
+      const videoId = position ? session.videos[position - 1] : null;
+
+      if (!videoId) {
+        return Response.json({
+          reply: "❌ I can't find that result. Try searching first!",
+          type: "text"
+        });
+      }
+
+      const result = await callMCP("session_item_details", { video_id: videoId }, req, session_id);
+
+      if (result.success) {
+        return Response.json({
+          reply: `🔎 Result #${position}: ${result.data.item.snippet?.title || videoId}`,
+          data: { data: { items: [result.data.item] } },
+          type: "tool_result"
+        });
+      }
+    }
+
     /* ------------------------------------------
        LIKE VIDEO - FIXED
     ------------------------------------------ */
@@ -371,11 +423,12 @@ export async function POST(req) {
        TRENDING
     ------------------------------------------ */
     if (intent === "trending") {
-      const result = await callMCP("trending_videos", { max_results: 12 }, req);  // 🔥 PASS REQUEST
+      const result = await callMCP("trending_videos", { max_results: 12 }, req, session_id);
 
       if (result.success) {
         session.videos = result.data.items.map(v => v.id);
         session.lastQuery = "trending";
+        session.hasMore = result.data.has_more;
 
         return Response.json({
           reply: "🔥 Trending videos!",
@@ -418,8 +471,10 @@ export async function POST(req) {
               high: { url: "https://via.placeholder.com/300?text=No+Image" }
             }
           },
+          // search_channels now includes channel statistics
           statistics: {
-            viewCount: 0
+            viewCount: ch.statistics?.viewCount || 0,
+            subscriberCount: ch.statistics?.subscriberCount || 0
           }
         };
       });
@@ -443,18 +498,17 @@ export async function POST(req) {
        RECOMMEND
     ------------------------------------------ */
     if (intent === "recommend") {
-      if (!session.lastResults?.data?.items?.length) {
+      // Ranked on the backend from the results already shown
+      const result = await callMCP("session_best_result", { top_n: 1 }, req, session_id);
+
+      if (!result.success || !result.data?.items?.length) {
         return Response.json({
           reply: "Search for videos first!",
           type: "text"
         });
       }
 
-      const ranked = session.lastResults.data.items
-        .map(v => ({ video: v, score: scoreVideo(v, session.lastQuery) }))
-        .sort((a, b) => b.score - a.score);
-
-      const best = ranked[0].video;
+      const best = result.data.items[0];
       session.videos = [best.id?.videoId || best.id];
 
       return Response.json({
@@ -473,7 +527,7 @@ export async function POST(req) {
       query,
       max_results: 10,
       order: "relevance"
-    }, req);  // 🔥 PASS REQUEST
+    }, req, session_id);
 
     if (result.success && result.data?.items) {
       const items = result.data.items
@@ -481,14 +535,13 @@ export async function POST(req) {
         .sort((a, b) => b.score - a.score)
         .map(x => x.video);
 
-      session.lastResults = { data: { items } };
       session.lastQuery = query;
       session.videos = items.map(v => v.id?.videoId || v.id);
-      session.pageToken = result.data.nextPageToken || null;
+      session.hasMore = result.data.has_more;
 
       return Response.json({
         reply: `🎬 Found ${items.length} videos about "${query}"! ${
-          session.pageToken ? "Say 'more' for next page." : ""
+          session.hasMore ? "Say 'more' for next page." : ""
         }`,
         data: { data: { items } },
         type: "tool_result"
@@ -5,6 +5,17 @@ import MessageBubble from "../components/MessageBubble";
 import VideoCard from "../components/VideoCard";
 import Loader from "../components/Loader";
 
+// One chat session per browser, so follow-ups ("more", "the third one")
+// reach this user's own results
+function chatSessionId() {
+  let id = localStorage.getItem("yt_chat_session");
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem("yt_chat_session", id);
+  }
+  return id;
+}
+
 export default function Home() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
@@ -69,7 +80,7 @@ export default function Home() {
         "Content-Type": "application/json",
         ...(token && { "Authorization": `Bearer ${token}` })
       },
-      body: JSON.stringify({ message: userMsg })
+      body: JSON.stringify({ message: userMsg, session_id: chatSessionId() })
     });
 
     const data = await res.json();
@@ -1,3 +1,11 @@
+const BACKEND_URL = process.env.NEXT_PUBLIC_MCP_SERVER_URL?.replace("/mcp", "");
+
+// ⭐ Load thumbnails through the backend cache instead of the YouTube CDN
+function proxiedThumbnail(url) {
+  if (!url || !BACKEND_URL) return url;
+  return `${BACKEND_URL}/thumbnails?url=${encodeURIComponent(url)}&w=480`;
+}
+
 export default function VideoCard({ item }) {
   const videoId = item.id?.videoId || item.id;
   const snippet = item.snippet || {};
@@ -52,8 +60,15 @@ export default function VideoCard({ item }) {
     >
       <div style={{ position: "relative" }}>
         <img
-          src={thumbnail}
+          src={proxiedThumbnail(thumbnail)}
           alt={title}
+          loading="lazy"
+          onError={(e) => {
+            // Fall back to the CDN if the proxy is unavailable
+            if (thumbnail && e.currentTarget.src !== thumbnail) {
+              e.currentTarget.src = thumbnail;
+            }
+          }}
           style={{
             width: "100%",
             height: "180px",